@@ -1,12 +1,9 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import requests
-from streamlit_lottie import st_lottie
 from utils.layout import apply_custom_css, GradientHeader
+from utils.lazy import lazy_import
 from utils.themes import HealthScopeTheme as Theme
-import json
-from pathlib import Path
+from utils.profiling import get_profile, overview
+from utils.assets import load_lottie
 
 # --------------------------------------------------
 # PAGE CONFIG
@@ -21,25 +18,10 @@ PRIMARY = Theme.HOME["primary"]
 TEXT = Theme.HOME["text"]
 GRADIENT = Theme.HOME["gradient"]
 
-# Lottie loader (same fallback)
-def load_lottie_url(url):
-    try:
-        r = requests.get(url, timeout=8, verify=False)
-        if r.status_code == 200:
-            return r.json()
-    except Exception:
-        pass
-    return None
-
-def load_lottie_file(path):
-    try:
-        p = Path(path)
-        if p.exists():
-            return json.loads(p.read_text(encoding="utf-8"))
-    except Exception:
-        pass
-    return None
+# Imported when the animation is rendered, after the header is on screen
+streamlit_lottie = lazy_import("streamlit_lottie")
 
+# Lottie fallback (used until a remote animation is in the disk cache)
 INLINE_FALLBACK = {
     "v": "5.7.4",
     "fr": 30,
@@ -93,11 +75,14 @@ INLINE_FALLBACK = {
     ]
 }
 
-lottie_medical = (
-    load_lottie_url("https://assets9.lottiefiles.com/packages/lf20_tutvdkg0.json")
-    or load_lottie_url("https://assets2.lottiefiles.com/packages/lf20_9x7s1x3g.json")
-    or load_lottie_file("assets/medical.json")
-    or INLINE_FALLBACK
+# Never blocks: remote candidates are fetched in the background (utils/assets.py)
+lottie_medical = load_lottie(
+    [
+        "https://assets9.lottiefiles.com/packages/lf20_tutvdkg0.json",
+        "https://assets2.lottiefiles.com/packages/lf20_9x7s1x3g.json",
+    ],
+    fallback=INLINE_FALLBACK,
+    local_path="assets/medical.json",
 )
 
 # Header
@@ -124,43 +109,31 @@ with col1:
     )
 
 with col2:
-    st_lottie(lottie_medical, height=260, key="med_lottie")
+    streamlit_lottie.st_lottie(lottie_medical, height=260, key="med_lottie")
 
 # Dashboard Stats (kept as-is)
 st.markdown("<hr style='margin-top:1.25rem; margin-bottom:0.75rem;'>", unsafe_allow_html=True)
 
-@st.cache_data
-def load_dataset(path):
+def load_profile(name):
     try:
-        df = pd.read_csv(path)
+        return get_profile(name)
     except Exception:
-        df = pd.DataFrame()
-    return df
-
-@st.cache_data
-def compute_stats(df: pd.DataFrame):
-    if df.empty:
-        return {"Rows": "0", "Columns": "0", "Missing": "0", "Numeric": "0", "Categorical": "0"}
-    rows = df.shape[0]
-    cols = df.shape[1]
-    missing = int(df.isna().sum().sum())
-    numeric_cols = df.select_dtypes(include=[np.number]).shape[1]
-    categorical_cols = cols - numeric_cols
+        return None
+
+def compute_stats(profile):
+    # Read from the dataset's profile sidecar; the data itself is not loaded
+    stats = overview(profile)
     return {
-        "Rows": f"{rows:,}",
-        "Columns": f"{cols}",
-        "Missing": f"{missing}",
-        "Numeric": f"{numeric_cols}",
-        "Categorical": f"{categorical_cols}",
+        "Rows": f"{stats['rows']:,}",
+        "Columns": f"{stats['cols']}",
+        "Missing": f"{stats['missing']}",
+        "Numeric": f"{stats['numeric']}",
+        "Categorical": f"{stats['categorical']}",
     }
 
-heart_df = load_dataset("data/heart_disease.csv")
-diabetes_df = load_dataset("data/diabetes.csv")
-pcos_df = load_dataset("data/pcos_data.csv")
-
-heart_stats = compute_stats(heart_df)
-diabetes_stats = compute_stats(diabetes_df)
-pcos_stats = compute_stats(pcos_df)
+heart_stats = compute_stats(load_profile("heart"))
+diabetes_stats = compute_stats(load_profile("diabetes"))
+pcos_stats = compute_stats(load_profile("pcos"))
 
 st.markdown(f"<h2 style='color:{TEXT}; text-align:center;'>Dashboard Statistics</h2>", unsafe_allow_html=True)
 
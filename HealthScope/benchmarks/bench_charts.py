@@ -0,0 +1,111 @@
+"""
+Microbenchmark: build + serialize time per chart type in utils/charts.py
+
+"before" styles every figure with the full inline update_layout dictionary
+the builders used to pass on every call (validated each time) and then
+serializes with fig.to_json(). "after" uses the registered theme templates
+and utils.charts.figure_to_json (no re-validation, orjson when installed).
+The inline dictionary is applied on top of the templated figure, so "before"
+slightly overstates the old cost by the (small) template update.
+
+Run from the HealthScope directory:
+
+    python -m benchmarks.bench_charts [--rows N] [--repeat N] [--theme heart]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils import charts
+from utils.themes import HealthScopeTheme as Theme
+
+
+def inline_layout(theme, title):
+    """
+    The per-call styling every builder applied before templates existed
+    """
+    axis = dict(gridcolor='rgba(0,0,0,0.05)', showgrid=True, zeroline=False)
+    return dict(
+        template='plotly',
+        title=dict(text=title, font=dict(size=20, family=Theme.FONT_FAMILY, color='#1F2937'), x=0.5, xanchor='center'),
+        font=dict(family=Theme.FONT_FAMILY),
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(255,255,255,0.9)',
+        xaxis=axis,
+        yaxis=axis,
+        height=400,
+        margin=dict(t=80, b=60, l=60, r=40),
+        transition={'duration': 500}
+    )
+
+
+def chart_cases(df, theme):
+    """
+    One zero-argument builder per chart type
+    """
+    counts = df['target'].value_counts()
+    bar_data = df['cp'].value_counts().rename_axis('cp').reset_index(name='count')
+    return {
+        'pie': lambda: charts.create_pie_chart(counts.values, list(counts.index), 'Pie', theme),
+        'histogram': lambda: charts.create_histogram(df, 'age', 'Histogram', theme),
+        'boxplot': lambda: charts.create_boxplot(df, 'chol', 'Box', theme),
+        'heatmap': lambda: charts.create_correlation_heatmap(df, 'Heatmap', theme),
+        'feature_importance': lambda: charts.create_feature_importance_chart(
+            list(df.columns), np.linspace(1, 0, len(df.columns)), 'Importance', theme),
+        'bar': lambda: charts.create_bar_chart(bar_data, 'cp', 'count', 'Bar', theme),
+        'scatter': lambda: charts.create_scatter_plot(df, 'chol', 'thalach', 'Scatter', theme, 'target'),
+    }
+
+
+def timed(fn, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def synthetic_heart(rows, seed=0):
+    """
+    Heart dataset resampled (with replacement) to the requested row count
+    """
+    base = pd.read_csv('data/heart_disease.csv')
+    rng = np.random.default_rng(seed)
+    return base.iloc[rng.integers(0, len(base), rows)].reset_index(drop=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rows', type=int, default=1025)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--theme', default='heart', choices=sorted(Theme.CHART_COLORS))
+    args = parser.parse_args(argv)
+
+    df = synthetic_heart(args.rows)
+    print(f"rows={args.rows} repeat={args.repeat} theme={args.theme} json_engine={charts.JSON_ENGINE}")
+    print(f"{'chart':<20}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+
+    for name, build in chart_cases(df, args.theme).items():
+        # Warm the data caches so only figure work is measured
+        build()
+
+        def before():
+            fig = build()
+            fig.update_layout(**inline_layout(args.theme, name))
+            return fig.to_json()
+
+        def after():
+            return charts.figure_to_json(build())
+
+        before_s, _ = timed(before, args.repeat)
+        after_s, _ = timed(after, args.repeat)
+        print(f"{name:<20}{before_s * 1e3:>12.2f}{after_s * 1e3:>12.2f}{before_s / after_s:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
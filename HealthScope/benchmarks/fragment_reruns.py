@@ -0,0 +1,158 @@
+"""
+Check which page sections rerun when a single fragment reruns
+
+Each dashboard page is split into ``st.fragment`` sections (overview, graph
+builder, each insights row, heatmap). A widget inside a fragment reruns only
+that fragment; this script runs every page headlessly with section timing on,
+then:
+
+1. reruns each fragment on its own and lists the sections that executed, and
+2. drives the graph builder (axes, chart type, aggregate, Generate) the way the browser
+   does, as reruns scoped to the builder fragment, and checks that only the
+   ``graph_builder`` section ran and that no error was shown.
+
+Run from the HealthScope directory:
+
+    python -m benchmarks.fragment_reruns [page ...]
+
+Exits non-zero if any builder interaction reran another section.
+"""
+
+import argparse
+import functools
+import glob
+import json
+import logging
+import os
+import sys
+from contextlib import contextmanager
+
+os.environ.setdefault("HEALTHSCOPE_PROFILE", "1")
+
+from streamlit.testing.v1 import AppTest
+from streamlit.testing.v1 import local_script_runner
+
+from utils.timing import logger
+
+
+class SectionLog(logging.Handler):
+    """
+    Collects the section records logged by utils.timing
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.sections = []
+
+    def emit(self, record):
+        self.sections.append(json.loads(record.getMessage())["section"])
+
+    def take(self):
+        taken, self.sections = self.sections, []
+        return taken
+
+
+@contextmanager
+def fragment_scope(fragment_id):
+    """
+    Make the next AppTest runs reruns of one fragment, as a widget inside
+    that fragment would request
+    """
+    original = local_script_runner.RerunData
+    local_script_runner.RerunData = functools.partial(original, fragment_id_queue=[fragment_id])
+    try:
+        yield
+    finally:
+        local_script_runner.RerunData = original
+
+
+def fragment_ids(at):
+    # Registration order, which is the order the page calls its sections
+    return list(at._fragment_storage._fragments)
+
+
+def _selectbox(at, prefix):
+    return next(s for s in at.selectbox if s.label.lower().startswith(prefix))
+
+
+def builder_interactions(at):
+    """
+    (description, action) pairs covering every graph builder widget
+
+    Widgets are looked up when each action runs, since every rerun rebuilds
+    the element tree.
+    """
+    actions = [
+        ("X axis", lambda: _selectbox(at, "x").set_value(_selectbox(at, "x").options[1])),
+        ("Y axis", lambda: _selectbox(at, "y").set_value(_selectbox(at, "y").options[2])),
+    ]
+    for chart_type in _selectbox(at, "chart").options:
+        actions.append((f"chart type {chart_type}", lambda t=chart_type: _selectbox(at, "chart").set_value(t)))
+        actions.append((f"Generate {chart_type}", lambda: at.button[0].click()))
+    actions.append(("chart type Bar", lambda: _selectbox(at, "chart").set_value("Bar")))
+    for agg in _selectbox(at, "aggregate").options:
+        actions.append((f"aggregate {agg}", lambda a=agg: _selectbox(at, "aggregate").set_value(a)))
+        actions.append((f"Generate Bar of {agg}", lambda: at.button[0].click()))
+    return actions
+
+
+def check_page(path, log, timeout=120):
+    """
+    Returns:
+        True if every builder interaction reran only the graph builder
+    """
+    at = AppTest.from_file(os.path.abspath(path), default_timeout=timeout).run()
+    full = log.take()
+    if at.exception:
+        print(f"{path}: skipped ({at.exception[0].value})")
+        return True
+    print(f"\n{path}")
+    print(f"  full run: {', '.join(full)}")
+
+    owners = {}
+    for fid in fragment_ids(at):
+        with fragment_scope(fid):
+            at.run()
+        ran = log.take()
+        owners[fid] = ran
+        print(f"  fragment rerun: {', '.join(ran) or '(nothing)'}")
+
+    builder = next((fid for fid, ran in owners.items() if ran == ["graph_builder"]), None)
+    if builder is None:
+        print("  FAIL: no fragment reruns the graph builder on its own")
+        return False
+
+    # Back to a complete element tree before driving the builder widgets
+    at.run()
+    log.take()
+    ok = True
+    for label, action in builder_interactions(at):
+        action()
+        with fragment_scope(builder):
+            at.run()
+        ran = log.take()
+        errors = [e.value for e in at.exception] + [e.value for e in at.error]
+        status = "ok" if ran == ["graph_builder"] and not errors else "FAIL"
+        ok &= status == "ok"
+        print(f"  {label:<28} -> {', '.join(ran):<20} {status}{'' if not errors else f' {errors}'}")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("pages", nargs="*", help="page files (default: every page)")
+    args = parser.parse_args(argv)
+
+    log = SectionLog()
+    logger.addHandler(log)
+    logger.setLevel(logging.INFO)
+
+    ok = True
+    for path in args.pages or sorted(glob.glob("pages/*.py")):
+        ok &= check_page(path, log)
+    print("\nbuilder interactions isolated" if ok else "\nbuilder interactions reran other sections")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+"""
+Import-time report and startup budget for the dashboard pages
+
+For each page the module-level import statements (the ones that run when the
+page script starts, including those nested in top-level ``with``/``if``
+blocks, but not those inside functions) and ``lazy_import`` calls are replayed in a fresh interpreter
+under ``python -X importtime``. Self times are aggregated per top-level
+package.
+
+Run from the HealthScope directory:
+
+    python -m benchmarks.importtime [--top 8] [--budget-ms 1500] [--json out.json]
+
+Exits with status 1 when a page's total import time exceeds its budget or
+one of its imports fails, so the command can gate CI.
+"""
+
+import argparse
+import ast
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+
+PAGES = ["Home.py"] + sorted(str(p) for p in Path("pages").glob("*.py"))
+
+# Total eager import time allowed per page, in milliseconds
+DEFAULT_BUDGET_MS = 1500
+
+
+def _is_lazy_import(node):
+    # ``name = lazy_import("module")`` still imports the parent packages
+    return (
+        isinstance(node, ast.Assign)
+        and isinstance(node.value, ast.Call)
+        and getattr(node.value.func, "id", None) == "lazy_import"
+    )
+
+
+def eager_imports(path):
+    """
+    Source of the import statements a page runs at load time
+
+    ``lazy_import`` assignments are included too, since they import the
+    parent packages of the deferred module.
+    """
+    tree = ast.parse(Path(path).read_text(encoding="utf-8"))
+    found = []
+
+    def visit(nodes):
+        for node in nodes:
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                found.append(ast.unparse(node))
+            elif _is_lazy_import(node):
+                found.append(ast.unparse(node))
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)):
+                continue
+            else:
+                for field in ("body", "orelse", "finalbody", "handlers"):
+                    visit(getattr(node, field, []) or [])
+
+    visit(tree.body)
+    return found
+
+
+def measure(statements):
+    """
+    Run import statements under -X importtime and parse the timings
+
+    Every statement runs even when an earlier one fails; failures are
+    returned rather than counted as cheap imports.
+
+    Returns:
+        (dict of top-level package -> self time in microseconds,
+        list of [statement, error] for the statements that raised)
+    """
+    code = "_failed = []\n" + "\n".join(
+        f"try:\n    {stmt}\nexcept Exception as exc:\n"
+        f"    _failed.append([{stmt!r}, f'{{type(exc).__name__}}: {{exc}}'])"
+        for stmt in statements
+    ) + "\nprint(repr(_failed))"
+    env = dict(os.environ, PYTHONPATH=os.getcwd())
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=env,
+    )
+    try:
+        failed = ast.literal_eval(proc.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError, SyntaxError):
+        failed = [["<interpreter>", proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "no output"]]
+
+    per_package = defaultdict(int)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        per_package[name.strip().split(".")[0]] += int(self_us)
+    return dict(per_package), failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time report per dashboard page")
+    parser.add_argument("--top", type=int, default=8, help="packages listed per page")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--json", help="write the full report to this file")
+    args = parser.parse_args(argv)
+
+    report = {}
+    over_budget = []
+    failed_pages = []
+    for page in PAGES:
+        packages, failed = measure(eager_imports(page))
+        total_ms = sum(packages.values()) / 1000
+        report[page] = {"total_ms": round(total_ms, 1), "packages_us": packages, "failed": failed}
+
+        if failed:
+            status = "IMPORT FAILED"
+        else:
+            status = "OK" if total_ms <= args.budget_ms else "OVER BUDGET"
+        print(f"{page}: {total_ms:.0f} ms ({status}, budget {args.budget_ms:.0f} ms)")
+        for stmt, error in failed:
+            print(f"    FAILED {stmt}: {error}")
+        for name, us in sorted(packages.items(), key=lambda kv: -kv[1])[:args.top]:
+            print(f"    {name:<24}{us / 1000:>8.1f} ms")
+        if failed:
+            failed_pages.append(page)
+        elif total_ms > args.budget_ms:
+            over_budget.append(page)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if failed_pages:
+        print("Imports failed: " + ", ".join(failed_pages))
+    if over_budget:
+        print("Startup budget exceeded: " + ", ".join(over_budget))
+    return 1 if failed_pages or over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
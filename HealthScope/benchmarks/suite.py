@@ -0,0 +1,305 @@
+"""
+Benchmark suite: CSV load, overview stats and every chart at 10k-10M rows
+
+For each dataset schema (heart, diabetes, PCOS) and each size, a synthetic
+CSV is generated once (see benchmarks.synthetic) and these are timed:
+
+    load    pd.read_csv, CSV -> Arrow store conversion, Arrow store load
+    stats   the profile behind the overview stat blocks
+    charts  every figure builder in utils/charts.py
+    page    every section of the matching dashboard page, all its figures
+            built by the page's own section builders (utils.sections)
+
+Each case reports wall time, peak RSS while it ran, and for figures the
+serialized size sent to the browser. Every (dataset, size) pair runs in its
+own process so one case's memory high-water mark does not leak into the next.
+Data caches are not primed, so charts are measured as a first render. Plotly
+template registration is done before the first chart and is not counted.
+
+Run from the HealthScope directory:
+
+    python -m benchmarks.suite [--datasets heart,pcos] [--sizes 10k,1m,10m]
+                               [--out results.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue as queue_module
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_csv
+
+
+DATASETS = ("heart", "diabetes", "pcos")
+DEFAULT_SIZES = "10k,1m,10m"
+RESULTS_DIR = Path("benchmarks/results")
+RSS_INTERVAL = 0.005
+# How often run_isolated checks that its child is still alive
+POLL_SECONDS = 1.0
+
+# Columns used for the generic builder cases: two numerics and a grouping column
+COLUMNS = {
+    "heart": ("chol", "thalach", "target"),
+    "diabetes": ("Glucose", "BMI", "Outcome"),
+    "pcos": ("Age", "Undiagnosed PCOS Likelihood", "Risk"),
+}
+
+
+def parse_size(text):
+    """
+    "10k" -> 10000, "1m" -> 1000000, "2500" -> 2500
+    """
+    text = text.strip().lower()
+    scale = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * scale)
+
+
+def rss_mb():
+    """
+    Current resident set size of this process in MB
+    """
+    try:
+        with open("/proc/self/statm") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        import resource
+
+        # Peak, not current, where /proc is unavailable (ru_maxrss is KB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+class PeakRSS:
+    """
+    Samples RSS on a background thread while the block runs
+    """
+
+    def __enter__(self):
+        self.start = self.peak = rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(RSS_INTERVAL):
+            self.peak = max(self.peak, rss_mb())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, rss_mb())
+
+
+def measure(fn):
+    """
+    Run one case and return (result, metrics)
+    """
+    with PeakRSS() as rss:
+        start = time.perf_counter()
+        result = fn()
+        wall_ms = (time.perf_counter() - start) * 1000
+    return result, {
+        "wall_ms": round(wall_ms, 2),
+        "peak_rss_mb": round(rss.peak, 1),
+        "rss_growth_mb": round(rss.peak - rss.start, 1),
+    }
+
+
+def chart_cases(name, df):
+    """
+    One zero-argument call per function in utils/charts.py
+    """
+    from utils import charts
+
+    value, other, group = COLUMNS[name]
+    counts = df[group].value_counts()
+    bar_data = counts.rename_axis(group).reset_index(name="count")
+    numeric = df.select_dtypes("number").columns
+    return {
+        "create_pie_chart": lambda: charts.create_pie_chart(counts.values, list(counts.index), "Pie", name),
+        "create_histogram": lambda: charts.create_histogram(df, value, "Histogram", name),
+        "create_binned_histogram": lambda: charts.create_binned_histogram(df, value),
+        "create_boxplot": lambda: charts.create_boxplot(df, value, "Box", name),
+        "create_summary_boxplot": lambda: charts.create_summary_boxplot(df, value, group, by_group=True),
+        "create_correlation_heatmap": lambda: charts.create_correlation_heatmap(df, "Correlations", name),
+        "create_feature_importance_chart": lambda: charts.create_feature_importance_chart(
+            list(numeric), np.linspace(1, 0, len(numeric)), "Importance", name),
+        "create_sparkline_data": lambda: charts.create_sparkline_data(df, value),
+        "create_bar_chart": lambda: charts.create_bar_chart(bar_data, group, "count", "Bar", name),
+        "create_scatter_plot": lambda: charts.create_scatter_plot(df, value, other, "Scatter", name, group),
+    }
+
+
+def page_cases(name, df):
+    """
+    One call per section of the matching dashboard page, through the section
+    builders the page itself uses (utils.sections)
+    """
+    from utils.sections import GROUPS
+
+    return {group: (lambda build=build: build(df)) for group, build in GROUPS[name].items()}
+
+
+def run_dataset(name, rows):
+    """
+    All cases for one dataset at one size; runs in a fresh process
+    """
+    from utils import datastore
+    from utils.charts import figure_to_json, template_name
+    from utils.profiling import overview, profile_frame
+    from utils.schemas import SCHEMAS
+
+    csv_path = make_csv(name, rows)
+    schema = SCHEMAS[name]
+    results = []
+
+    def record(group, case, metrics, **extra):
+        results.append({"dataset": name, "rows": rows, "group": group, "case": case, **metrics, **extra})
+
+    _, metrics = measure(lambda: pd.read_csv(csv_path))
+    record("load", "read_csv", metrics)
+    if datastore.ARROW_AVAILABLE:
+        _, metrics = measure(lambda: datastore.convert_csv(csv_path, schema))
+        record("load", "convert_csv", metrics)
+    df, metrics = measure(lambda: datastore.load_table(csv_path, schema))
+    record("load", "load_table", metrics, frame_mb=round(df.memory_usage(deep=True).sum() / 2**20, 1))
+
+    _, metrics = measure(lambda: overview(profile_frame(df)))
+    record("stats", "overview", metrics)
+
+    # One-off Plotly template registration is startup cost, not chart cost
+    template_name(name)
+    for group, cases in (("charts", chart_cases(name, df)), ("page", page_cases(name, df))):
+        for case, build in cases.items():
+            try:
+                result, metrics = measure(build)
+            except Exception as e:
+                record(group, case, {}, error=f"{type(e).__name__}: {e}")
+                continue
+            # Section builders return (name, title, figure) for every figure of the section
+            figures = [fig for _, _, fig in result] if group == "page" else [result]
+            figures = [fig for fig in figures if hasattr(fig, "to_plotly_json")]
+            if figures:
+                payload, serialize = measure(lambda: [figure_to_json(fig) for fig in figures])
+                metrics.update(figure_bytes=sum(map(len, payload)), serialize_ms=serialize["wall_ms"])
+            record(group, case, metrics)
+    return results
+
+
+def _worker(name, rows, queue):
+    queue.put(run_dataset(name, rows))
+
+
+def run_isolated(name, rows):
+    """
+    run_dataset in a spawned process, so peak RSS is per (dataset, size)
+
+    A child that dies without reporting (e.g. killed for running out of
+    memory on the largest tier) is recorded as one error result.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_worker, args=(name, rows, queue))
+    proc.start()
+    while True:
+        try:
+            results = queue.get(timeout=POLL_SECONDS)
+            break
+        except queue_module.Empty:
+            if proc.is_alive():
+                continue
+            # Exited: take a result that was queued just before, if any
+            try:
+                results = queue.get(timeout=POLL_SECONDS)
+                break
+            except queue_module.Empty:
+                proc.join()
+                return [{"dataset": name, "rows": rows, "group": "run", "case": "run_dataset",
+                         "error": f"process exited with code {proc.exitcode} before reporting"}]
+    proc.join()
+    return results
+
+
+def print_table(results):
+    print(f"{'case':<42}{'wall ms':>11}{'peak MB':>10}{'+MB':>8}{'fig KB':>10}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['group'] + '/' + r['case']:<42}  {r['error']}")
+            continue
+        size = f"{r['figure_bytes'] / 1024:.1f}" if "figure_bytes" in r else ""
+        print(f"{r['group'] + '/' + r['case']:<42}{r['wall_ms']:>11.1f}"
+              f"{r['peak_rss_mb']:>10.0f}{r['rss_growth_mb']:>8.0f}{size:>10}")
+
+
+def compare(results, baseline_path):
+    """
+    Print wall time and figure size ratios against an earlier results file
+    """
+    baseline = json.loads(Path(baseline_path).read_text(encoding="utf-8"))["results"]
+    key = lambda r: (r["dataset"], r["rows"], r["group"], r["case"])
+    before = {key(r): r for r in baseline if "wall_ms" in r}
+
+    print(f"\nComparison with {baseline_path} (ratio new / old; < 1 is faster or smaller)")
+    print(f"{'case':<52}{'old ms':>10}{'new ms':>10}{'time':>8}{'size':>8}")
+    for r in results:
+        old = before.get(key(r))
+        if old is None or "wall_ms" not in r:
+            continue
+        label = f"{r['dataset']}/{r['rows']}/{r['group']}/{r['case']}"
+        ratio = r["wall_ms"] / old["wall_ms"] if old["wall_ms"] else float("nan")
+        size = ""
+        if r.get("figure_bytes") and old.get("figure_bytes"):
+            size = f"{r['figure_bytes'] / old['figure_bytes']:.2f}"
+        print(f"{label:<52}{old['wall_ms']:>10.1f}{r['wall_ms']:>10.1f}{ratio:>8.2f}{size:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--datasets", default=",".join(DATASETS))
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="comma separated, e.g. 10k,1m,10m")
+    parser.add_argument("--out", help="results file (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    names = [n.strip() for n in args.datasets.split(",") if n.strip()]
+    unknown = set(names) - set(DATASETS)
+    if unknown:
+        parser.error(f"unknown datasets: {', '.join(sorted(unknown))}")
+    sizes = [parse_size(s) for s in args.sizes.split(",") if s.strip()]
+
+    results = []
+    for name in names:
+        for rows in sizes:
+            print(f"\n== {name} @ {rows:,} rows")
+            batch = run_isolated(name, rows)
+            print_table(batch)
+            results.extend(batch)
+
+    out = Path(args.out) if args.out else RESULTS_DIR / time.strftime("%Y%m%d-%H%M%S.json")
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps({
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "results": results,
+    }, indent=2), encoding="utf-8")
+    print(f"\nResults written to {out}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
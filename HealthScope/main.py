@@ -1,6 +1,99 @@
-def main():
-    print("Hello from repl-nix-workspace!")
+"""
+HealthScope Command Line
+Dashboard work that does not need a browser session
+
+Run from the HealthScope directory:
+
+    python main.py report [--out reports] [--format html,json] [--workers N]
+                          [--dataset NAME] [csv ...]
+
+``report`` renders every dashboard figure to static HTML/JSON reports (see
+utils.report). Without CSV arguments it exports the registered datasets
+(default: all three, or those given with ``--dataset``). CSV arguments are
+cohort extracts: each is exported with the figures of the dataset given by
+``--dataset``, or the dataset whose columns its header contains.
+
+    python main.py warmup [--workers N] [--no-figures] [dataset ...]
+
+``warmup`` builds every on-disk cache of the registered datasets (see
+utils.warmup) and exits non-zero if anything failed.
+"""
+
+import argparse
+import logging
+import os
+import sys
+
+
+def report(args, parser):
+    from utils.report import FORMATS, export, matching_datasets
+    from utils.sections import GROUPS
+
+    formats = [f.strip() for f in args.format.split(",") if f.strip()]
+    unknown = set(formats) - set(FORMATS)
+    if unknown or not formats:
+        parser.error(f"--format takes a comma-separated list of {', '.join(FORMATS)}")
+    datasets = args.dataset or []
+    unknown = set(datasets) - set(GROUPS)
+    if unknown:
+        parser.error(f"unknown datasets: {', '.join(sorted(unknown))}")
+
+    if not args.csv:
+        jobs = [(name, None) for name in (datasets or list(GROUPS))]
+    else:
+        if len(datasets) > 1:
+            parser.error("give at most one --dataset with CSV extracts")
+        jobs = []
+        for path in args.csv:
+            if not os.path.isfile(path):
+                parser.error(f"no such file: {path}")
+            matches = matching_datasets(path)
+            if datasets and datasets[0] not in matches:
+                parser.error(f"{path} does not have the columns of the {datasets[0]} dataset")
+            if not datasets and len(matches) != 1:
+                parser.error(f"cannot tell which dataset {path} is an extract of; use --dataset")
+            jobs.append((datasets[0] if datasets else matches[0], path))
+
+    failures = export(jobs, args.out, formats, args.workers)
+    print(f"{len(jobs)} reports written to {args.out}" + (f", {failures} groups failed" if failures else ""))
+    return 1 if failures else 0
+
+
+def warmup(args, parser):
+    from utils.registry import DATASETS
+    from utils.warmup import warm
+
+    unknown = set(args.datasets) - set(DATASETS)
+    if unknown:
+        parser.error(f"unknown datasets: {', '.join(sorted(unknown))}")
+    failures = warm(args.datasets or list(DATASETS), args.workers, figures=not args.no_figures)
+    print("caches ready" if not failures else f"warm-up failed: {failures} steps")
+    return 1 if failures else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HealthScope command line")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("report", help="render every dashboard figure to HTML/JSON reports")
+    export_parser.add_argument("csv", nargs="*", help="cohort extracts to export instead of the registered datasets")
+    export_parser.add_argument("--dataset", action="append",
+                               help="dataset to export, or the dataset the CSV extracts belong to (repeatable)")
+    export_parser.add_argument("--out", default="reports", help="output directory")
+    export_parser.add_argument("--format", default="html,json", help="comma-separated: html, json")
+    export_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="pool processes")
+    export_parser.set_defaults(handler=report)
+
+    warmup_parser = commands.add_parser("warmup", help="build every cache the pages read, exit 1 on failure")
+    warmup_parser.add_argument("datasets", nargs="*", help="datasets to warm (default: all registered)")
+    warmup_parser.add_argument("--workers", type=int, default=os.cpu_count(), help="pool processes")
+    warmup_parser.add_argument("--no-figures", action="store_true", help="skip building the default figures")
+    warmup_parser.set_defaults(handler=warmup)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    return args.handler(args, commands.choices[args.command])
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,19 +1,35 @@
 # Heart Disease Dashboard (visualization-only)
 import streamlit as st
-import pandas as pd
-import numpy as np
-
-# Prefer Plotly for interactivity
-try:
-    import plotly.express as px
-    import plotly.graph_objects as go
-    PLOTLY_AVAILABLE = True
-except Exception:
-    PLOTLY_AVAILABLE = False
 
 # Local utils
+from utils.lazy import lazy_import, module_available
 from utils.layout import apply_custom_css, GradientHeader
 from utils.themes import HealthScopeTheme as Theme
+from utils.scatter import build_scatter, jittered
+from utils.figure_cache import cached_figure, remember_chart, last_chart, cache_caption
+from utils.query import AGGREGATES, group_aggregate
+from utils.downsample import downsample
+from utils.charts import create_binned_histogram, create_summary_boxplot
+from utils.sections import (
+    show,
+    heart_donuts,
+    heart_histograms,
+    heart_bp_and_counts,
+    heart_scatter_and_age,
+    heart_heatmap,
+)
+from utils.correlation import correlation_matrix
+from utils.registry import get_dataset
+from utils.aggregates import value_counts
+from utils.streaming import streaming_notice
+from utils.cohort import cohort_filter, cohort_profile
+from utils.profiling import get_profile, overview, column_stat, value_count
+from utils.timing import section, timed, plotly_chart, profiler_panel
+
+# Prefer Plotly for interactivity (imported on first use)
+PLOTLY_AVAILABLE = module_available("plotly")
+if PLOTLY_AVAILABLE:
+    px = lazy_import("plotly.express")
 
 # -------------------------
 # Page config + global style
@@ -30,14 +46,9 @@ BG = "#FBFBFB"
 # -------------------------
 # Data
 # -------------------------
-@st.cache_data
-def load_data():
-    df = pd.read_csv("data/heart_disease.csv")
-    df = df.copy()
-    df.fillna(0, inplace=True)
-    return df
-
-df = load_data()
+# Shared read-only view; missing values are filled with 0 at load time
+df = get_dataset("heart")
+profile = get_profile("heart")
 
 # -------------------------
 # Header
@@ -53,204 +64,193 @@ st.markdown("<div style='height:0.8rem'></div>", unsafe_allow_html=True)
 # -------------------------
 # Single tab (visuals only)
 # -------------------------
+# Every section below draws the sidebar cohort
+cohort = cohort_filter(df, "heart")
+streaming_notice(df, cohort)
+profile = cohort_profile(cohort, profile)
+df = cohort
 st.markdown("## 📊 Dashboard Overview")
 
 left_col, right_col = st.columns([1, 1], gap="large")
 
-with left_col:
-    rows = df.shape[0]
-    cols = df.shape[1]
-    missing = int(df.isna().sum().sum())
-    missing_pct = round((missing / max(1, rows * cols)) * 100, 2)
-    numeric_cols = df.select_dtypes(include=np.number).shape[1]
-    cat_cols = df.select_dtypes(exclude=np.number).shape[1]
-    avg_age = round(df["age"].mean(), 1)
-    target_counts = df["target"].value_counts()
-    target_pct = round((target_counts.get(1, 0) / rows) * 100, 1)
-
-    stat_color = PRIMARY
-
-    def stat_block(label, value):
-        st.markdown(
-            f"""
-            <div style="min-width:140px; margin-bottom:12px;">
-                <div style="font-size:0.85rem; color:#6B7280; text-transform:uppercase;">{label}</div>
-                <div style="font-size:1.5rem; font-weight:800; color:{stat_color};">{value}</div>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
-
-    c1, c2, c3 = st.columns(3)
-    with c1:
-        stat_block("Rows", f"{rows:,}")
-        stat_block("Missing", f"{missing} ({missing_pct}%)")
-
-    with c2:
-        stat_block("Columns", cols)
-        stat_block("Average Age", avg_age)
-
-    with c3:
-        stat_block("Numeric / Categorical", f"{numeric_cols} / {cat_cols}")
-        stat_block("Target % (Has Disease)", f"{target_pct}%")
-
-    st.markdown("### Quick preview of the dataset")
-    st.dataframe(df.head(), use_container_width=True)
-
-with right_col:
-    st.markdown("### 📈 Interactive Graph Builder")
+@st.fragment
+def render_overview():
+    with section("overview", page="heart"):
+        # Stat blocks come from the precomputed profile, not the DataFrame
+        stats = overview(profile)
+        rows = stats["rows"]
+        cols = stats["cols"]
+        missing = stats["missing"]
+        missing_pct = round((missing / max(1, rows * cols)) * 100, 2)
+        numeric_cols = stats["numeric"]
+        cat_cols = stats["categorical"]
+        avg_age = round(column_stat(profile, "age", "mean", 0), 1)
+        target_pct = round((value_count(profile, "target", 1) / rows) * 100, 1)
+
+        stat_color = PRIMARY
+
+        def stat_block(label, value):
+            st.markdown(
+                f"""
+                <div style="min-width:140px; margin-bottom:12px;">
+                    <div style="font-size:0.85rem; color:#6B7280; text-transform:uppercase;">{label}</div>
+                    <div style="font-size:1.5rem; font-weight:800; color:{stat_color};">{value}</div>
+                </div>
+                """,
+                unsafe_allow_html=True
+            )
+
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            stat_block("Rows", f"{rows:,}")
+            stat_block("Missing", f"{missing} ({missing_pct}%)")
+
+        with c2:
+            stat_block("Columns", cols)
+            stat_block("Average Age", avg_age)
+
+        with c3:
+            stat_block("Numeric / Categorical", f"{numeric_cols} / {cat_cols}")
+            stat_block("Target % (Has Disease)", f"{target_pct}%")
+
+        st.markdown("### Quick preview of the dataset")
+        st.dataframe(df.head(), use_container_width=True)
 
-    all_cols = list(df.columns)
-    x_axis = st.selectbox("X axis", all_cols, key="x_axis")
-    y_axis = st.selectbox("Y axis (optional)", ["None"] + all_cols, key="y_axis")
-    chart_type = st.selectbox("Chart type", ["Scatter", "Line", "Histogram", "Box", "Bar"], key="chart_type")
 
-    if st.button("Generate", use_container_width=True, key="generate_btn"):
-        if not PLOTLY_AVAILABLE:
-            st.warning("Plotly not installed.")
-        else:
-            try:
-                if chart_type == "Scatter" and y_axis != "None":
-                    fig = px.scatter(df, x=x_axis, y=y_axis,
-                                     color="target",
-                                     color_discrete_sequence=[PRIMARY, ACCENT])
-                    st.plotly_chart(fig, use_container_width=True)
-
-                elif chart_type == "Line" and y_axis != "None":
-                    fig = px.line(df, x=x_axis, y=y_axis)
-                    fig.update_traces(line_color=PRIMARY)
-                    st.plotly_chart(fig, use_container_width=True)
-
-                elif chart_type == "Histogram":
-                    fig = px.histogram(df, x=x_axis, nbins=30,
-                                       color_discrete_sequence=[PRIMARY])
-                    st.plotly_chart(fig, use_container_width=True)
-
-                elif chart_type == "Box" and y_axis != "None":
-                    fig = px.box(df, x=x_axis, y=y_axis,
+with left_col:
+    render_overview()
+
+@st.fragment
+def render_graph_builder():
+    with section("graph_builder", page="heart"):
+        st.markdown("### 📈 Interactive Graph Builder")
+
+        all_cols = list(df.columns)
+        x_axis = st.selectbox("X axis", all_cols, key="x_axis")
+        y_axis = st.selectbox("Y axis (optional)", ["None"] + all_cols, key="y_axis")
+        chart_type = st.selectbox("Chart type", ["Scatter", "Line", "Histogram", "Box", "Bar"], key="chart_type")
+        agg = st.selectbox("Aggregate", AGGREGATES, index=AGGREGATES.index("mean"), key="aggregate",
+                           disabled=chart_type not in ("Line", "Bar"))
+
+        @timed("build")
+        def build_chart(x_axis, y_axis, chart_type, agg):
+            fig = None
+            if chart_type == "Scatter" and y_axis != "None":
+                fig = build_scatter(jittered(df, x_axis, y_axis, color="target"), x_axis, y_axis,
+                                    color="target",
+                                    colors=[PRIMARY, ACCENT])
+
+            elif chart_type == "Line" and y_axis != "None":
+                data = group_aggregate(df, x_axis, y_axis, agg)
+                data = downsample(data, x_axis, data.columns[1])
+                fig = px.line(data, x=x_axis, y=data.columns[1])
+                fig.update_traces(line_color=PRIMARY)
+
+            elif chart_type == "Histogram":
+                fig = create_binned_histogram(df, x_axis, nbins=30, color=PRIMARY)
+
+            elif chart_type == "Box" and y_axis != "None":
+                fig = create_summary_boxplot(df, y_axis, x_axis, colors=PRIMARY)
+
+            elif chart_type == "Bar":
+                if y_axis != "None":
+                    data = group_aggregate(df, x_axis, y_axis, agg)
+                    fig = px.bar(data, x=x_axis, y=data.columns[1],
+                                 color_discrete_sequence=[PRIMARY])
+                else:
+                    counts = value_counts(df, x_axis).reset_index()
+                    counts.columns = [x_axis, "count"]
+                    fig = px.bar(counts, x=x_axis, y="count",
                                  color_discrete_sequence=[PRIMARY])
-                    st.plotly_chart(fig, use_container_width=True)
-
-                elif chart_type == "Bar":
-                    if y_axis != "None":
-                        fig = px.bar(df, x=x_axis, y=y_axis,
-                                     color_discrete_sequence=[PRIMARY])
-                    else:
-                        agg = df[x_axis].value_counts().reset_index()
-                        agg.columns = [x_axis, "count"]
-                        fig = px.bar(agg, x=x_axis, y="count",
-                                     color_discrete_sequence=[PRIMARY])
-                    st.plotly_chart(fig, use_container_width=True)
-
-            except Exception as e:
-                st.error(f"Plotting failed: {e}")
+            return fig
+
+        if st.button("Generate", use_container_width=True, key="generate_btn"):
+            remember_chart("heart", x_axis, y_axis, chart_type, agg)
+
+        # The last generated chart stays visible across other widget reruns
+        requested = last_chart("heart")
+        if requested:
+            if not PLOTLY_AVAILABLE:
+                st.warning("Plotly not installed.")
+            else:
+                try:
+                    fig = cached_figure(df, *requested, theme="heart", build=build_chart)
+                    if fig is not None:
+                        plotly_chart(fig, use_container_width=True)
+                except Exception as e:
+                    st.error(f"Plotting failed: {e}")
+            cache_caption()
+
+
+with right_col:
+    render_graph_builder()
 
 # Compact Visualizations
 st.markdown("---")
 st.markdown("### Compact Visualizations — Quick Insights")
 
 # Row 1 – Donut charts
-r1c1, r1c2 = st.columns(2)
-with r1c1:
-    st.markdown("#### Heart Disease Distribution")
-    tgt = df["target"].value_counts()
-    fig = go.Figure(data=[go.Pie(
-        labels=["No Disease", "Has Disease"],
-        values=[tgt.get(0, 0), tgt.get(1, 0)],
-        hole=0.45,
-        marker=dict(colors=[ACCENT, PRIMARY])
-    )])
-    st.plotly_chart(fig, use_container_width=True)
-
-with r1c2:
-    st.markdown("#### Chest Pain Type Distribution")
-    cp_counts = df["cp"].value_counts().sort_index()
-    fig = go.Figure(data=[go.Pie(
-        labels=[f"Type {i}" for i in cp_counts.index],
-        values=cp_counts.values,
-        hole=0.45,
-        marker=dict(colors=[ACCENT, PRIMARY, "#FF6B6B", "#FF4A4A"])
-    )])
-    st.plotly_chart(fig, use_container_width=True)
+@st.fragment
+def render_donuts():
+    with section("donuts", page="heart"):
+        show(heart_donuts(df), [["target_donut"], ["chest_pain_donut"]], headings=True)
+
+
+render_donuts()
 
 # Row 2 – Histograms
-r2c1, r2c2 = st.columns(2)
-with r2c1:
-    st.markdown("#### Age Distribution")
-    fig = px.histogram(df, x="age", nbins=30, color_discrete_sequence=[PRIMARY])
-    st.plotly_chart(fig, use_container_width=True)
+@st.fragment
+def render_histograms():
+    with section("histograms", page="heart"):
+        show(heart_histograms(df), [["age_histogram"], ["cholesterol_histogram"]], headings=True)
+
 
-with r2c2:
-    st.markdown("#### Cholesterol Distribution")
-    fig = px.histogram(df, x="chol", nbins=30, color_discrete_sequence=[ACCENT])
-    st.plotly_chart(fig, use_container_width=True)
+render_histograms()
 
 # Row 3 – Boxplot + Count
-r3c1, r3c2 = st.columns(2)
-with r3c1:
-    st.markdown("#### Resting BP by Target")
-    fig = px.box(df, x="target", y="trestbps",
-                 color="target",
-                 color_discrete_map={0: ACCENT, 1: PRIMARY})
-    st.plotly_chart(fig, use_container_width=True)
-
-with r3c2:
-    st.markdown("#### Target Counts")
-    fig = px.histogram(df, x="target", nbins=2, color_discrete_sequence=[PRIMARY])
-    st.plotly_chart(fig, use_container_width=True)
+@st.fragment
+def render_bp_and_counts():
+    with section("bp_and_counts", page="heart"):
+        show(heart_bp_and_counts(df), [["bp_by_target_box"], ["target_counts"]], headings=True)
+
+
+render_bp_and_counts()
 
 # Row 4 – Scatter + Age Histogram
-r4c1, r4c2 = st.columns(2)
-with r4c1:
-    st.markdown("#### Cholesterol vs Max Heart Rate")
-    fig = px.scatter(df, x="chol", y="thalach",
-                     color="target",
-                     color_discrete_sequence=[ACCENT, PRIMARY])
-    st.plotly_chart(fig, use_container_width=True)
-
-with r4c2:
-    st.markdown("#### Age Histogram (Compact)")
-    fig = px.histogram(df, x="age", nbins=25, color_discrete_sequence=[ACCENT])
-    st.plotly_chart(fig, use_container_width=True)
+@st.fragment
+def render_scatter_and_age():
+    with section("scatter_and_age", page="heart"):
+        show(heart_scatter_and_age(df), [["chol_thalach_scatter"], ["age_histogram_compact"]], headings=True)
+
+
+render_scatter_and_age()
 
 # Full-width correlation heatmap
 st.markdown("---")
 st.markdown("### ❤️ Heart Disease Feature Correlations")
 
-corr = df.corr(numeric_only=True)
+@st.fragment
+def render_heatmap():
+    with section("heatmap", page="heart"):
+        if PLOTLY_AVAILABLE:
+            show(heart_heatmap(df), [["correlation_heatmap"]])
+        else:
+            sns = lazy_import("seaborn")
+            plt = lazy_import("matplotlib.pyplot")
 
-if PLOTLY_AVAILABLE:
-    fig = px.imshow(
-        corr,
-        text_auto=".2f",
-        color_continuous_scale="Reds",
-        aspect="auto",
-    )
-
-    fig.update_layout(
-        height=900,
-        width=None,
-        margin=dict(l=0, r=0, t=40, b=40),
-        coloraxis_colorbar=dict(
-            thickness=18,
-            outlinewidth=0,
-            ticks="outside",
-        )
-    )
-
-    st.plotly_chart(fig, use_container_width=True)
-else:
-    import seaborn as sns
-    import matplotlib.pyplot as plt
-
-    fig, ax = plt.subplots(figsize=(22, 14))
-    sns.heatmap(
-        corr,
-        annot=True,
-        fmt=".2f",
-        cmap="Reds",
-        linewidths=0.5,
-        cbar_kws={"shrink": 0.6},
-        ax=ax
-    )
-    st.pyplot(fig, use_container_width=True)
+            fig, ax = plt.subplots(figsize=(22, 14))
+            sns.heatmap(
+                correlation_matrix(df),
+                annot=True,
+                fmt=".2f",
+                cmap="Reds",
+                linewidths=0.5,
+                cbar_kws={"shrink": 0.6},
+                ax=ax
+            )
+            st.pyplot(fig, use_container_width=True)
+
+
+render_heatmap()
+
+profiler_panel("heart")
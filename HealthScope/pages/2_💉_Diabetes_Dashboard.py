@@ -1,16 +1,31 @@
 # Diabetes Dashboard (visualization-only)
 import streamlit as st
-import pandas as pd
 
-from utils.layout import apply_custom_css, GradientHeader, Card, ResultCard, KPIBlock
+from utils.layout import apply_custom_css, GradientHeader
+from utils.lazy import lazy_import
 from utils.themes import HealthScopeTheme as Theme
-from utils.charts import (
-    create_pie_chart,
-    create_histogram,
-    create_boxplot,
-    create_correlation_heatmap,
+from utils.scatter import build_scatter, jittered
+from utils.figure_cache import cached_figure, remember_chart, last_chart, cache_caption
+from utils.query import AGGREGATES, group_aggregate
+from utils.downsample import downsample
+from utils.registry import get_dataset
+from utils.aggregates import value_counts
+from utils.streaming import streaming_notice
+from utils.cohort import cohort_filter, cohort_profile
+from utils.profiling import get_profile, overview, column_stat
+from utils.timing import section, timed, plotly_chart, profiler_panel
+from utils.charts import create_binned_histogram, create_summary_boxplot
+from utils.sections import (
+    show,
+    diabetes_quick_insights,
+    diabetes_glucose_and_counts,
+    diabetes_scatter_and_age,
+    diabetes_heatmap,
 )
 
+# Imported on first use
+px = lazy_import("plotly.express")
+
 # --------------------------------------------------
 # PAGE CONFIG
 # --------------------------------------------------
@@ -32,11 +47,8 @@ ACCENT = "#8C7BFF"
 # --------------------------------------------------
 # LOAD DATA
 # --------------------------------------------------
-@st.cache_data
-def load_data():
-    return pd.read_csv("data/diabetes.csv")
-
-df = load_data()
+df = get_dataset("diabetes")
+profile = get_profile("diabetes")
 
 # --------------------------------------------------
 # HEADER
@@ -55,86 +67,119 @@ st.markdown("<div style='height:1rem'></div>", unsafe_allow_html=True)
 # --------------------------------------------------
 tab1 = st.container()
 
+# Every section below draws the sidebar cohort
+cohort = cohort_filter(df, "diabetes")
+streaming_notice(df, cohort)
+profile = cohort_profile(cohort, profile)
+df = cohort
 st.markdown(f"<h2 style='color:{TEXT}; margin-bottom:1rem;'>Dataset Overview</h2>", unsafe_allow_html=True)
 
 left_col, right_col = st.columns([1, 1], gap="large")
 
-with left_col:
-    rows = df.shape[0]
-    cols = df.shape[1]
-    missing = int(df.isna().sum().sum())
-    missing_pct = round((missing / max(1, rows * cols)) * 100, 2)
-    avg_age = round(df["Age"].mean(), 1) if "Age" in df.columns else None
-    avg_bmi = round(df["BMI"].mean(), 1) if "BMI" in df.columns else None
-    diabetic_pct = round((df["Outcome"].sum() / rows) * 100, 1) if "Outcome" in df.columns else None
-
-    def stat_block(label, value):
-        st.markdown(
-            f"""
-            <div style="min-width:140px; margin-bottom:12px;">
-                <div style="font-size:0.85rem; color:#6B7280; text-transform:uppercase;">{label}</div>
-                <div style="font-size:1.5rem; font-weight:800; color:{PRIMARY};">{value}</div>
-            </div>
-            """,
-            unsafe_allow_html=True
-        )
-
-    c1, c2, c3 = st.columns(3)
-    with c1:
-        stat_block("Rows", f"{rows:,}")
-        stat_block("Missing", f"{missing} ({missing_pct}%)")
-
-    with c2:
-        stat_block("Columns", cols)
-        stat_block("Average Age", avg_age or "N/A")
-
-    with c3:
-        stat_block("Avg BMI", avg_bmi or "N/A")
-        stat_block("Diabetes %", f"{diabetic_pct}%" if diabetic_pct is not None else "N/A")
-
-    st.markdown("### Quick Preview of the Dataset (first 5 rows)")
-    st.dataframe(df.head(), use_container_width=True)
-
-with right_col:
-    st.markdown("### 📈 Interactive Graph Builder")
-
-    all_cols = list(df.columns)
-    x_axis = st.selectbox("X axis", all_cols, key="xaxis_diab")
-    y_axis = st.selectbox("Y axis (optional)", ["None"] + all_cols, key="yaxis_diab")
-    chart_type = st.selectbox("Chart type", ["Scatter", "Line", "Histogram", "Box", "Bar"], key="charttype_diab")
+@st.fragment
+def render_overview():
+    with section("overview", page="diabetes"):
+        # Stat blocks come from the precomputed profile, not the DataFrame
+        stats = overview(profile)
+        rows = stats["rows"]
+        cols = stats["cols"]
+        missing = stats["missing"]
+        missing_pct = round((missing / max(1, rows * cols)) * 100, 2)
+        mean_age = column_stat(profile, "Age", "mean")
+        mean_bmi = column_stat(profile, "BMI", "mean")
+        mean_outcome = column_stat(profile, "Outcome", "mean")
+        avg_age = round(mean_age, 1) if mean_age is not None else None
+        avg_bmi = round(mean_bmi, 1) if mean_bmi is not None else None
+        diabetic_pct = round(mean_outcome * 100, 1) if mean_outcome is not None else None
+
+        def stat_block(label, value):
+            st.markdown(
+                f"""
+                <div style="min-width:140px; margin-bottom:12px;">
+                    <div style="font-size:0.85rem; color:#6B7280; text-transform:uppercase;">{label}</div>
+                    <div style="font-size:1.5rem; font-weight:800; color:{PRIMARY};">{value}</div>
+                </div>
+                """,
+                unsafe_allow_html=True
+            )
+
+        c1, c2, c3 = st.columns(3)
+        with c1:
+            stat_block("Rows", f"{rows:,}")
+            stat_block("Missing", f"{missing} ({missing_pct}%)")
+
+        with c2:
+            stat_block("Columns", cols)
+            stat_block("Average Age", avg_age or "N/A")
+
+        with c3:
+            stat_block("Avg BMI", avg_bmi or "N/A")
+            stat_block("Diabetes %", f"{diabetic_pct}%" if diabetic_pct is not None else "N/A")
+
+        st.markdown("### Quick Preview of the Dataset (first 5 rows)")
+        st.dataframe(df.head(), use_container_width=True)
 
-    if st.button("Generate Chart", use_container_width=True, key="gen_diab_chart"):
-        try:
-            import plotly.express as px
 
+with left_col:
+    render_overview()
+
+@st.fragment
+def render_graph_builder():
+    with section("graph_builder", page="diabetes"):
+        st.markdown("### 📈 Interactive Graph Builder")
+
+        all_cols = list(df.columns)
+        x_axis = st.selectbox("X axis", all_cols, key="xaxis_diab")
+        y_axis = st.selectbox("Y axis (optional)", ["None"] + all_cols, key="yaxis_diab")
+        chart_type = st.selectbox("Chart type", ["Scatter", "Line", "Histogram", "Box", "Bar"], key="charttype_diab")
+        agg = st.selectbox("Aggregate", AGGREGATES, index=AGGREGATES.index("mean"), key="aggregate_diab",
+                           disabled=chart_type not in ("Line", "Bar"))
+
+        @timed("build")
+        def build_chart(x_axis, y_axis, chart_type, agg):
+            fig = None
             if chart_type == "Scatter" and y_axis != "None":
-                fig = px.scatter(df, x=x_axis, y=y_axis, color="Outcome" if "Outcome" in df.columns else None)
-                st.plotly_chart(fig, use_container_width=True)
+                color = "Outcome" if "Outcome" in df.columns else None
+                fig = build_scatter(jittered(df, x_axis, y_axis, color=color), x_axis, y_axis, color=color)
 
             elif chart_type == "Line" and y_axis != "None":
-                fig = px.line(df, x=x_axis, y=y_axis)
-                st.plotly_chart(fig, use_container_width=True)
+                data = group_aggregate(df, x_axis, y_axis, agg)
+                data = downsample(data, x_axis, data.columns[1])
+                fig = px.line(data, x=x_axis, y=data.columns[1])
 
             elif chart_type == "Histogram":
-                fig = px.histogram(df, x=x_axis, nbins=30,
-                                   color_discrete_sequence=[PRIMARY])
-                st.plotly_chart(fig, use_container_width=True)
+                fig = create_binned_histogram(df, x_axis, nbins=30, color=PRIMARY)
 
             elif chart_type == "Box" and y_axis != "None":
-                fig = px.box(df, x=x_axis, y=y_axis)
-                st.plotly_chart(fig, use_container_width=True)
+                fig = create_summary_boxplot(df, y_axis, x_axis)
 
             elif chart_type == "Bar":
                 if y_axis != "None":
-                    fig = px.bar(df, x=x_axis, y=y_axis)
+                    data = group_aggregate(df, x_axis, y_axis, agg)
+                    fig = px.bar(data, x=x_axis, y=data.columns[1])
                 else:
-                    agg = df[x_axis].value_counts().reset_index()
-                    agg.columns = [x_axis, "count"]
-                    fig = px.bar(agg, x=x_axis, y="count")
-                st.plotly_chart(fig, use_container_width=True)
+                    counts = value_counts(df, x_axis).reset_index()
+                    counts.columns = [x_axis, "count"]
+                    fig = px.bar(counts, x=x_axis, y="count")
+            return fig
+
+        if st.button("Generate Chart", use_container_width=True, key="gen_diab_chart"):
+            remember_chart("diabetes", x_axis, y_axis, chart_type, agg)
+
+        # The last generated chart stays visible across other widget reruns
+        requested = last_chart("diabetes")
+        if requested:
+            try:
+                fig = cached_figure(df, *requested, theme="diabetes", build=build_chart)
+                if fig is not None:
+                    plotly_chart(fig, use_container_width=True)
+            except Exception as e:
+                st.error(f"Plot failed: {e}")
+            cache_caption()
 
-        except Exception as e:
-            st.error(f"Plot failed: {e}")
+
+with right_col:
+    render_graph_builder()
 
 # --------------------------------------------------
 # MINI VISUALIZATIONS BELOW
@@ -142,73 +187,42 @@ with right_col:
 st.markdown("---")
 st.markdown(f"<h3 style='color:{TEXT};'>Quick Insights</h3>", unsafe_allow_html=True)
 
-c1, c2 = st.columns(2)
-
-with c1:
-    if "Outcome" in df.columns:
-        outcome_counts = df["Outcome"].value_counts()
-        pie = create_pie_chart(outcome_counts.values,
-                               ["Non-Diabetic", "Diabetic"],
-                               "Diabetes Distribution",
-                               theme="diabetes")
-        st.plotly_chart(pie, use_container_width=True)
-
-    if "Glucose" in df.columns:
-        hist_glucose = create_histogram(df, "Glucose",
-                                        "Glucose Distribution",
-                                        theme="diabetes")
-        st.plotly_chart(hist_glucose, use_container_width=True)
-
-with c2:
-    if "BMI" in df.columns:
-        box_bmi = create_boxplot(df, "BMI",
-                                 "BMI Spread",
-                                 theme="diabetes")
-        st.plotly_chart(box_bmi, use_container_width=True)
-
-    if "Insulin" in df.columns:
-        insulin_nonzero = df[df["Insulin"] > 0]
-        hist_insulin = create_histogram(insulin_nonzero,
-                                        "Insulin",
-                                        "Insulin Distribution",
-                                        theme="diabetes")
-        st.plotly_chart(hist_insulin, use_container_width=True)
+@st.fragment
+def render_quick_insights():
+    with section("quick_insights", page="diabetes"):
+        show(diabetes_quick_insights(df),
+             [["outcome_pie", "glucose_histogram"], ["bmi_box", "insulin_histogram"]])
+
+
+render_quick_insights()
 
 st.markdown("---")
 st.markdown(f"<h3 style='color:{TEXT};'>Additional Visualizations</h3>", unsafe_allow_html=True)
 
-g1, g2 = st.columns(2)
-with g1:
-    if "Glucose" in df.columns:
-        import plotly.express as px
-        fig_glu = px.histogram(df, x="Glucose", nbins=30,
-                               marginal="rug",
-                               color_discrete_sequence=[PRIMARY])
-        st.plotly_chart(fig_glu, use_container_width=True)
-
-with g2:
-    if "Outcome" in df.columns:
-        counts = df["Outcome"].value_counts().reset_index()
-        counts.columns = ["Outcome", "Count"]
-        fig_cnt = px.bar(counts, x="Outcome", y="Count")
-        st.plotly_chart(fig_cnt, use_container_width=True)
-
-g3, g4 = st.columns(2)
-with g3:
-    if set(["BMI", "Glucose"]).issubset(df.columns):
-        fig_sc = px.scatter(df, x="BMI", y="Glucose",
-                            color="Outcome" if "Outcome" in df.columns else None)
-        st.plotly_chart(fig_sc, use_container_width=True)
-
-with g4:
-    if set(["Outcome", "Age"]).issubset(df.columns):
-        fig_bx = px.box(df, x="Outcome", y="Age",
-                        color="Outcome" if "Outcome" in df.columns else None)
-        st.plotly_chart(fig_bx, use_container_width=True)
+@st.fragment
+def render_glucose_and_counts():
+    with section("glucose_and_counts", page="diabetes"):
+        show(diabetes_glucose_and_counts(df), [["glucose_binned_histogram"], ["outcome_counts"]])
+
+
+render_glucose_and_counts()
+
+@st.fragment
+def render_scatter_and_age():
+    with section("scatter_and_age", page="diabetes"):
+        show(diabetes_scatter_and_age(df), [["bmi_glucose_scatter"], ["age_by_outcome_box"]])
+
+
+render_scatter_and_age()
 
 st.markdown("---")
 st.markdown(f"<h3 style='color:{TEXT};'>Correlation Heatmap</h3>", unsafe_allow_html=True)
-corr_fig = create_correlation_heatmap(df,
-                                      "Diabetes Feature Correlations",
-                                      theme="diabetes")
-st.plotly_chart(corr_fig, use_container_width=True)
+@st.fragment
+def render_heatmap():
+    with section("heatmap", page="diabetes"):
+        show(diabetes_heatmap(df), [["correlation_heatmap"]])
+
+
+render_heatmap()
+
+profiler_panel("diabetes")
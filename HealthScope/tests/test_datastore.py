@@ -0,0 +1,54 @@
+"""
+Tests for utils.datastore
+
+Run from the HealthScope directory:
+
+    python -m pytest tests
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from utils import datastore
+
+
+def _converted(tmp_path, text="a,b\n1,2\n3,4\n"):
+    path = tmp_path / "data.csv"
+    path.write_text(text)
+    datastore.convert_csv(path)
+    return path
+
+
+def test_converted_copy_is_current(tmp_path):
+    path = _converted(tmp_path)
+    assert datastore.is_current(path)
+    assert datastore.load_table(path)["a"].tolist() == [1, 3]
+
+
+def test_replaced_csv_with_older_mtime_is_stale(tmp_path):
+    path = _converted(tmp_path)
+    old = path.stat()
+    # A copy that keeps an earlier timestamp (cp -p, rsync, an unpacked archive)
+    path.write_text("a,b\n5,6\n7,8\n9,10\n")
+    os.utime(path, ns=(old.st_atime_ns, old.st_mtime_ns - 10**9))
+
+    assert not datastore.is_current(path)
+    assert datastore.load_table(path)["a"].tolist() == [5, 7, 9]
+
+
+def test_touched_csv_keeps_its_copy(tmp_path):
+    path = _converted(tmp_path)
+    old = path.stat()
+    os.utime(path, ns=(old.st_atime_ns, old.st_mtime_ns + 10**9))
+
+    assert datastore.is_current(path)
+
+
+def test_copy_without_stamp_is_stale(tmp_path):
+    path = _converted(tmp_path)
+    datastore.stamp_path(path).unlink()
+
+    assert not datastore.is_current(path)
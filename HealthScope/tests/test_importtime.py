@@ -0,0 +1,42 @@
+"""
+Tests for benchmarks.importtime
+
+Run from the HealthScope directory:
+
+    python -m pytest tests
+
+Each page's eager imports are replayed in a fresh interpreter, so these
+tests take a few seconds.
+"""
+
+import ast
+
+import pytest
+
+from benchmarks import importtime
+
+
+@pytest.mark.parametrize("page", importtime.PAGES)
+def test_page_imports_within_budget(page):
+    packages, failed = importtime.measure(importtime.eager_imports(page))
+    total_ms = sum(packages.values()) / 1000
+
+    assert failed == []
+    assert total_ms <= importtime.DEFAULT_BUDGET_MS, (
+        f"{page} imports in {total_ms:.0f} ms "
+        f"(budget {importtime.DEFAULT_BUDGET_MS} ms)"
+    )
+
+
+@pytest.mark.parametrize("path", ["utils/charts.py", "utils/scatter.py", "utils/figure_cache.py"])
+def test_chart_modules_load_plotly_lazily(path):
+    with open(path, encoding="utf-8") as fh:
+        tree = ast.parse(fh.read())
+    eager = [
+        alias.name
+        for node in tree.body
+        if isinstance(node, ast.Import)
+        for alias in node.names
+    ] + [node.module for node in tree.body if isinstance(node, ast.ImportFrom)]
+
+    assert not [name for name in eager if name and name.startswith("plotly")]
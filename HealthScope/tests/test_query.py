@@ -0,0 +1,73 @@
+"""
+Tests for utils.query
+
+Run from the HealthScope directory:
+
+    python -m pytest tests
+
+The DuckDB cases are skipped unless duckdb is installed
+(requirements-optional.txt).
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils import query
+
+
+CSV = """group,level,value
+a,1,1.5
+b,,2.5
+,2,3.0
+a,1,
+b,2,4.0
+a,2,6.5
+"""
+
+
+def _by_key(result):
+    # Keys as text: SQL and pandas may type a filled group column differently
+    return {str(k): float(v) for k, v in zip(result.iloc[:, 0], result.iloc[:, 1])}
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "data.csv"
+    path.write_text(CSV)
+    return path
+
+
+@pytest.mark.parametrize("agg", query.AGGREGATES)
+def test_duckdb_matches_pandas_in_memory(csv_path, agg):
+    pytest.importorskip("duckdb")
+    df = pd.read_csv(csv_path)
+    assert _by_key(query._duckdb(df, "group", "value", agg)) == _by_key(query._pandas(df, "group", "value", agg))
+
+
+@pytest.mark.parametrize("x, fillna", [
+    ("level", 0.5),   # float fill in an integer column
+    ("group", 0),     # integer fill in a text column
+])
+@pytest.mark.parametrize("agg", query.AGGREGATES)
+def test_duckdb_matches_pandas_with_fillna(csv_path, x, fillna, agg):
+    pytest.importorskip("duckdb")
+    expected = query._pandas(pd.read_csv(csv_path).fillna(fillna), x, "value", agg)
+    result = query._duckdb(None, x, "value", agg, csv_path=csv_path, fillna=fillna)
+    assert _by_key(result) == pytest.approx(_by_key(expected))
+
+
+@pytest.mark.parametrize("x, fillna", [("level", 0.5), ("group", 0)])
+@pytest.mark.parametrize("agg", ["count", "mean", "sum"])
+def test_chunked_matches_pandas_with_fillna(csv_path, x, fillna, agg):
+    expected = query._pandas(pd.read_csv(csv_path).fillna(fillna), x, "value", agg)
+    result = query._chunked(csv_path, x, "value", agg, fillna=fillna)
+    assert _by_key(result) == pytest.approx(_by_key(expected))
+
+
+def test_mean_comes_from_the_shared_aggregate_layer(csv_path, monkeypatch):
+    df = pd.read_csv(csv_path)
+    monkeypatch.setattr(query, "_compute", lambda *args: pytest.fail("mean computed by the query engine"))
+    result = query.group_aggregate(df, "group", "value", "mean")
+    assert list(result.columns) == ["group", "mean(value)"]
+    assert _by_key(result) == {"a": 4.0, "b": np.mean([2.5, 4.0])}
@@ -0,0 +1,79 @@
+"""
+Tests for utils.registry
+
+Run from the HealthScope directory:
+
+    python -m pytest tests
+"""
+
+import numpy as np
+import pandas as pd
+
+from utils.aggregates import subset
+from utils.registry import DatasetRegistry
+
+
+def _registry(tmp_path, rows=1000, max_bytes=2**30):
+    path = tmp_path / "data.csv"
+    pd.DataFrame({"a": np.arange(rows), "b": np.arange(rows) % 7}).to_csv(path, index=False)
+    return DatasetRegistry({"data": {"path": str(path)}}, max_bytes=max_bytes)
+
+
+def test_derived_artifacts_count_against_the_ceiling(tmp_path):
+    registry = _registry(tmp_path)
+    df = registry.get("data")
+    version = df.attrs["fingerprint"]
+    base = registry.total_bytes()
+
+    rows = registry.derived("data", version, "evens", lambda: np.arange(0, len(df), 2))
+    assert registry.derived("data", version, "evens", lambda: None) is rows
+    assert registry.total_bytes() == base + rows.nbytes
+    assert registry.stats()["data"]["derived"] == 1
+
+
+def test_derived_artifacts_are_evicted_before_datasets(tmp_path):
+    registry = _registry(tmp_path)
+    df = registry.get("data")
+    registry.max_bytes = registry.total_bytes() + 1000
+    version = df.attrs["fingerprint"]
+
+    registry.derived("data", version, "first", lambda: np.zeros(100))
+    registry.derived("data", version, "second", lambda: np.zeros(100))
+
+    assert registry.stats()["data"]["derived"] == 1
+    assert registry.total_bytes() <= registry.max_bytes
+    # The most recent artifact is the one kept
+    assert registry.derived("data", version, "second", lambda: None) is not None
+
+
+def test_subset_keeps_positions_not_rows(tmp_path, monkeypatch):
+    registry = _registry(tmp_path)
+    monkeypatch.setattr("utils.registry.get_registry", lambda: registry)
+    df = registry.get("data")
+    base = registry.total_bytes()
+
+    part = subset(df, "b_is_0", lambda d: d["b"].to_numpy() == 0)
+
+    assert part["b"].eq(0).all() and len(part) == 143
+    assert part.attrs["parent"] == ("data", df.attrs["fingerprint"])
+    # One int32 position per row, not a copy of the frame
+    assert registry.total_bytes() - base == 4 * len(part)
+
+
+def test_range_index_is_freed_with_its_dataset(tmp_path, monkeypatch):
+    from utils.rangeindex import range_index
+
+    registry = _registry(tmp_path)
+    monkeypatch.setattr("utils.registry.get_registry", lambda: registry)
+    df = registry.get("data")
+    base = registry.total_bytes()
+
+    index = range_index(df, "a")
+    assert range_index(df, "a") is index
+    assert registry.total_bytes() == base + index.nbytes
+
+    # A new version of the file replaces the entry and its index
+    (tmp_path / "data.csv").write_text("a,b\n1,2\n")
+    df = registry.get("data")
+    assert registry.stats()["data"]["derived"] == 0
+    assert range_index(df, "a").count() == 1
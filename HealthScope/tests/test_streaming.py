@@ -0,0 +1,53 @@
+"""
+Tests for utils.streaming
+
+Run from the HealthScope directory:
+
+    python -m pytest tests
+"""
+
+import numpy as np
+
+from utils.streaming import FINE_BINS, MAX_DISTINCT, NumericSketch
+
+
+def _histogram_sketch():
+    # Enough distinct values in 0.08-2.4 (a DiabetesPedigreeFunction-like
+    # column) to leave exact mode
+    sketch = NumericSketch()
+    sketch.update(np.linspace(0.08, 2.4, MAX_DISTINCT + 100))
+    assert not sketch.exact
+    return sketch
+
+
+def test_outlier_keeps_histogram_bounded():
+    sketch = _histogram_sketch()
+    sketch.update([1e7])
+
+    assert len(sketch.hist) <= FINE_BINS
+    assert sketch.hist.sum() == sketch.count == MAX_DISTINCT + 101
+    assert sketch.max == 1e7
+    assert abs(sketch.quantiles([1.0])[0] - 1e7) <= sketch.width
+    # All but one row still lie below the median's coarse bin
+    assert sketch.quantiles([0.5])[0] < sketch.width
+
+
+def test_outlier_below_range_keeps_histogram_bounded():
+    sketch = _histogram_sketch()
+    sketch.update([-1e9, 5.0])
+
+    assert len(sketch.hist) <= FINE_BINS
+    assert sketch.hist.sum() == sketch.count
+    assert abs(sketch.quantiles([0.0])[0] + 1e9) <= sketch.width
+
+
+def test_values_inside_range_keep_resolution():
+    sketch = _histogram_sketch()
+    width = sketch.width
+    more = np.linspace(0.1, 2.3, 1000)
+    sketch.update(more)
+
+    assert sketch.width == width
+    assert len(sketch.hist) <= FINE_BINS
+    exact = np.median(np.concatenate([np.linspace(0.08, 2.4, MAX_DISTINCT + 100), more]))
+    assert abs(sketch.quantiles([0.5])[0] - exact) <= width
@@ -0,0 +1,146 @@
+"""
+HealthScope Derived Aggregates
+Value counts, group means and filtered subsets shared by every page section
+
+Each aggregate is computed once per dataset version and memoized under
+(dataset fingerprint, operation, arguments), so sections showing the same
+numbers (the ``Outcome`` pie and bar, the ``target`` donut and counts) share
+one computation across sections, reruns and sessions. Frames without a
+registry ``fingerprint`` attribute are computed on every call.
+
+Results published by the precompute worker (utils.precomputed) are used
+when current. Streamed datasets answer counts and group means from their
+full-data summary; subsets are taken from the row sample. Subsets keep only
+their row positions, with the dataset in the registry.
+"""
+
+import numpy as np
+import streamlit as st
+from utils.precomputed import for_frame
+from utils.registry import derived, lineage
+from utils.streaming import summary_for
+from utils.timing import timed
+
+
+def _value_counts(df, column):
+    return df[column].value_counts()
+
+
+def _group_mean(df, by, column):
+    return df.groupby(by, observed=True, sort=True)[column].mean()
+
+
+OPERATIONS = {
+    "value_counts": _value_counts,
+    "group_mean": _group_mean,
+}
+
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def _cached(version, op, args, _df):
+    return OPERATIONS[op](_df, *args)
+
+
+def aggregate(df, op, *args):
+    """
+    Result of ``OPERATIONS[op](df, *args)``, cached per (version, op, args)
+
+    Args:
+        df: DataFrame from the dataset registry
+        op: Name of an entry in ``OPERATIONS``
+        *args: Hashable arguments of the operation
+    """
+    version = df.attrs.get("fingerprint")
+    if version is None:
+        return OPERATIONS[op](df, *args)
+    return _cached(version, op, args, df)
+
+
+@timed("compute")
+def value_counts(df, column):
+    """
+    df[column].value_counts(), most frequent first
+    """
+    stored = for_frame(df, "value_counts", column)
+    if stored is not None:
+        return stored
+    summary = summary_for(df)
+    counts = summary.value_counts(column) if summary is not None else None
+    if counts is not None:
+        return counts
+    return aggregate(df, "value_counts", column)
+
+
+def full_group_mean(df, by, column):
+    """
+    ``group_mean`` over every row of the dataset, from the worker's store or
+    the streaming summary; None when neither holds it
+    """
+    stored = for_frame(df, "group_mean", (by, column))
+    if stored is not None:
+        return stored
+    summary = summary_for(df)
+    return summary.group_mean(by, column) if summary is not None else None
+
+
+@timed("compute")
+def group_mean(df, by, column):
+    """
+    Mean of ``column`` per value of ``by``, in sorted group order
+    """
+    means = full_group_mean(df, by, column)
+    if means is not None:
+        return means
+    return aggregate(df, "group_mean", by, column)
+
+
+def derived_fingerprint(version, key):
+    """
+    Version of a subset: changes whenever its parent dataset changes
+    """
+    return f"{version}/{key}"
+
+
+def _positions(df, mask_fn):
+    rows = np.asarray(mask_fn(df))
+    if rows.dtype.kind == "b":
+        rows = np.flatnonzero(rows)
+    return rows.astype(np.int32 if len(df) < 2**31 else np.int64, copy=False)
+
+
+def _subset(df, key, rows):
+    frame = df.iloc[rows]
+    # The rows of a sample are not the full data, so the subset is a plain
+    # in-memory frame that the downstream caches key on its own version
+    attrs = {k: v for k, v in df.attrs.items() if k not in ("dataset", "streamed", "fingerprint", "parent")}
+    version = df.attrs.get("fingerprint")
+    if version is not None:
+        attrs["fingerprint"] = derived_fingerprint(version, key)
+        parent = lineage(df)
+        if parent is not None:
+            attrs["parent"] = parent
+    frame.attrs = attrs
+    return frame
+
+
+@timed("compute")
+def subset(df, key, mask_fn):
+    """
+    Rows of a dataset matching a filter
+
+    Only the row positions are cached, per (version, key), in the registry
+    entry of the dataset (``utils.registry.derived``), so they count against
+    its memory ceiling and go when it is evicted; the rows themselves are
+    taken on each call and not kept. The result carries a derived
+    ``fingerprint``, so histograms, box plots and aggregates of the subset
+    are cached like those of a dataset.
+
+    Args:
+        df: DataFrame from the dataset registry
+        key: Name of the filter in the cache (e.g. ``"insulin_nonzero"``)
+        mask_fn: ``mask_fn(df)`` returns the boolean row mask or the
+            ascending row positions (e.g. from utils.rangeindex); only
+            evaluated on a cache miss
+    """
+    rows = derived(df, ("subset", key), lambda: _positions(df, mask_fn))
+    return _subset(df, key, rows)
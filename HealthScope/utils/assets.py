@@ -0,0 +1,104 @@
+"""
+HealthScope Remote Assets
+Lottie animations served from a local disk cache, refreshed in the background
+
+Pages never wait on the network: they render whatever is already cached (or
+the fallback) and remote candidates are fetched concurrently on a background
+thread under one overall deadline. Successful downloads are written to the
+disk cache and picked up on the next render.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from pathlib import Path
+
+import streamlit as st
+
+
+CACHE_DIR = Path(os.environ.get("HEALTHSCOPE_ASSET_CACHE", ".cache/assets"))
+FETCH_DEADLINE = 3.0
+RETRY_AFTER = 3600
+
+
+def load_lottie_file(path):
+    try:
+        p = Path(path)
+        if p.exists():
+            return json.loads(p.read_text(encoding="utf-8"))
+    except Exception:
+        pass
+    return None
+
+
+def cache_file(url):
+    """
+    Disk cache location of a remote asset
+    """
+    return CACHE_DIR / (hashlib.blake2b(url.encode(), digest_size=12).hexdigest() + ".json")
+
+
+def _fetch(url, timeout):
+    import requests
+
+    r = requests.get(url, timeout=timeout, verify=False)
+    if r.status_code != 200:
+        return None
+    data = r.json()
+    target = cache_file(url)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + f".{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp, target)
+    return data
+
+
+def _fetch_all(urls, deadline):
+    pool = ThreadPoolExecutor(max_workers=len(urls), thread_name_prefix="hs-asset")
+    futures = [pool.submit(_fetch, url, deadline) for url in urls]
+    wait(futures, timeout=deadline)
+    # Stragglers are abandoned; their own request timeout ends them
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@st.cache_resource(ttl=RETRY_AFTER, show_spinner=False)
+def prefetch(urls, deadline=FETCH_DEADLINE):
+    """
+    Start fetching remote assets on a daemon thread, once per process
+
+    Cached for RETRY_AFTER seconds, so an unreachable host is retried at
+    most once an hour instead of on every render.
+
+    Args:
+        urls: Tuple of asset URLs, fetched concurrently
+        deadline: Overall time budget in seconds for all downloads
+    """
+    thread = threading.Thread(
+        target=_fetch_all, args=(urls, deadline), name="hs-asset-prefetch", daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def load_lottie(urls, fallback, local_path=None):
+    """
+    Lottie animation data without blocking on the network
+
+    Candidates are tried in order: each URL's disk-cached copy, then the
+    local file, then ``fallback``. When a URL has no cached copy yet, a
+    background download of all URLs is started for later renders.
+
+    Args:
+        urls: Remote candidates in order of preference
+        fallback: Animation used when nothing else is available
+        local_path: Optional bundled animation file
+    """
+    for url in urls:
+        data = load_lottie_file(cache_file(url))
+        if data:
+            return data
+
+    prefetch(tuple(urls))
+    return (load_lottie_file(local_path) if local_path else None) or fallback
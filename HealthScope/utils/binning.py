@@ -0,0 +1,93 @@
+"""
+HealthScope Histogram Binning
+Server-side bin edges and counts, cached per dataset version
+
+Histograms are drawn from precomputed bars so only ``nbins`` values reach
+the browser instead of every raw row.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.aggregates import subset as subset_rows
+from utils.precomputed import for_frame
+from utils.streaming import summary_for
+from utils.timing import timed
+
+
+def compute_bins(values, nbins=30):
+    """
+    Equal-width bins over the finite values of a numeric array
+
+    Args:
+        values: 1-D array-like of numbers
+        nbins: Number of bins
+
+    Returns:
+        Dict with ``edges`` (nbins + 1) and ``counts`` (nbins)
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return {"edges": np.array([]), "counts": np.array([], dtype=np.int64)}
+    counts, edges = np.histogram(values, bins=nbins)
+    return {"edges": edges, "counts": counts}
+
+
+def compute_category_counts(values):
+    """
+    Counts per distinct value, for columns that cannot be binned numerically
+    """
+    counts = pd.Series(values).value_counts(dropna=True).sort_index()
+    return {"labels": counts.index.tolist(), "counts": counts.to_numpy()}
+
+
+def column_bins(df, column, nbins=30):
+    """
+    Bins of one column: numeric bins, or counts per value for other types
+    """
+    series = df[column]
+    if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+        return compute_bins(series.to_numpy(dtype=float, na_value=np.nan), nbins)
+    return compute_category_counts(series)
+
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def _cached_bins(version, column, nbins, _df):
+    return column_bins(_df, column, nbins)
+
+
+@timed("compute")
+def histogram_bins(df, column, nbins=30, subset=None):
+    """
+    Bins for one column of a dataset, cached per (version, column, nbins, subset)
+
+    Bins published by the precompute worker are used when current. The
+    dataset version is the ``fingerprint`` attribute set by the dataset
+    registry. Frames without one are binned on every call. For the row
+    sample of a streamed dataset the bins come from the full-data summary
+    (subsets, which the summary cannot evaluate, are binned on the sample).
+
+    Args:
+        df: DataFrame holding the column
+        column: Column to bin
+        nbins: Number of bins for numeric columns
+        subset: Optional ``(key, mask_fn)`` row filter, taken through
+            ``utils.aggregates.subset`` (e.g. ``("insulin_nonzero", fn)``)
+
+    Returns:
+        ``{"edges", "counts"}`` for numeric columns or
+        ``{"labels", "counts"}`` for categorical ones
+    """
+    if subset is not None:
+        df = subset_rows(df, *subset)
+    stored = for_frame(df, "histogram", (column, nbins))
+    if stored is not None:
+        return stored
+    summary = summary_for(df)
+    if summary is not None:
+        return summary.histogram(column, nbins)
+    version = df.attrs.get("fingerprint")
+    if version is None:
+        return column_bins(df, column, nbins)
+    return _cached_bins(version, column, nbins, df)
@@ -0,0 +1,127 @@
+"""
+HealthScope Box Plot Statistics
+Quartiles, whiskers and a capped outlier list computed on the server
+
+Box plots are drawn from these summaries through go.Box's precomputed
+statistics fields, so the figure size depends on the number of groups and
+not on the number of rows.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.precomputed import for_frame
+from utils.streaming import summary_for
+from utils.timing import timed
+
+
+MAX_OUTLIERS = 200
+WHISKER = 1.5
+
+
+def _cap(values, limit):
+    # Evenly spaced picks over the sorted outliers keep both extremes
+    values = np.sort(values)
+    if len(values) <= limit:
+        return values
+    return values[np.linspace(0, len(values) - 1, limit).astype(int)]
+
+
+def compute_box_stats(df, value, group=None, max_outliers=MAX_OUTLIERS):
+    """
+    Per-group box plot summary of a numeric column
+
+    Quartiles use linear interpolation, as Plotly does. Whiskers follow
+    Tukey's rule: they reach the most extreme values within 1.5 IQR of the
+    box, and everything beyond is an outlier.
+
+    Args:
+        df: DataFrame with data
+        value: Numeric column summarised
+        group: Optional column splitting the data into one box per value
+        max_outliers: Largest number of outlier points kept per group
+
+    Returns:
+        Dict of equal-length lists: ``labels``, ``count``, ``q1``, ``median``,
+        ``q3``, ``lowerfence``, ``upperfence``, ``mean``, ``sd`` and
+        ``outliers`` (one array per group)
+    """
+    if not pd.api.types.is_numeric_dtype(df[value]) or pd.api.types.is_bool_dtype(df[value]):
+        raise TypeError(f"Box plots need a numeric column, '{value}' is {df[value].dtype}")
+
+    values = df[value].to_numpy(dtype=float, na_value=np.nan)
+    if group is None:
+        codes = np.zeros(len(values), dtype=np.intp)
+        labels = [value]
+    else:
+        codes, uniques = pd.factorize(df[group], sort=True)
+        labels = list(uniques)
+
+    keep = (codes >= 0) & np.isfinite(values)
+    values, codes = values[keep], codes[keep]
+    groups = pd.Series(values).groupby(codes)
+
+    full = pd.RangeIndex(len(labels))
+    quartiles = groups.quantile([0.25, 0.5, 0.75]).unstack().reindex(full)
+    moments = groups.agg(["mean", "std", "count"]).reindex(full)
+
+    q1 = quartiles[0.25].to_numpy()
+    q3 = quartiles[0.75].to_numpy()
+    low = q1 - WHISKER * (q3 - q1)
+    high = q3 + WHISKER * (q3 - q1)
+
+    inside = (values >= low[codes]) & (values <= high[codes])
+    fenced = pd.Series(values[inside]).groupby(codes[inside])
+    lowerfence = fenced.min().reindex(full).to_numpy()
+    upperfence = fenced.max().reindex(full).to_numpy()
+
+    outside_values = values[~inside]
+    outside_codes = codes[~inside]
+    outliers = [
+        _cap(outside_values[outside_codes == code], max_outliers)
+        for code in range(len(labels))
+    ]
+
+    # Groups whose values are all missing get no box
+    present = np.flatnonzero(moments["count"].fillna(0).to_numpy() > 0)
+    return {
+        "labels": [labels[i] for i in present],
+        "count": moments["count"].to_numpy()[present].astype(int).tolist(),
+        "q1": q1[present].tolist(),
+        "median": quartiles[0.5].to_numpy()[present].tolist(),
+        "q3": q3[present].tolist(),
+        "lowerfence": lowerfence[present].tolist(),
+        "upperfence": upperfence[present].tolist(),
+        "mean": moments["mean"].to_numpy()[present].tolist(),
+        "sd": np.nan_to_num(moments["std"].to_numpy()[present]).tolist(),
+        "outliers": [outliers[i] for i in present],
+    }
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _cached_box_stats(version, value, group, max_outliers, _df):
+    return compute_box_stats(_df, value, group, max_outliers)
+
+
+@timed("compute")
+def box_stats(df, value, group=None, max_outliers=MAX_OUTLIERS):
+    """
+    Box plot summary cached per (dataset version, value column, group column)
+
+    Summaries published by the precompute worker are used when current.
+    Frames without a registry ``fingerprint`` attribute are not cached.
+    Streamed datasets are summarised from every row when the grouping column
+    was sketched (no outlier points), and from their row sample otherwise.
+    """
+    if max_outliers == MAX_OUTLIERS:
+        stored = for_frame(df, "box_stats", (value, group))
+        if stored is not None:
+            return stored
+    summary = summary_for(df)
+    stats = summary.box_stats(value, group) if summary is not None else None
+    if stats is not None:
+        return stats
+    version = df.attrs.get("fingerprint")
+    if version is None:
+        return compute_box_stats(df, value, group, max_outliers)
+    return _cached_box_stats(version, value, group, max_outliers, df)
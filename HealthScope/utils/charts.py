@@ -3,13 +3,73 @@ HealthScope Chart Utilities
 Animated Plotly charts with theme-specific styling
 """
 
-import plotly.graph_objects as go
-import plotly.express as px
+from utils.lazy import lazy_import
 from utils.themes import HealthScopeTheme as Theme
+from utils.binning import histogram_bins
+from utils.scatter import scatter_traces
+from utils.boxstats import box_stats
+from utils.correlation import correlation_matrix
+from utils.downsample import lttb_indices
+from utils.timing import timed
 import pandas as pd
 import numpy as np
 
+go = lazy_import('plotly.graph_objects')
+pio = lazy_import('plotly.io')
 
+try:
+    import orjson  # noqa: F401
+    JSON_ENGINE = 'orjson'
+except Exception:
+    JSON_ENGINE = 'json'
+
+
+TEMPLATE_PREFIX = 'healthscope_'
+
+
+def _register_templates():
+    """
+    Compile the shared chart styling of every theme into a Plotly template
+
+    Registered once, on first use, as ``healthscope_<theme>``. Builders only
+    set what differs per chart (title text, axis titles, sizes).
+    """
+    if TEMPLATE_PREFIX + 'home' in pio.templates:
+        return
+    for theme in Theme.CHART_COLORS:
+        axis = dict(gridcolor='rgba(0,0,0,0.05)', showgrid=True, zeroline=False)
+        template = go.layout.Template(pio.templates['plotly'])
+        template.layout.update(
+            title=dict(font=dict(size=20, family=Theme.FONT_FAMILY, color='#1F2937'), x=0.5, xanchor='center'),
+            font=dict(family=Theme.FONT_FAMILY),
+            paper_bgcolor='rgba(0,0,0,0)',
+            plot_bgcolor='rgba(255,255,255,0.9)',
+            colorway=Theme.CHART_COLORS[theme],
+            xaxis=axis,
+            yaxis=axis,
+            height=400,
+            margin=dict(t=80, b=60, l=60, r=40),
+            transition={'duration': 500}
+        )
+        pio.templates[TEMPLATE_PREFIX + theme] = template
+
+
+def template_name(theme='home'):
+    """
+    Name of the registered Plotly template for a theme
+    """
+    _register_templates()
+    return TEMPLATE_PREFIX + (theme if theme in Theme.CHART_COLORS else 'home')
+
+
+def figure_to_json(fig):
+    """
+    Serialize a figure without re-validating it, using orjson when installed
+    """
+    return pio.to_json(fig, validate=False, engine=JSON_ENGINE)
+
+
+@timed('build')
 def create_pie_chart(data, labels, title, theme='home'):
     """
     Create an animated pie chart
@@ -33,74 +93,187 @@ def create_pie_chart(data, labels, title, theme='home'):
     )])
     
     fig.update_layout(
-        title=dict(text=title, font=dict(size=20, family=Theme.FONT_FAMILY, color='#1F2937'), x=0.5, xanchor='center'),
-        font=dict(family=Theme.FONT_FAMILY),
-        paper_bgcolor='rgba(0,0,0,0)',
+        template=template_name(theme),
+        title_text=title,
         plot_bgcolor='rgba(0,0,0,0)',
         showlegend=True,
         legend=dict(orientation="h", yanchor="bottom", y=-0.2, xanchor="center", x=0.5),
-        height=400,
-        margin=dict(t=80, b=60, l=40, r=40),
-        transition={'duration': 500}
+        margin=dict(l=40)
     )
     
     return fig
 
 
-def create_histogram(data, column, title, theme='home', nbins=30):
+def _binned_bar(bins, color, name, bargap=0.0, line=None):
+    """
+    Bar trace drawing precomputed histogram bins
+
+    Args:
+        bins: Output of utils.binning.histogram_bins
+        color: Bar color
+        name: Trace name
+        bargap: Fraction of each bin left empty between bars
+        line: Optional marker outline
+    """
+    marker = dict(color=color)
+    if line:
+        marker['line'] = line
+
+    if 'edges' not in bins:
+        return go.Bar(
+            x=bins['labels'],
+            y=bins['counts'],
+            marker=marker,
+            name=name,
+            hovertemplate='<b>Value:</b> %{x}<br><b>Count:</b> %{y}<extra></extra>'
+        )
+
+    edges = bins['edges']
+    widths = np.diff(edges)
+    return go.Bar(
+        x=edges[:-1] + widths / 2,
+        y=bins['counts'],
+        width=widths * (1 - bargap),
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        marker=marker,
+        name=name,
+        hovertemplate='<b>Range:</b> %{customdata[0]:.4g} – %{customdata[1]:.4g}<br><b>Count:</b> %{y}<extra></extra>'
+    )
+
+
+@timed('build')
+def create_histogram(data, column, title, theme='home', nbins=30, subset=None):
     """
     Create an animated histogram
     
+    Bins are computed on the server (see utils.binning), so the figure
+    carries one bar per bin rather than every row.
+    
     Args:
         data: DataFrame with data
         column: Column name to plot
         title: Chart title
         theme: Color theme
         nbins: Number of bins
+        subset: Optional (key, mask_fn) row filter, cached under key
     """
     theme_obj = getattr(Theme, theme.upper(), Theme.HOME)
+    bins = histogram_bins(data, column, nbins=nbins, subset=subset)
     
-    fig = go.Figure(data=[go.Histogram(
-        x=data[column],
-        nbinsx=nbins,
-        marker=dict(
-            color=theme_obj['primary'],
-            line=dict(color='white', width=1)
-        ),
+    fig = go.Figure(data=[_binned_bar(
+        bins,
+        color=theme_obj['primary'],
         name=column,
-        hovertemplate='<b>Range:</b> %{x}<br><b>Count:</b> %{y}<extra></extra>'
+        bargap=0.1,
+        line=dict(color='white', width=1)
     )])
     
     fig.update_layout(
-        title=dict(text=title, font=dict(size=20, family=Theme.FONT_FAMILY, color='#1F2937'), x=0.5, xanchor='center'),
-        xaxis=dict(
-            title=column,
-            gridcolor='rgba(0,0,0,0.05)',
-            showgrid=True,
-            zeroline=False
-        ),
-        yaxis=dict(
-            title='Frequency',
-            gridcolor='rgba(0,0,0,0.05)',
-            showgrid=True,
-            zeroline=False
-        ),
-        font=dict(family=Theme.FONT_FAMILY),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(255,255,255,0.9)',
-        bargap=0.1,
-        height=400,
-        margin=dict(t=80, b=60, l=60, r=40),
-        transition={'duration': 500}
+        template=template_name(theme),
+        title_text=title,
+        xaxis_title=column,
+        yaxis_title='Frequency',
+        bargap=0.1
     )
     
     return fig
 
 
+@timed('build')
+def create_binned_histogram(data, column, nbins=30, color=None, title=None, subset=None):
+    """
+    Server-binned replacement for px.histogram(data, x=column, nbins=nbins)
+    
+    Keeps the plain Plotly Express look used by the dashboards' quick
+    charts and graph builders.
+    
+    Args:
+        data: DataFrame with data
+        column: Column name to plot
+        nbins: Number of bins
+        color: Bar color
+        title: Optional chart title
+        subset: Optional (key, mask_fn) row filter, cached under key
+    """
+    bins = histogram_bins(data, column, nbins=nbins, subset=subset)
+    
+    fig = go.Figure(data=[_binned_bar(bins, color=color, name=column)])
+    fig.update_layout(
+        title=title,
+        xaxis_title=column,
+        yaxis_title='count',
+        bargap=0,
+        showlegend=False
+    )
+    
+    return fig
+
+
+def _summary_box_traces(stats, colors=None, name=None, boxmean=True, by_group=False):
+    """
+    Box traces drawn from precomputed statistics, plus their outlier points
+
+    Args:
+        stats: Output of utils.boxstats.box_stats
+        colors: Dict of group -> color or a list of colors used in order
+            (one trace per group), or a single color for one trace holding
+            every group
+        name: Trace name when all groups share one trace
+        boxmean: True to mark the mean, 'sd' to add the standard deviation
+        by_group: One trace per group even without per-group colors
+    """
+    def box(idx, color, trace_name, showlegend):
+        fields = {
+            key: [stats[key][i] for i in idx]
+            for key in ('q1', 'median', 'q3', 'lowerfence', 'upperfence', 'mean', 'sd')
+        }
+        traces = [go.Box(
+            x=[stats['labels'][i] for i in idx],
+            boxmean=boxmean,
+            name=trace_name,
+            legendgroup=trace_name,
+            showlegend=showlegend,
+            marker=dict(color=color),
+            **fields
+        )]
+
+        outlier_x = [stats['labels'][i] for i in idx for _ in stats['outliers'][i]]
+        if outlier_x:
+            traces.append(go.Scatter(
+                x=outlier_x,
+                y=np.concatenate([stats['outliers'][i] for i in idx]),
+                mode='markers',
+                name=trace_name,
+                legendgroup=trace_name,
+                showlegend=False,
+                marker=dict(color=color, size=5, opacity=0.7),
+                hovertemplate='<b>Outlier:</b> %{y}<extra></extra>'
+            ))
+        return traces
+
+    if not (by_group or isinstance(colors, (dict, list, tuple))):
+        return box(range(len(stats['labels'])), colors, name, False)
+
+    traces = []
+    for i, label in enumerate(stats['labels']):
+        if isinstance(colors, dict):
+            color = colors.get(label)
+        elif colors:
+            color = colors[i % len(colors)]
+        else:
+            color = None
+        traces.extend(box([i], color, str(label), True))
+    return traces
+
+
+@timed('build')
 def create_boxplot(data, column, title, theme='home'):
     """
     Create an animated box plot
     
+    Quartiles, whiskers and outliers are computed on the server (see
+    utils.boxstats), so the figure does not grow with the row count.
+    
     Args:
         data: DataFrame with data
         column: Column name to plot
@@ -108,35 +281,56 @@ def create_boxplot(data, column, title, theme='home'):
         theme: Color theme
     """
     theme_obj = getattr(Theme, theme.upper(), Theme.HOME)
+    stats = box_stats(data, column)
     
-    fig = go.Figure(data=[go.Box(
-        y=data[column],
+    fig = go.Figure(data=_summary_box_traces(
+        stats,
+        colors=theme_obj['primary'],
         name=column,
-        marker=dict(color=theme_obj['primary']),
-        boxmean='sd',
-        hovertemplate='<b>Value:</b> %{y}<extra></extra>'
-    )])
+        boxmean='sd'
+    ))
     
     fig.update_layout(
-        title=dict(text=title, font=dict(size=20, family=Theme.FONT_FAMILY, color='#1F2937'), x=0.5, xanchor='center'),
-        yaxis=dict(
-            title=column,
-            gridcolor='rgba(0,0,0,0.05)',
-            showgrid=True,
-            zeroline=False
-        ),
-        font=dict(family=Theme.FONT_FAMILY),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(255,255,255,0.9)',
-        height=400,
-        margin=dict(t=80, b=60, l=60, r=40),
-        showlegend=False,
-        transition={'duration': 500}
+        template=template_name(theme),
+        title_text=title,
+        yaxis_title=column,
+        showlegend=False
     )
     
     return fig
 
 
+@timed('build')
+def create_summary_boxplot(data, y_column, x_column=None, colors=None, by_group=False, title=None):
+    """
+    Precomputed-statistics replacement for px.box(data, x=x_column, y=y_column)
+    
+    Args:
+        data: DataFrame with data
+        y_column: Numeric column summarised by each box
+        x_column: Optional column giving one box per value
+        colors: A single color, or a dict / list of per-group colors which
+            gives one legend entry per group like px.box(..., color=x_column)
+        by_group: One legend entry per group using the default colorway
+        title: Optional chart title
+    """
+    stats = box_stats(data, y_column, group=x_column)
+    split = by_group or isinstance(colors, (dict, list, tuple))
+    
+    fig = go.Figure(data=_summary_box_traces(stats, colors=colors, name=y_column, by_group=by_group))
+    fig.update_layout(
+        title=title,
+        xaxis_title=x_column,
+        yaxis_title=y_column,
+        legend_title=x_column if split else None,
+        showlegend=split,
+        boxmode='overlay'
+    )
+    
+    return fig
+
+
+@timed('build')
 def create_correlation_heatmap(data, title, theme='home'):
     """
     Create a correlation heatmap
@@ -148,8 +342,8 @@ def create_correlation_heatmap(data, title, theme='home'):
     """
     theme_obj = getattr(Theme, theme.upper(), Theme.HOME)
     
-    # Calculate correlation matrix
-    corr_matrix = data.select_dtypes(include=[np.number]).corr()
+    # Correlation matrix from cached sufficient statistics (utils.correlation)
+    corr_matrix = correlation_matrix(data)
     
     fig = go.Figure(data=go.Heatmap(
         z=corr_matrix.values,
@@ -164,20 +358,19 @@ def create_correlation_heatmap(data, title, theme='home'):
     ))
     
     fig.update_layout(
-        title=dict(text=title, font=dict(size=20, family=Theme.FONT_FAMILY, color='#1F2937'), x=0.5, xanchor='center'),
-        font=dict(family=Theme.FONT_FAMILY),
-        paper_bgcolor='rgba(0,0,0,0)',
+        template=template_name(theme),
+        title_text=title,
         plot_bgcolor='rgba(0,0,0,0)',
         height=500,
-        margin=dict(t=80, b=100, l=100, r=40),
+        margin=dict(b=100, l=100),
         xaxis=dict(side='bottom', tickangle=-45),
-        yaxis=dict(autorange='reversed'),
-        transition={'duration': 500}
+        yaxis=dict(autorange='reversed')
     )
     
     return fig
 
 
+@timed('build')
 def create_feature_importance_chart(feature_names, importance_values, title, theme='home', top_n=10):
     """
     Create a feature importance bar chart
@@ -212,23 +405,11 @@ def create_feature_importance_chart(feature_names, importance_values, title, the
     )])
     
     fig.update_layout(
-        title=dict(text=title, font=dict(size=20, family=Theme.FONT_FAMILY, color='#1F2937'), x=0.5, xanchor='center'),
-        xaxis=dict(
-            title='Importance Score',
-            gridcolor='rgba(0,0,0,0.05)',
-            showgrid=True,
-            zeroline=False
-        ),
-        yaxis=dict(
-            title='',
-            autorange='reversed'
-        ),
-        font=dict(family=Theme.FONT_FAMILY),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(255,255,255,0.9)',
-        height=400,
-        margin=dict(t=80, b=60, l=150, r=100),
-        transition={'duration': 500}
+        template=template_name(theme),
+        title_text=title,
+        xaxis_title='Importance Score',
+        yaxis=dict(title='', autorange='reversed'),
+        margin=dict(l=150, r=100)
     )
     
     return fig
@@ -238,22 +419,26 @@ def create_sparkline_data(data, column, num_points=10):
     """
     Generate sparkline data from a column
     
+    Points are picked with LTTB over the row order, so the peaks and dips
+    of the column stay visible.
+    
     Args:
         data: DataFrame
         column: Column to extract data from
-        num_points: Number of points to sample
+        num_points: Number of points to keep
     
     Returns:
         List of values for sparkline
     """
-    if len(data) < num_points:
-        return data[column].tolist()
+    values = data[column].dropna()
+    if len(values) <= num_points:
+        return values.tolist()
     
-    # Sample evenly across the data
-    indices = np.linspace(0, len(data) - 1, num_points, dtype=int)
-    return data[column].iloc[indices].tolist()
+    keep = lttb_indices(np.arange(len(values)), values.to_numpy(dtype=float), num_points)
+    return values.iloc[keep].tolist()
 
 
+@timed('build')
 def create_bar_chart(data, x_column, y_column, title, theme='home'):
     """
     Create an animated bar chart
@@ -278,34 +463,23 @@ def create_bar_chart(data, x_column, y_column, title, theme='home'):
     )])
     
     fig.update_layout(
-        title=dict(text=title, font=dict(size=20, family=Theme.FONT_FAMILY, color='#1F2937'), x=0.5, xanchor='center'),
-        xaxis=dict(
-            title=x_column,
-            gridcolor='rgba(0,0,0,0.05)',
-            showgrid=False,
-            zeroline=False
-        ),
-        yaxis=dict(
-            title=y_column,
-            gridcolor='rgba(0,0,0,0.05)',
-            showgrid=True,
-            zeroline=False
-        ),
-        font=dict(family=Theme.FONT_FAMILY),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(255,255,255,0.9)',
-        height=400,
-        margin=dict(t=80, b=60, l=60, r=40),
-        transition={'duration': 500}
+        template=template_name(theme),
+        title_text=title,
+        xaxis=dict(title=x_column, showgrid=False),
+        yaxis_title=y_column
     )
     
     return fig
 
 
+@timed('build')
 def create_scatter_plot(data, x_column, y_column, title, theme='home', color_column=None):
     """
     Create an animated scatter plot
     
+    Large datasets switch to WebGL traces and are sampled past a point
+    budget (see utils.scatter); hover shows only the plotted columns.
+    
     Args:
         data: DataFrame with data
         x_column: Column for x-axis
@@ -318,47 +492,31 @@ def create_scatter_plot(data, x_column, y_column, title, theme='home', color_col
     theme_colors = Theme.CHART_COLORS[theme]
     
     if color_column:
-        fig = px.scatter(
+        fig = go.Figure(data=scatter_traces(
             data,
-            x=x_column,
-            y=y_column,
+            x_column,
+            y_column,
             color=color_column,
-            color_discrete_sequence=theme_colors,
-            hover_data=data.columns
-        )
+            colors=theme_colors
+        ))
+        fig.update_layout(legend_title=color_column)
     else:
-        fig = go.Figure(data=[go.Scatter(
-            x=data[x_column],
-            y=data[y_column],
-            mode='markers',
+        fig = go.Figure(data=scatter_traces(
+            data,
+            x_column,
+            y_column,
+            colors=[theme_obj['primary']],
             marker=dict(
                 size=8,
-                color=theme_obj['primary'],
                 line=dict(width=1, color='white')
-            ),
-            hovertemplate='<b>%{x}</b><br>%{y}<extra></extra>'
-        )])
+            )
+        ))
     
     fig.update_layout(
-        title=dict(text=title, font=dict(size=20, family=Theme.FONT_FAMILY, color='#1F2937'), x=0.5, xanchor='center'),
-        xaxis=dict(
-            title=x_column,
-            gridcolor='rgba(0,0,0,0.05)',
-            showgrid=True,
-            zeroline=False
-        ),
-        yaxis=dict(
-            title=y_column,
-            gridcolor='rgba(0,0,0,0.05)',
-            showgrid=True,
-            zeroline=False
-        ),
-        font=dict(family=Theme.FONT_FAMILY),
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(255,255,255,0.9)',
-        height=400,
-        margin=dict(t=80, b=60, l=60, r=40),
-        transition={'duration': 500}
+        template=template_name(theme),
+        title_text=title,
+        xaxis_title=x_column,
+        yaxis_title=y_column
     )
     
     return fig
@@ -0,0 +1,212 @@
+"""
+HealthScope Cohort Filters
+Sidebar filters that every chart of a dashboard page respects
+
+Each dataset lists its filter columns in the registry spec (``filters``).
+Non-numeric columns and numeric columns with at most ``MAX_LEVELS``
+distinct values get a multiselect; other numeric columns get a range
+slider.
+
+A ``BitmapIndex``, built once per dataset version, holds for each value of
+each multiselect column a packed bitmap of the rows that have it (one bit
+per row). A selection is answered from the bitmaps alone: the values chosen
+in one column are ORed, the columns ANDed, so categorical filters never scan
+the data. Numeric ranges come from the column's sorted-permutation index
+(utils.rangeindex) as bitmaps, and are ANDed in the same way.
+
+The filtered rows are a subset (utils.aggregates.subset) with a derived
+fingerprint, so every cached histogram, box plot, aggregate and
+figure works on the cohort as it does on the whole dataset.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.aggregates import subset
+from utils.rangeindex import range_index
+from utils.registry import DATASETS, derived
+from utils.timing import section
+
+
+# Numeric columns with at most this many distinct values are filtered by value
+MAX_LEVELS = 20
+KEY_PREFIX = "cohort"
+
+
+def _python(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+class BitmapIndex:
+    """
+    Per-value row bitmaps of a frame's categorical filter columns
+
+    Args:
+        df: Frame to index
+        columns: Filter columns; numeric columns with more than
+            ``MAX_LEVELS`` distinct values are range columns, with their
+            bounds kept in ``bounds`` instead of bitmaps
+    """
+
+    def __init__(self, df, columns):
+        self.rows = len(df)
+        self.bitmaps = {}
+        self.bounds = {}
+        for column in columns:
+            series = df[column]
+            numeric = pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+            codes, uniques = pd.factorize(series, sort=True)
+            if numeric and len(uniques) > MAX_LEVELS:
+                lo, hi = series.min(), series.max()
+                if pd.api.types.is_integer_dtype(series):
+                    self.bounds[column] = (int(lo), int(hi))
+                else:
+                    self.bounds[column] = (float(lo), float(hi))
+                continue
+            self.bitmaps[column] = {
+                _python(value): np.packbits(codes == i) for i, value in enumerate(uniques)
+            }
+
+    @property
+    def nbytes(self):
+        return sum(bits.nbytes for bitmaps in self.bitmaps.values() for bits in bitmaps.values())
+
+    def values(self, column):
+        """
+        Distinct values of a categorical column, sorted
+        """
+        return list(self.bitmaps[column])
+
+    def select(self, column, values):
+        """
+        Packed bitmap of the rows whose ``column`` is one of ``values``
+        """
+        bitmaps = self.bitmaps[column]
+        bits = np.zeros((self.rows + 7) // 8, dtype=np.uint8)
+        for value in values:
+            if value in bitmaps:
+                bits |= bitmaps[value]
+        return bits
+
+    def mask(self, df, categories=None, ranges=None):
+        """
+        Boolean row mask of a cohort
+
+        Args:
+            df: The indexed frame (its range indexes answer ``ranges``)
+            categories: ``{column: [values]}``, the rows must have one of
+                the values in every column
+            ranges: ``{column: (lo, hi)}``, inclusive bounds
+        """
+        bits = None
+        for column, values in (categories or {}).items():
+            selected = self.select(column, values)
+            bits = selected if bits is None else bits & selected
+        for column, (lo, hi) in (ranges or {}).items():
+            selected = range_index(df, column).bitmap(lo, hi)
+            bits = selected if bits is None else bits & selected
+        if bits is None:
+            return np.ones(self.rows, dtype=bool)
+        return np.unpackbits(bits, count=self.rows).view(bool)
+
+
+def cohort_index(df, columns):
+    """
+    ``BitmapIndex`` of a frame, built once per (dataset version, columns)
+    and kept with the dataset in the registry
+    """
+    return derived(df, ("cohort_index", tuple(columns)), lambda: BitmapIndex(df, columns))
+
+
+def selection_key(categories, ranges):
+    """
+    Canonical name of a cohort, used as its subset key
+    """
+    spec = {
+        "in": {c: sorted(map(str, v)) for c, v in categories.items()},
+        "range": {c: list(r) for c, r in ranges.items()},
+    }
+    return "cohort:" + json.dumps(spec, sort_keys=True)
+
+
+def _clear(keys):
+    for key in keys:
+        st.session_state.pop(key, None)
+
+
+def cohort_filter(df, page, columns=None):
+    """
+    Render the sidebar cohort filters of a page and return the matching rows
+
+    Stops the page with a warning when no row matches.
+
+    Args:
+        df: DataFrame from the dataset registry
+        page: Dataset name, also used for the widget keys
+        columns: Filter columns (default: the ``filters`` of the dataset spec)
+
+    Returns:
+        ``df`` itself when no filter is set, else the cached cohort subset
+    """
+    if columns is None:
+        columns = DATASETS.get(page, {}).get("filters", [])
+    columns = [c for c in columns if c in df.columns]
+    if not columns:
+        return df
+
+    with section("cohort", page=page):
+        index = cohort_index(df, columns)
+        st.sidebar.markdown("### 🔎 Cohort")
+        keys = [f"{KEY_PREFIX}_{page}_{column}" for column in columns]
+        categories, ranges = {}, {}
+        for column, key in zip(columns, keys):
+            if column in index.bitmaps:
+                chosen = st.sidebar.multiselect(column, index.values(column), key=key)
+                if chosen:
+                    categories[column] = chosen
+            else:
+                lo, hi = index.bounds[column]
+                if lo == hi:
+                    continue
+                chosen = st.sidebar.slider(column, lo, hi, (lo, hi), key=key)
+                if tuple(chosen) != (lo, hi):
+                    ranges[column] = tuple(chosen)
+
+        if not categories and not ranges:
+            st.sidebar.caption(f"All {len(df):,} rows")
+            return df
+
+        cohort = subset(df, selection_key(categories, ranges),
+                        lambda d: index.mask(d, categories, ranges))
+        st.sidebar.caption(f"{len(cohort):,} of {len(df):,} rows")
+        st.sidebar.button("Clear filters", key=f"{KEY_PREFIX}_{page}_clear", on_click=_clear, args=(keys,))
+
+    if cohort.empty:
+        st.warning("No rows match the cohort filters.")
+        st.stop()
+    return cohort
+
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def _cached_profile(version, _df):
+    from utils.profiling import profile_frame
+    return profile_frame(_df)
+
+
+def cohort_profile(df, profile):
+    """
+    Profile behind the overview stat blocks of a possibly filtered frame
+
+    Args:
+        df: Result of ``cohort_filter``
+        profile: Profile of the whole dataset, used when ``df`` is unfiltered
+    """
+    if df.attrs.get("dataset") is not None:
+        return profile
+    version = df.attrs.get("fingerprint")
+    if version is None:
+        from utils.profiling import profile_frame
+        return profile_frame(df)
+    return _cached_profile(version, df)
@@ -0,0 +1,193 @@
+"""
+HealthScope Correlation Engine
+Pearson correlations from streaming sufficient statistics
+
+CorrelationStats keeps, for every pair of numeric columns, the number of rows
+where both are present and the sums, sums of squares and cross products over
+those rows (float64). A correlation matrix is derived from them in O(p²)
+without touching the rows again, new rows are folded in with ``update``, and
+partial results from separate chunks or processes combine with ``merge``.
+Missing values are handled pairwise, matching ``DataFrame.corr``.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.timing import timed
+
+
+CHUNK_ROWS = 1_000_000
+
+
+def numeric_columns(df):
+    """
+    Columns that take part in a correlation matrix (numbers and booleans)
+    """
+    return list(df.select_dtypes(include=[np.number, "bool"]).columns)
+
+
+class CorrelationStats:
+    """
+    Pairwise sufficient statistics for Pearson correlation
+
+    Values are shifted by a per-column offset (the mean of the first chunk)
+    before accumulating, which keeps the sums small and avoids cancellation
+    when the correlation is computed.
+
+    Args:
+        columns: Names of the numeric columns tracked
+    """
+
+    def __init__(self, columns):
+        p = len(columns)
+        self.columns = list(columns)
+        self.rows = 0
+        self.shift = None
+        self.n = np.zeros((p, p))
+        self.sx = np.zeros((p, p))
+        self.sxx = np.zeros((p, p))
+        self.sxy = np.zeros((p, p))
+
+    @classmethod
+    def from_frame(cls, df, columns=None, chunk_rows=CHUNK_ROWS):
+        """
+        Statistics of an in-memory DataFrame, accumulated chunk by chunk
+        """
+        stats = cls(numeric_columns(df) if columns is None else columns)
+        for start in range(0, len(df), chunk_rows):
+            stats.update(df.iloc[start:start + chunk_rows])
+        return stats
+
+    @classmethod
+    def from_csv(cls, path, columns=None, chunk_rows=CHUNK_ROWS):
+        """
+        Statistics of a CSV file read in chunks, for data larger than memory
+        """
+        stats = None
+        for chunk in pd.read_csv(path, chunksize=chunk_rows, usecols=columns):
+            if stats is None:
+                stats = cls(numeric_columns(chunk) if columns is None else columns)
+            stats.update(chunk)
+        return stats if stats is not None else cls(columns or [])
+
+    def update(self, chunk):
+        """
+        Fold a block of new rows into the statistics
+
+        Args:
+            chunk: DataFrame holding at least ``columns``, or a 2-D array with
+                one column per tracked column
+
+        Returns:
+            self, to allow chaining
+        """
+        if isinstance(chunk, pd.DataFrame):
+            chunk = chunk[self.columns].to_numpy(dtype=np.float64, na_value=np.nan)
+        x = np.asarray(chunk, dtype=np.float64)
+        if x.shape[0] == 0:
+            return self
+
+        if self.shift is None:
+            with np.errstate(invalid="ignore"):
+                shift = np.nanmean(np.where(np.isfinite(x), x, np.nan), axis=0)
+            self.shift = np.nan_to_num(shift)
+
+        x = x - self.shift
+        present = np.isfinite(x)
+        mask = present.astype(np.float64)
+        x = np.where(present, x, 0.0)
+
+        self.n += mask.T @ mask
+        self.sx += x.T @ mask
+        self.sxx += (x * x).T @ mask
+        self.sxy += x.T @ x
+        self.rows += chunk.shape[0]
+        return self
+
+    def _rebase(self, shift):
+        # Re-express the sums around a different offset
+        d = self.shift - shift
+        di = d[:, None]
+        dj = d[None, :]
+        sx = self.sx
+        self.sxy = self.sxy + dj * sx + di * sx.T + di * dj * self.n
+        self.sxx = self.sxx + 2 * di * sx + di * di * self.n
+        self.sx = sx + di * self.n
+        self.shift = shift
+
+    def merge(self, other):
+        """
+        Combine with statistics gathered over a disjoint set of rows
+        """
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge statistics over different columns")
+        if other.shift is None:
+            return self
+        if self.shift is None:
+            self.shift = other.shift.copy()
+        if not np.array_equal(other.shift, self.shift):
+            other = other.copy()
+            other._rebase(self.shift)
+        self.n += other.n
+        self.sx += other.sx
+        self.sxx += other.sxx
+        self.sxy += other.sxy
+        self.rows += other.rows
+        return self
+
+    def copy(self):
+        clone = CorrelationStats(self.columns)
+        clone.rows = self.rows
+        clone.shift = None if self.shift is None else self.shift.copy()
+        clone.n = self.n.copy()
+        clone.sx = self.sx.copy()
+        clone.sxx = self.sxx.copy()
+        clone.sxy = self.sxy.copy()
+        return clone
+
+    def corr(self):
+        """
+        Pearson correlation matrix as a DataFrame, like DataFrame.corr()
+        """
+        n = self.n
+        cov = n * self.sxy - self.sx * self.sx.T
+        var = n * self.sxx - self.sx ** 2
+        with np.errstate(invalid="ignore", divide="ignore"):
+            r = cov / np.sqrt(var * var.T)
+        r[(n < 2) | (var <= 0) | (var.T <= 0)] = np.nan
+        r = np.clip(r, -1.0, 1.0)
+        diagonal = np.diag(r).copy()
+        np.fill_diagonal(r, np.where(np.isnan(diagonal), np.nan, 1.0))
+        return pd.DataFrame(r, index=self.columns, columns=self.columns)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _cached_corr(version, columns, _df):
+    return CorrelationStats.from_frame(_df, list(columns)).corr()
+
+
+@timed("compute")
+def correlation_matrix(df, columns=None):
+    """
+    Correlation matrix of the numeric columns, cached per dataset version
+
+    Matrices published by the precompute worker are used when current.
+    Frames without a registry ``fingerprint`` attribute are not cached.
+    Streamed datasets use the statistics gathered over every row.
+    """
+    # Imported here: utils.streaming builds on CorrelationStats
+    from utils.precomputed import for_frame
+    from utils.streaming import summary_for
+
+    columns = tuple(numeric_columns(df) if columns is None else columns)
+    stored = for_frame(df, "correlation", columns)
+    if stored is not None:
+        return stored
+    summary = summary_for(df)
+    matrix = summary.corr(columns) if summary is not None else None
+    if matrix is not None:
+        return matrix
+    version = df.attrs.get("fingerprint")
+    if version is None:
+        return CorrelationStats.from_frame(df, list(columns)).corr()
+    return _cached_corr(version, columns, df)
@@ -0,0 +1,210 @@
+"""
+HealthScope Dataset Store
+Columnar, memory-mapped copies of the raw CSV extracts under data/
+
+Column types come from the dataset schema (see utils.schemas), so integer
+codes are stored as int8/int16 and decimals as float32. Text columns are
+stored as strings and handed to pandas as ``category``.
+
+Each converted file has a stamp next to it, ``<stem>.json``, recording the
+size, modification time and content hash of the CSV it was built from. A
+copy is current when the CSV still has that size and modification time, or
+failing that, the same content hash; a CSV replaced by a different file
+with an older timestamp is converted again.
+"""
+
+import json
+import os
+import sys
+from pathlib import Path
+
+from utils.schemas import CATEGORY, apply_schema, arrow_types, read_csv
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    ARROW_AVAILABLE = True
+except Exception:
+    ARROW_AVAILABLE = False
+
+
+STORE_DIR = ".store"
+STORE_SUFFIX = ".arrow"
+STAMP_SUFFIX = ".json"
+BLOCK_SIZE = 64 * 1024 * 1024
+
+# Match pandas: empty cells in text columns are missing values
+CONVERT_OPTIONS = pa_csv.ConvertOptions(strings_can_be_null=True) if ARROW_AVAILABLE else None
+
+
+def convert_options(schema=None):
+    """
+    CSV conversion options with the schema's numeric column types
+    """
+    # Categories are built by to_pandas: Arrow IPC files cannot hold a
+    # dictionary that changes from one record batch to the next
+    types = {
+        column: arrow_type
+        for column, arrow_type in arrow_types(schema).items()
+        if schema[column] != CATEGORY
+    }
+    return pa_csv.ConvertOptions(strings_can_be_null=True, column_types=types)
+
+
+def store_path(csv_path):
+    """
+    Location of the converted copy of a CSV file
+
+    The Arrow file lives next to its source, in a hidden ``.store`` folder:
+    ``data/heart_disease.csv`` -> ``data/.store/heart_disease.arrow``
+    """
+    csv_path = Path(csv_path)
+    return csv_path.parent / STORE_DIR / (csv_path.stem + STORE_SUFFIX)
+
+
+def stamp_path(csv_path):
+    """
+    Location of the record of which CSV contents a converted copy holds
+    """
+    return store_path(csv_path).with_suffix(STAMP_SUFFIX)
+
+
+def _source_stamp(csv_path):
+    # Imported here: utils.profiling loads datasets through this module
+    from utils.profiling import content_hash
+
+    stat = Path(csv_path).stat()
+    return {"stat": [stat.st_size, stat.st_mtime_ns], "hash": content_hash(csv_path)}
+
+
+def is_current(csv_path):
+    """
+    True when a converted copy exists and was built from the current
+    contents of its CSV
+
+    The size and modification time recorded at conversion are compared
+    first; when they differ the content hash decides, so a CSV that was only
+    touched keeps its copy.
+    """
+    target = store_path(csv_path)
+    if not target.exists():
+        return False
+    try:
+        stamp = json.loads(stamp_path(csv_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        # Converted before stamps were written, or the stamp is damaged
+        return False
+    try:
+        stat = Path(csv_path).stat()
+    except OSError:
+        # Source removed: the converted copy is all we have
+        return True
+    if stamp.get("stat") == [stat.st_size, stat.st_mtime_ns]:
+        return True
+    from utils.profiling import content_hash
+    return stamp.get("hash") == content_hash(csv_path)
+
+
+def convert_csv(csv_path, schema=None):
+    """
+    Convert a CSV file into an uncompressed Arrow IPC file
+
+    The CSV is streamed in record batches so the conversion itself runs in
+    bounded memory. The file is written under a temporary name and moved
+    into place, so readers never see a half-written store. Its stamp is
+    taken before the CSV is read and written last, so a CSV that changes
+    during the conversion leaves the copy out of date.
+
+    Args:
+        csv_path: Path to the source CSV
+        schema: Optional column types (see utils.schemas)
+
+    Returns:
+        Path of the written Arrow file
+    """
+    if not ARROW_AVAILABLE:
+        raise RuntimeError("pyarrow is required to convert datasets")
+
+    csv_path = Path(csv_path)
+    target = store_path(csv_path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".tmp")
+    stamp = _source_stamp(csv_path)
+
+    try:
+        reader = pa_csv.open_csv(
+            csv_path,
+            read_options=pa_csv.ReadOptions(block_size=BLOCK_SIZE),
+            convert_options=convert_options(schema),
+        )
+        with pa.OSFile(str(tmp), "wb") as sink:
+            with pa.ipc.new_file(sink, reader.schema) as writer:
+                for batch in reader:
+                    writer.write_batch(batch)
+    except pa.ArrowInvalid:
+        # Types inferred from the first block did not hold for a later one,
+        # or the file does not fit its schema; read the file in one go so
+        # inference sees every row. Loading narrows the columns that fit.
+        table = pa_csv.read_csv(csv_path, convert_options=CONVERT_OPTIONS)
+        with pa.OSFile(str(tmp), "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    os.replace(tmp, target)
+    stamp_tmp = stamp_path(csv_path).with_name(stamp_path(csv_path).name + ".tmp")
+    stamp_tmp.write_text(json.dumps(stamp), encoding="utf-8")
+    os.replace(stamp_tmp, stamp_path(csv_path))
+    return target
+
+
+def open_table(csv_path):
+    """
+    Open the converted copy of a CSV as a memory-mapped Arrow table
+
+    No data is read until columns are touched; the buffers point straight
+    into the page cache.
+    """
+    source = pa.memory_map(str(store_path(csv_path)), "r")
+    return pa.ipc.open_file(source).read_all()
+
+
+def load_table(csv_path, schema=None):
+    """
+    Load a dataset as a DataFrame, preferring its converted Arrow copy
+
+    Numeric columns without nulls are handed to pandas without copying, so
+    they stay backed by the memory map. Falls back to parsing the CSV when
+    no up-to-date converted file exists or pyarrow is not installed. Either
+    way the schema's column types are applied.
+
+    Args:
+        csv_path: Path to the source CSV
+        schema: Optional column types (see utils.schemas)
+
+    Returns:
+        DataFrame with the dataset contents
+    """
+    if ARROW_AVAILABLE and is_current(csv_path):
+        table = open_table(csv_path)
+        categories = [c for c, dtype in (schema or {}).items() if dtype == CATEGORY and c in table.column_names]
+        return apply_schema(table.to_pandas(split_blocks=True, categories=categories), schema)
+    return read_csv(csv_path, schema)
+
+
+def main(argv=None):
+    """
+    Convert every CSV given on the command line (default: data/*.csv)
+    """
+    from utils.registry import DATASETS
+    from utils.schemas import SCHEMAS
+
+    schemas = {Path(spec["path"]): SCHEMAS.get(name) for name, spec in DATASETS.items()}
+    paths = argv if argv else sorted(str(p) for p in Path("data").glob("*.csv"))
+    for path in paths:
+        target = convert_csv(path, schemas.get(Path(path)))
+        print(f"{path} -> {target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,94 @@
+"""
+HealthScope Line Downsampling
+Largest-Triangle-Three-Buckets reduction of line series to a point budget
+
+A line chart cannot show more points than its plot has pixels across, so
+series are sorted by X and cut down to ``HEALTHSCOPE_LINE_POINTS`` points
+(default 2000) before they are sent to the browser. LTTB keeps the first
+and last points and, from each equal-count bucket in between, the point
+that forms the largest triangle with the point kept before it and the
+average of the next bucket, so peaks and dips survive where evenly spaced
+picks would skip them.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from utils.timing import timed
+
+
+MAX_POINTS = int(os.environ.get("HEALTHSCOPE_LINE_POINTS", "2000"))
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Positions of the points LTTB keeps from a series sorted by x
+
+    Bucket averages come from cumulative sums; the scan over buckets is
+    sequential (each choice depends on the previous one) but the work
+    inside a bucket is vectorized.
+
+    Args:
+        x: 1-D array of increasing X values
+        y: 1-D array of Y values, without missing values
+        n_out: Number of points to keep
+
+    Returns:
+        Sorted integer array of at most ``n_out`` positions
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    size = len(x)
+    if n_out >= size:
+        return np.arange(size)
+    if n_out < 3:
+        return np.array([0, size - 1])[:max(n_out, 0)]
+
+    # n_out - 2 buckets over the inner points; the end points are always kept
+    edges = np.linspace(1, size - 1, n_out - 1).astype(np.intp)
+    counts = np.diff(edges)
+    cum_x = np.concatenate([[0.0], np.cumsum(x)])
+    cum_y = np.concatenate([[0.0], np.cumsum(y)])
+    next_x = np.append(((cum_x[edges[1:]] - cum_x[edges[:-1]]) / counts)[1:], x[-1])
+    next_y = np.append(((cum_y[edges[1:]] - cum_y[edges[:-1]]) / counts)[1:], y[-1])
+
+    keep = np.empty(n_out, dtype=np.intp)
+    keep[0], keep[-1] = 0, size - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        bx, by = x[lo:hi], y[lo:hi]
+        # Twice the triangle area; the factor does not change the argmax
+        area = np.abs((x[a] - next_x[i]) * (by - y[a]) - (x[a] - bx) * (next_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+@timed("compute")
+def downsample(data, x, y, max_points=MAX_POINTS):
+    """
+    Rows of a line series sorted by X and reduced to ``max_points`` with LTTB
+
+    Rows missing X or Y are dropped. Non-numeric X columns keep their order
+    of appearance and are spaced evenly for the triangle areas.
+
+    Args:
+        data: DataFrame holding the series
+        x: X column
+        y: Y column (numeric)
+        max_points: Largest number of points returned
+
+    Returns:
+        DataFrame with a subset of the rows of ``data``, in X order
+    """
+    rows = data[data[x].notna() & data[y].notna()]
+    xs = rows[x]
+    numeric_x = pd.api.types.is_numeric_dtype(xs) and not pd.api.types.is_bool_dtype(xs)
+    if numeric_x and not xs.is_monotonic_increasing:
+        rows = rows.iloc[np.argsort(xs.to_numpy(), kind="stable")]
+    if len(rows) <= max_points:
+        return rows
+    positions = rows[x].to_numpy(dtype=float) if numeric_x else np.arange(len(rows))
+    return rows.iloc[lttb_indices(positions, rows[y].to_numpy(dtype=float), max_points)]
@@ -0,0 +1,137 @@
+"""
+HealthScope Figure Cache
+Bounded LRU cache of serialized Plotly figures for the Interactive Graph Builder
+
+Figures are stored as JSON, keyed by (dataset fingerprint, x, y, chart type,
+aggregate, theme), and shared by every session of the server process. Each session also
+remembers its last generated chart so it survives unrelated widget reruns.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from utils.charts import figure_to_json
+from utils.lazy import lazy_import
+
+pio = lazy_import("plotly.io")
+
+
+MAX_BYTES = int(os.environ.get("HEALTHSCOPE_FIGURE_CACHE_MB", "64")) * 1024 * 1024
+MAX_ENTRIES = 256
+
+
+class FigureCache:
+    """
+    Size-bounded LRU map of figure key -> figure JSON
+
+    Args:
+        max_bytes: Largest total size of the stored JSON
+        max_entries: Largest number of stored figures
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES, max_entries=MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return payload
+
+    def put(self, key, payload):
+        size = len(payload)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = payload
+            self._bytes += size
+            while self._bytes > self.max_bytes or len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+
+@st.cache_resource
+def get_figure_cache():
+    return FigureCache()
+
+
+def cached_figure(df, x_axis, y_axis, chart_type, agg, theme, build):
+    """
+    Graph builder figure, served from the cache when possible
+
+    Args:
+        df: Dataset the chart is drawn from (its ``fingerprint`` is the key)
+        x_axis: Selected X column
+        y_axis: Selected Y column or "None"
+        chart_type: Selected chart type
+        agg: Selected aggregate of Y for Bar and Line charts
+        theme: Page theme name
+        build: Callable ``build(x_axis, y_axis, chart_type, agg)`` returning
+            a figure, or None when the selection cannot be plotted
+
+    Returns:
+        Plotly figure or None
+    """
+    version = df.attrs.get("fingerprint")
+    if version is None:
+        return build(x_axis, y_axis, chart_type, agg)
+
+    cache = get_figure_cache()
+    key = (version, x_axis, y_axis, chart_type, agg, theme)
+    payload = cache.get(key)
+    if payload is not None:
+        return pio.from_json(payload, skip_invalid=True)
+
+    fig = build(x_axis, y_axis, chart_type, agg)
+    if fig is not None:
+        cache.put(key, figure_to_json(fig))
+    return fig
+
+
+def remember_chart(page, x_axis, y_axis, chart_type, agg):
+    """
+    Record the chart a session generated last on a page
+    """
+    st.session_state[f"{page}_last_chart"] = (x_axis, y_axis, chart_type, agg)
+
+
+def last_chart(page):
+    """
+    The (x, y, chart type, aggregate) a session generated last on a page, or None
+    """
+    return st.session_state.get(f"{page}_last_chart")
+
+
+def cache_caption():
+    """
+    Small caption with the shared figure cache's hit / miss counters
+    """
+    stats = get_figure_cache().stats()
+    st.caption(
+        f"Figure cache: {stats['hits']} hits · {stats['misses']} misses · "
+        f"{stats['entries']} charts ({stats['bytes'] / 1024:.0f} KB)"
+    )
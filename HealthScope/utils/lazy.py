@@ -0,0 +1,51 @@
+"""
+HealthScope Lazy Imports
+Heavy modules imported on first use instead of at page load
+"""
+
+import importlib.util
+import sys
+
+
+def module_available(name):
+    """
+    True when a module can be imported, without importing it
+    """
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def lazy_import(name):
+    """
+    Module object whose code runs on first attribute access
+
+    Usage mirrors ``import plotly.express as px``::
+
+        px = lazy_import("plotly.express")
+        fig = px.line(...)   # plotly.express is imported here
+
+    Parent packages are imported eagerly (that is how the import system
+    locates submodules); only the named module itself is deferred. Already
+    imported modules are returned as they are.
+
+    Args:
+        name: Fully qualified module name
+
+    Raises:
+        ModuleNotFoundError: If the module does not exist
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
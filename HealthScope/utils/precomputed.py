@@ -0,0 +1,214 @@
+"""
+HealthScope Precomputed Aggregates
+Cache store published by the background worker and read by the dashboards
+
+The worker (``python -m utils.worker``) writes one file per dataset,
+``data/.precomputed/<dataset>.pkl``, holding every aggregate of one version
+of the source file: its profile, histograms, box plot statistics,
+correlations, value counts and group means. A file is written next to its
+final name and then renamed over it, so readers see either the previous
+version or the new one, never a partial write.
+
+The aggregation helpers look results up here first. An entry is current
+when the source file still has the size and modification time it was built
+from, or failing that, the same content hash.
+
+While the worker is running and watching a dataset (its heartbeat file is
+fresh and lists the dataset), a request for a dataset whose entry is out of
+date waits for the worker to publish instead of computing on the request
+path. Each version of a source file gets one wait of up to
+HEALTHSCOPE_PRECOMPUTE_WAIT seconds (default 60), shared by every lookup;
+once it has run out, lookups for that version return at once.
+"""
+
+import json
+import os
+import pickle
+import threading
+import time
+from pathlib import Path
+
+from utils.registry import DATASETS
+
+
+STORE_DIR = ".precomputed"
+HEARTBEAT = "worker.json"
+WAIT_SECONDS = float(os.environ.get("HEALTHSCOPE_PRECOMPUTE_WAIT", "60"))
+POLL_SECONDS = 0.25
+
+_memo = {}
+# Dataset name -> (source stat, monotonic deadline of its one wait)
+_deadlines = {}
+_lock = threading.Lock()
+
+
+def entry_path(csv_path):
+    """
+    Store file of a dataset, next to its source
+    """
+    csv_path = Path(csv_path)
+    return csv_path.parent / STORE_DIR / f"{csv_path.stem}.pkl"
+
+
+def heartbeat_path(data_dir="data"):
+    return Path(data_dir) / STORE_DIR / HEARTBEAT
+
+
+def file_stat(path):
+    stat = Path(path).stat()
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _write_atomic(path, payload):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(payload)
+    os.replace(tmp, path)
+
+
+def publish(csv_path, digest, stat, results):
+    """
+    Atomically replace the store entry of a dataset
+
+    Args:
+        csv_path: Source file the results were computed from
+        digest: Content hash of that file (``utils.profiling.content_hash``)
+        stat: ``[size, mtime_ns]`` of the file when it was hashed
+        results: Mapping of kind to ``{key: result}``: ``profile`` (key
+            None), ``histogram`` ((column, nbins)), ``box_stats`` ((value,
+            group)), ``correlation`` (tuple of columns), ``value_counts``
+            (column) and ``group_mean`` ((by, column))
+    """
+    entry = {
+        "source": str(csv_path),
+        "hash": digest,
+        "stat": stat,
+        "created": time.time(),
+        "results": results,
+    }
+    _write_atomic(entry_path(csv_path), pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def read_entry(csv_path):
+    """
+    Store entry of a dataset, re-read only when the file was replaced
+    """
+    path = entry_path(csv_path)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    with _lock:
+        memo = _memo.get(path)
+        if memo is not None and memo[0] == mtime:
+            return memo[1]
+    try:
+        with open(path, "rb") as fh:
+            entry = pickle.load(fh)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    with _lock:
+        _memo[path] = (mtime, entry)
+    return entry
+
+
+def is_current(entry, csv_path):
+    """
+    True when an entry was built from the current contents of its source
+    """
+    try:
+        if entry["stat"] == file_stat(csv_path):
+            return True
+    except OSError:
+        return False
+    # Imported here: utils.profiling depends on the helpers that read this store
+    from utils.profiling import content_hash
+    return entry["hash"] == content_hash(csv_path)
+
+
+def beat(interval, datasets, data_dir="data"):
+    """
+    Record that the worker is alive, which datasets it watches and how often
+    it checks them for changes
+    """
+    payload = {"pid": os.getpid(), "time": time.time(), "interval": interval, "datasets": list(datasets)}
+    _write_atomic(heartbeat_path(data_dir), json.dumps(payload).encode())
+
+
+def worker_running(data_dir="data", name=None):
+    """
+    True when the worker has written its heartbeat recently (and, given a
+    dataset name, is watching that dataset)
+    """
+    try:
+        beat_info = json.loads(heartbeat_path(data_dir).read_text())
+    except (OSError, ValueError):
+        return False
+    if name is not None and name not in beat_info.get("datasets", ()):
+        return False
+    return time.time() - beat_info["time"] < max(10.0, 3 * beat_info["interval"])
+
+
+def _deadline(name, csv_path, wait):
+    # The first wait for a version of the source sets the deadline of all
+    # later ones, so a version the worker never publishes costs one wait
+    try:
+        stat = file_stat(csv_path)
+    except OSError:
+        return time.monotonic()
+    with _lock:
+        memo = _deadlines.get(name)
+        if memo is None or memo[0] != stat:
+            memo = _deadlines[name] = (stat, time.monotonic() + wait)
+    return memo[1]
+
+
+def current_entry(name, wait=WAIT_SECONDS):
+    """
+    Entry for the current version of a registered dataset, or None
+
+    When the worker is watching the dataset, waits for a stale entry to be
+    republished, until ``wait`` seconds after the first wait for this
+    version of the source file.
+    """
+    spec = DATASETS.get(name)
+    if spec is None or not Path(spec["path"]).exists():
+        return None
+    csv_path = Path(spec["path"])
+    deadline = None
+    while True:
+        entry = read_entry(csv_path)
+        if entry is not None and is_current(entry, csv_path):
+            return entry
+        if not worker_running(csv_path.parent, name):
+            return None
+        if deadline is None:
+            deadline = _deadline(name, csv_path, wait)
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(POLL_SECONDS)
+
+
+def lookup(name, kind, key=None):
+    """
+    Precomputed result for the current version of a dataset, or None
+
+    Results are shared by every session and must not be modified in place.
+    """
+    entry = current_entry(name)
+    if entry is None:
+        return None
+    return entry["results"].get(kind, {}).get(key)
+
+
+def for_frame(df, kind, key=None):
+    """
+    ``lookup`` for a DataFrame handed out by the dataset registry
+
+    Frames that are not a registered dataset (subsets, ad-hoc frames) have
+    no ``dataset`` attribute and never match.
+    """
+    name = df.attrs.get("dataset")
+    if name is None or df.attrs.get("fingerprint") is None:
+        return None
+    return lookup(name, kind, key)
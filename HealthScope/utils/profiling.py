@@ -0,0 +1,207 @@
+"""
+HealthScope Dataset Profiles
+Per-column summary statistics stored as small JSON sidecars next to the data
+
+A profile is computed once per version of a source file and saved under
+``data/.profiles/<dataset>.<content hash>.json``. Stat blocks on the Home page
+and the dashboards read the profile instead of scanning the DataFrame.
+"""
+
+import hashlib
+import json
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.precomputed import lookup
+from utils.registry import DATASETS, file_fingerprint, get_dataset
+from utils.streaming import summary_for
+
+
+PROFILE_DIR = ".profiles"
+TOP_K = 10
+HASH_CHUNK = 1024 * 1024
+
+_hash_memo = {}
+
+
+def content_hash(path):
+    """
+    BLAKE2b digest of a file's bytes, memoized by size and modification time
+    """
+    path = Path(path)
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    if key not in _hash_memo:
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(HASH_CHUNK), b""):
+                digest.update(chunk)
+        _hash_memo[key] = digest.hexdigest()
+    return _hash_memo[key]
+
+
+def profile_path(name, csv_path, digest):
+    """
+    Sidecar location for one version of a dataset
+    """
+    return Path(csv_path).parent / PROFILE_DIR / f"{name}.{digest}.json"
+
+
+def dtype_class(series):
+    """
+    Coarse type of a column: numeric, boolean, datetime or categorical
+    """
+    if pd.api.types.is_bool_dtype(series):
+        return "boolean"
+    if pd.api.types.is_numeric_dtype(series):
+        return "numeric"
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return "datetime"
+    return "categorical"
+
+
+def _scalar(value):
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def profile_frame(df, top_k=TOP_K):
+    """
+    Compute the per-column profile of a DataFrame
+
+    Null counts and the numeric moments are computed column-wise over the
+    whole frame at once; distinct counts and top-k values come from a
+    single value_counts per column.
+
+    Args:
+        df: DataFrame to profile
+        top_k: Number of most frequent values kept per column
+
+    Returns:
+        Dict with ``rows`` and a ``columns`` mapping, safe to dump as JSON
+    """
+    nulls = df.isna().sum()
+    numeric = df.select_dtypes(include=[np.number])
+    moments = (
+        numeric.agg(["min", "max", "mean", "std"])
+        if not numeric.empty else pd.DataFrame()
+    )
+
+    columns = {}
+    for column in df.columns:
+        series = df[column]
+        counts = series.value_counts(dropna=True)
+        info = {
+            "count": int(len(series) - nulls[column]),
+            "nulls": int(nulls[column]),
+            "dtype": str(series.dtype),
+            "class": dtype_class(series),
+            "distinct": int(len(counts)),
+            "top": [[_scalar(v), int(c)] for v, c in counts.head(top_k).items()],
+        }
+        if column in moments.columns:
+            for stat in ("min", "max", "mean", "std"):
+                info[stat] = _scalar(moments.at[stat, column])
+        columns[str(column)] = info
+
+    return {"rows": int(len(df)), "columns": columns}
+
+
+def build_profile(name, datasets=DATASETS):
+    """
+    Load a registered dataset's profile, computing and saving it if needed
+
+    A sidecar is read first, then the precompute worker's store; the
+    profile is only computed when neither has the current version.
+
+    Args:
+        name: Dataset key in the registry
+        datasets: Registry dataset specs
+
+    Returns:
+        Profile dict, or None when the source file does not exist
+    """
+    csv_path = Path(datasets[name]["path"])
+    if not csv_path.exists():
+        return None
+
+    digest = content_hash(csv_path)
+    sidecar = profile_path(name, csv_path, digest)
+    if sidecar.exists():
+        return json.loads(sidecar.read_text(encoding="utf-8"))
+    stored = lookup(name, "profile")
+    if stored is not None:
+        return stored
+
+    df = get_dataset(name)
+    summary = summary_for(df)
+    profile = summary.profile() if summary is not None else profile_frame(df)
+    profile.update(dataset=name, source=str(csv_path), hash=digest)
+
+    sidecar.parent.mkdir(parents=True, exist_ok=True)
+    for stale in sidecar.parent.glob(f"{name}.*.json"):
+        stale.unlink(missing_ok=True)
+    tmp = sidecar.with_name(sidecar.name + ".tmp")
+    tmp.write_text(json.dumps(profile), encoding="utf-8")
+    os.replace(tmp, sidecar)
+    return profile
+
+
+@st.cache_data(show_spinner=False)
+def _cached_profile(name, version):
+    return build_profile(name)
+
+
+def get_profile(name):
+    """
+    Profile of a registered dataset, cached per file version
+    """
+    return _cached_profile(name, file_fingerprint(DATASETS[name]["path"]))
+
+
+# --------------------------------------------------
+# Profile lookups used by the stat blocks
+# --------------------------------------------------
+def overview(profile):
+    """
+    Rows, columns, missing cells and numeric / categorical column counts
+    """
+    if not profile:
+        return {"rows": 0, "cols": 0, "missing": 0, "numeric": 0, "categorical": 0}
+    columns = profile["columns"].values()
+    numeric = sum(1 for c in columns if c["class"] == "numeric")
+    return {
+        "rows": profile["rows"],
+        "cols": len(profile["columns"]),
+        "missing": sum(c["nulls"] for c in columns),
+        "numeric": numeric,
+        "categorical": len(profile["columns"]) - numeric,
+    }
+
+
+def column_stat(profile, column, stat, default=None):
+    """
+    A single statistic of a column, or ``default`` if it is unavailable
+    """
+    info = (profile or {}).get("columns", {}).get(column)
+    if info is None or info.get(stat) is None:
+        return default
+    return info[stat]
+
+
+def value_count(profile, column, value):
+    """
+    Occurrences of ``value`` in a column, taken from its top-k list
+    """
+    info = (profile or {}).get("columns", {}).get(column)
+    if info is None:
+        return 0
+    return next((count for v, count in info["top"] if v == value), 0)
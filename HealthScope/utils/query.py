@@ -0,0 +1,157 @@
+"""
+HealthScope Query Engine
+Server-side group-by aggregation for the Interactive Graph Builder
+
+Bar and Line charts with a Y column are drawn from one row per X value
+(count, mean, median or sum of Y) instead of one mark per raw row. The
+aggregation runs in DuckDB when it is installed: loaded datasets are
+queried in place, and datasets too large to load are queried straight from
+their CSV, so every row counts. Without DuckDB, pandas groups loaded frames,
+and streamed datasets are aggregated in one chunked pass over the CSV
+(medians, which cannot be merged across chunks, come from the row sample).
+
+Means come from the shared aggregate layer (utils.aggregates.group_mean):
+the worker's precomputed group means when current, the streaming summary,
+or the shared per-version cache, so the graph builder and every other
+caller compute a mean by group once. The other aggregates, and means the
+shared layer cannot answer over every row of a streamed dataset, are cached
+here per (dataset version, x, y, aggregate).
+
+DuckDB is optional (``pip install -r requirements-optional.txt``).
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.aggregates import full_group_mean, group_mean
+from utils.lazy import lazy_import, module_available
+from utils.streaming import CHUNK_ROWS, summary_for
+from utils.timing import timed
+
+
+DUCKDB_AVAILABLE = module_available("duckdb")
+
+AGGREGATES = ("count", "mean", "median", "sum")
+
+SQL_FUNCTIONS = {"count": "COUNT", "mean": "AVG", "median": "MEDIAN", "sum": "SUM"}
+
+
+def value_label(y, agg):
+    """
+    Name of the aggregated column, e.g. ``mean(Glucose)``
+    """
+    return f"{agg}({y})"
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _sql(source, x, y, agg, fillna=None, types=None):
+    def column(name):
+        if fillna is None:
+            return _quote(name)
+        # pandas stores a fill of another type as-is; SQL needs one type per
+        # column, so a text column or a text fill compares as text
+        if isinstance(fillna, str) or (types or {}).get(name) == "VARCHAR":
+            return f"COALESCE(CAST({_quote(name)} AS VARCHAR), {_literal(str(fillna))})"
+        return f"COALESCE({_quote(name)}, {fillna!r})"
+
+    return (
+        f"SELECT {column(x)} AS x, {SQL_FUNCTIONS[agg]}({column(y)}) AS value "
+        f"FROM {source} WHERE {column(x)} IS NOT NULL GROUP BY 1 ORDER BY 1"
+    )
+
+
+def _literal(text):
+    return "'" + text.replace("'", "''") + "'"
+
+
+def _duckdb(df, x, y, agg, csv_path=None, fillna=None):
+    duckdb = lazy_import("duckdb")
+    # One connection per call: DuckDB connections are not shared across threads
+    con = duckdb.connect()
+    try:
+        types = None
+        if csv_path is not None:
+            source = f"read_csv_auto({_literal(str(csv_path))})"
+            if fillna is not None:
+                types = {row[0]: row[1] for row in con.execute(f"DESCRIBE SELECT * FROM {source}").fetchall()}
+        else:
+            con.register("data", df[[x, y]] if x != y else df[[x]])
+            source = "data"
+        result = con.execute(_sql(source, x, y, agg, fillna, types)).df()
+    finally:
+        con.close()
+    return result
+
+
+def _pandas(df, x, y, agg):
+    grouped = df[y].groupby(df[x], observed=True, sort=True).agg(agg)
+    return pd.DataFrame({"x": grouped.index, "value": grouped.to_numpy()})
+
+
+def _chunked(csv_path, x, y, agg, fillna=None):
+    # Counts and sums merge across chunks; means are derived from them
+    parts = []
+    for chunk in pd.read_csv(csv_path, usecols=list({x, y}), chunksize=CHUNK_ROWS):
+        if fillna is not None:
+            chunk = chunk.fillna(fillna)
+        parts.append(chunk[y].groupby(chunk[x], sort=False).agg(["count", "sum"]))
+    if not parts:
+        return pd.DataFrame({"x": [], "value": []})
+    totals = pd.concat(parts).groupby(level=0, sort=True).sum()
+    value = totals["sum"] / totals["count"].replace(0, np.nan) if agg == "mean" else totals[agg]
+    return pd.DataFrame({"x": totals.index, "value": value.to_numpy()})
+
+
+def _compute(df, x, y, agg):
+    summary = summary_for(df)
+    if summary is None:
+        result = _duckdb(df, x, y, agg) if DUCKDB_AVAILABLE else _pandas(df, x, y, agg)
+    else:
+        from utils.registry import DATASETS
+
+        spec = DATASETS[df.attrs["dataset"]]
+        if DUCKDB_AVAILABLE:
+            result = _duckdb(df, x, y, agg, csv_path=spec["path"], fillna=spec.get("fillna"))
+        elif agg == "median":
+            result = _pandas(df, x, y, agg)
+        else:
+            result = _chunked(spec["path"], x, y, agg, fillna=spec.get("fillna"))
+    result.columns = [x, value_label(y, agg)]
+    return result
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def _cached(version, x, y, agg, _df):
+    return _compute(_df, x, y, agg)
+
+
+@timed("compute")
+def group_aggregate(df, x, y, agg="mean"):
+    """
+    One row per distinct X value with an aggregate of Y, sorted by X
+
+    Args:
+        df: DataFrame from the dataset registry
+        x: Column grouped on; rows where it is missing are dropped
+        y: Column aggregated
+        agg: One of ``AGGREGATES``; ``count`` counts non-missing Y values
+
+    Returns:
+        DataFrame with two columns: ``x`` and ``value_label(y, agg)``
+    """
+    if agg not in AGGREGATES:
+        raise ValueError(f"Unknown aggregate '{agg}', expected one of {', '.join(AGGREGATES)}")
+    if agg != "count" and (not pd.api.types.is_numeric_dtype(df[y]) or pd.api.types.is_bool_dtype(df[y])):
+        raise TypeError(f"The {agg} needs a numeric column, '{y}' is {df[y].dtype}")
+    if agg == "mean":
+        # A streamed frame is a sample: only full-data means are shared
+        means = full_group_mean(df, x, y) if summary_for(df) is not None else group_mean(df, x, y)
+        if means is not None:
+            return pd.DataFrame({x: means.index, value_label(y, agg): means.to_numpy()})
+    version = df.attrs.get("fingerprint")
+    if version is None:
+        return _compute(df, x, y, agg)
+    return _cached(version, x, y, agg, df)
@@ -0,0 +1,114 @@
+"""
+HealthScope Range Index
+Sorted-permutation indexes that answer range queries without a column scan
+
+A ``SortedIndex`` keeps a numeric column's values in sorted order together
+with the permutation that sorts them. ``lo <= x <= hi`` is then two binary
+searches (``np.searchsorted``), and the matching rows are one contiguous
+slice of the permutation; rows outside the range are never compared.
+Missing values are left out of every range.
+
+Indexes are built once per (dataset version, column) and shared by every
+session. They are kept with their dataset in the registry
+(``utils.registry.derived``), so their bytes count against its memory
+ceiling and they are freed when the dataset is evicted. The cohort range
+sliders (utils.cohort) and range subsets such as the Diabetes page's
+non-zero Insulin histogram are answered from them. Frames that do not come
+from the registry build a new index on every call, which costs more than the
+scan it replaces.
+"""
+
+import numpy as np
+import pandas as pd
+from utils.registry import derived
+
+
+class SortedIndex:
+    """
+    Sorted values of a numeric column and the row positions they came from
+
+    Args:
+        series: Numeric column to index
+    """
+
+    def __init__(self, series):
+        if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+            raise TypeError(f"Range indexes need a numeric column, '{series.name}' is {series.dtype}")
+        if isinstance(series.dtype, np.dtype) and not series.hasnans:
+            values = series.to_numpy()
+        else:
+            values = series.to_numpy(dtype=float, na_value=np.nan)
+        self.rows = len(values)
+        order = np.argsort(values, kind="stable").astype(np.int32 if self.rows < 2**31 else np.int64)
+        # NaNs sort last; they match no range
+        valid = self.rows - int(np.isnan(values).sum()) if values.dtype.kind == "f" else self.rows
+        self.order = order[:valid]
+        self.missing = order[valid:]
+        self.values = values[self.order]
+
+    @property
+    def nbytes(self):
+        return self.order.nbytes + self.missing.nbytes + self.values.nbytes
+
+    def _bounds(self, lo, hi, lo_inclusive, hi_inclusive):
+        start = 0 if lo is None else int(np.searchsorted(self.values, lo, "left" if lo_inclusive else "right"))
+        stop = len(self.values) if hi is None else int(np.searchsorted(self.values, hi, "right" if hi_inclusive else "left"))
+        return start, max(start, stop)
+
+    def _slice(self, lo, hi, lo_inclusive, hi_inclusive):
+        start, stop = self._bounds(lo, hi, lo_inclusive, hi_inclusive)
+        return self.order[start:stop]
+
+    def count(self, lo=None, hi=None, lo_inclusive=True, hi_inclusive=True):
+        """
+        Number of rows in the range, from the two binary searches alone
+        """
+        start, stop = self._bounds(lo, hi, lo_inclusive, hi_inclusive)
+        return stop - start
+
+    def mask(self, lo=None, hi=None, lo_inclusive=True, hi_inclusive=True):
+        """
+        Boolean row mask of the range
+        """
+        start, stop = self._bounds(lo, hi, lo_inclusive, hi_inclusive)
+        # Write whichever side of the range has fewer rows
+        if 2 * (stop - start) <= self.rows:
+            mask = np.zeros(self.rows, dtype=bool)
+            mask[self.order[start:stop]] = True
+        else:
+            mask = np.ones(self.rows, dtype=bool)
+            mask[self.order[:start]] = False
+            mask[self.order[stop:]] = False
+            mask[self.missing] = False
+        return mask
+
+    def bitmap(self, lo=None, hi=None, lo_inclusive=True, hi_inclusive=True):
+        """
+        Packed bitmap of the range (one bit per row), as in utils.cohort
+        """
+        return np.packbits(self.mask(lo, hi, lo_inclusive, hi_inclusive))
+
+    def positions(self, lo=None, hi=None, lo_inclusive=True, hi_inclusive=True):
+        """
+        Ascending row positions in the range
+
+        Args:
+            lo: Lower bound, or None for no lower bound
+            hi: Upper bound, or None for no upper bound
+            lo_inclusive: Whether rows equal to ``lo`` match
+            hi_inclusive: Whether rows equal to ``hi`` match
+        """
+        rows = self._slice(lo, hi, lo_inclusive, hi_inclusive)
+        # Sorting a large slice costs more than one pass over a mask
+        if len(rows) * 16 > self.rows:
+            return np.flatnonzero(self.mask(lo, hi, lo_inclusive, hi_inclusive))
+        return np.sort(rows)
+
+
+def range_index(df, column):
+    """
+    ``SortedIndex`` of a column, built once per (dataset version, column)
+
+    Cached indexes are shared between sessions and must not be modified.
+    """
+    return derived(df, ("range_index", column), lambda: SortedIndex(df[column]))
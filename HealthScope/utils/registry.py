@@ -0,0 +1,314 @@
+"""
+HealthScope Dataset Registry
+One shared, read-only copy of each dataset per server process
+
+Every browser session and every rerun reads from the same DataFrame instead
+of receiving its own pickled copy from ``st.cache_data``. Pages are handed
+shallow views: the column data is shared and marked read-only, so a page
+can never modify what another session sees.
+
+Memory ceiling
+    The registry keeps the in-memory size of all loaded datasets under
+    ``HEALTHSCOPE_DATASET_MEMORY_MB`` (default 4096 MB). When loading a
+    dataset pushes the total above the ceiling, the least recently used
+    datasets are evicted until it fits again. The dataset just requested is
+    never evicted, so a single dataset larger than the ceiling still loads.
+
+Derived artifacts
+    Structures built from a loaded dataset, such as the row positions of a
+    cohort (utils.aggregates.subset) or a column's range index
+    (utils.rangeindex), are kept with that dataset's entry through
+    ``derived``. Their bytes count against the same ceiling. They are
+    evicted before any dataset, least recently used first, and go with
+    their dataset when it is evicted or replaced by a new version.
+
+Datasets too large to load
+    A dataset whose estimated in-memory size exceeds
+    ``HEALTHSCOPE_STREAM_MB`` (default: the memory ceiling), or whose spec
+    sets ``"stream": True``, is never loaded whole. It is read once in
+    chunks into a ``utils.streaming.StreamingSummary`` and pages receive a
+    random sample of its rows, flagged with ``attrs["streamed"]``. The
+    aggregation helpers answer from the full-data summary for such frames.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import streamlit as st
+
+from utils.datastore import load_table, store_path
+from utils.schemas import SCHEMAS
+from utils.streaming import estimate_memory, load_summary
+
+
+DATASETS = {
+    "heart": {
+        "path": "data/heart_disease.csv", "fillna": 0, "group_by": ["target"],
+        "filters": ["sex", "cp", "target", "age", "chol", "trestbps"],
+    },
+    "diabetes": {
+        "path": "data/diabetes.csv", "group_by": ["Outcome"],
+        "filters": ["Outcome", "Age", "Glucose", "BMI"],
+    },
+    "pcos": {
+        "path": "data/pcos_data.csv", "group_by": ["Family History of PCOS"],
+        "filters": ["Risk", "Menstrual Regularity", "Family History of PCOS", "Age"],
+    },
+}
+
+MAX_BYTES = int(os.environ.get("HEALTHSCOPE_DATASET_MEMORY_MB", "4096")) * 1024 * 1024
+STREAM_BYTES = int(os.environ.get("HEALTHSCOPE_STREAM_MB", str(MAX_BYTES // (1024 * 1024)))) * 1024 * 1024
+
+
+def file_fingerprint(path):
+    """
+    Cheap version stamp for a dataset file (size + modification time)
+
+    The converted Arrow copy is included when present, so re-running the
+    ingest step also produces a new version.
+    """
+    parts = [str(path)]
+    for candidate in (Path(path), store_path(path)):
+        try:
+            stat = candidate.stat()
+            parts.append(f"{stat.st_size}:{stat.st_mtime_ns}")
+        except OSError:
+            parts.append("-")
+    return hashlib.blake2b("|".join(parts).encode(), digest_size=8).hexdigest()
+
+
+def freeze(df):
+    """
+    Mark the column arrays of a DataFrame read-only, in place
+    """
+    try:
+        arrays = df._mgr.arrays
+    except AttributeError:
+        return df
+    for arr in arrays:
+        flags = getattr(arr, "flags", None)
+        if flags is not None and flags.writeable:
+            try:
+                flags.writeable = False
+            except ValueError:
+                # Views of buffers we do not own cannot change their flags
+                pass
+    return df
+
+
+def too_large(spec, limit=STREAM_BYTES):
+    """
+    True when a dataset should be streamed instead of loaded
+    """
+    if "stream" in spec:
+        return bool(spec["stream"])
+    if not Path(spec["path"]).exists():
+        return False
+    return estimate_memory(spec["path"]) > limit
+
+
+class DatasetRegistry:
+    """
+    Process-wide store of loaded datasets with LRU eviction
+
+    Args:
+        datasets: Mapping of dataset name to its spec: ``path``, an optional
+            ``fillna`` value applied once at load time, for streaming,
+            ``stream`` and the ``group_by`` columns of grouped box plots, and
+            the ``filters`` columns of the sidebar cohort filter
+            (utils.cohort)
+        max_bytes: Memory ceiling for all loaded datasets together
+    """
+
+    def __init__(self, datasets=None, max_bytes=MAX_BYTES):
+        self.datasets = dict(DATASETS if datasets is None else datasets)
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._loading = {}
+        # Guards the LRU bookkeeping only, never held during a load
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        """
+        Return a zero-copy, read-only view of a dataset, loading it if needed
+
+        For streamed datasets this is a view of the row sample.
+        """
+        return self._entry(name)["df"].copy(deep=False)
+
+    def summary(self, name):
+        """
+        Streaming summary of a dataset, or None if it is loaded whole
+        """
+        return self._entry(name).get("summary")
+
+    def derived(self, name, version, key, build):
+        """
+        Artifact built from a loaded dataset, kept with its entry
+
+        Args:
+            name: Dataset the artifact is built from
+            version: Dataset version it was built for; nothing is kept when
+                that version is no longer loaded
+            key: Hashable name of the artifact
+            build: Zero-argument function returning the artifact, which
+                reports its size in bytes as ``nbytes``
+        """
+        with self._lock:
+            entry = self._current(name, version)
+            if entry is not None and key in entry["derived"]:
+                entry["derived"].move_to_end(key)
+                return entry["derived"][key]
+        value = build()
+        with self._lock:
+            entry = self._current(name, version)
+            if entry is not None:
+                entry["derived"][key] = value
+                self._evict(keep=name)
+        return value
+
+    def _current(self, name, version):
+        # Caller holds self._lock
+        entry = self._entries.get(name)
+        if entry is None or entry["version"] != version:
+            return None
+        self._entries.move_to_end(name)
+        return entry
+
+    def _entry(self, name):
+        spec = self.datasets[name]
+        version = file_fingerprint(spec["path"])
+
+        with self._lock:
+            entry = self._current(name, version)
+            if entry is not None:
+                return entry
+            loading = self._loading.setdefault(name, threading.Lock())
+
+        # Loads run under a per-dataset lock only, so a slow load does not
+        # block sessions reading other datasets; concurrent requests for the
+        # same dataset wait for the one load
+        with loading:
+            with self._lock:
+                entry = self._current(name, version)
+                if entry is not None:
+                    return entry
+            entry = self._load(name, spec, version)
+            with self._lock:
+                self._entries[name] = entry
+                self._entries.move_to_end(name)
+                self._evict(keep=name)
+            return entry
+
+    def _load(self, name, spec, version):
+        if too_large(spec):
+            return self._load_streamed(name, spec, version)
+        df = load_table(spec["path"], SCHEMAS.get(name))
+        if "fillna" in spec and df.isna().any().any():
+            df = df.fillna(spec["fillna"])
+        df.attrs["dataset"] = name
+        df.attrs["fingerprint"] = version
+        freeze(df)
+        return {
+            "df": df,
+            "version": version,
+            "bytes": int(df.memory_usage(deep=True).sum()),
+            "derived": OrderedDict(),
+        }
+
+    def _load_streamed(self, name, spec, version):
+        summary = load_summary(spec["path"], version, fillna=spec.get("fillna"),
+                               group_by=spec.get("group_by", ()), schema=SCHEMAS.get(name))
+        df = summary.sample_frame()
+        df.attrs["dataset"] = name
+        df.attrs["fingerprint"] = version
+        df.attrs["streamed"] = True
+        freeze(df)
+        return {
+            "df": df,
+            "summary": summary,
+            "version": version,
+            "bytes": summary.nbytes(),
+            "derived": OrderedDict(),
+        }
+
+    def _evict(self, keep):
+        while self.total_bytes() > self.max_bytes:
+            # Derived artifacts go first: they are cheap to rebuild
+            owner = next((e for e in self._entries.values() if e["derived"]), None)
+            if owner is not None:
+                owner["derived"].popitem(last=False)
+                continue
+            victim = next((n for n in self._entries if n != keep), None)
+            if victim is None:
+                break
+            del self._entries[victim]
+
+    @staticmethod
+    def _bytes(entry):
+        return entry["bytes"] + sum(int(value.nbytes) for value in entry["derived"].values())
+
+    def total_bytes(self):
+        return sum(self._bytes(entry) for entry in self._entries.values())
+
+    def stats(self):
+        """
+        Loaded datasets in LRU order (oldest first) with their sizes
+        """
+        with self._lock:
+            return {
+                name: {"version": entry["version"], "bytes": self._bytes(entry),
+                       "derived": len(entry["derived"])}
+                for name, entry in self._entries.items()
+            }
+
+
+@st.cache_resource
+def get_registry():
+    return DatasetRegistry()
+
+
+def get_dataset(name):
+    """
+    Shared, read-only view of a registered dataset
+
+    Args:
+        name: Key in ``DATASETS`` ('heart', 'diabetes' or 'pcos')
+    """
+    return get_registry().get(name)
+
+
+def get_summary(name):
+    """
+    Full-data streaming summary of a dataset too large to load, else None
+    """
+    return get_registry().summary(name)
+
+
+def lineage(df):
+    """
+    (dataset name, dataset version) a frame was taken from, or None
+
+    Registry frames name themselves; subsets (utils.aggregates) carry their
+    parent's in ``attrs["parent"]``.
+    """
+    if df.attrs.get("dataset") is not None and df.attrs.get("fingerprint") is not None:
+        return df.attrs["dataset"], df.attrs["fingerprint"]
+    return df.attrs.get("parent")
+
+
+def derived(df, key, build):
+    """
+    ``build()`` kept with the registry entry of the dataset ``df`` comes
+    from, under (the frame's version, ``key``)
+
+    Frames that do not come from the registry build on every call.
+    """
+    parent = lineage(df)
+    version = df.attrs.get("fingerprint")
+    if parent is None or version is None:
+        return build()
+    return get_registry().derived(*parent, (version, key), build)
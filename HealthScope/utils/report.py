@@ -0,0 +1,297 @@
+"""
+HealthScope Static Reports
+Every dashboard figure rendered without a browser session
+
+The figures of each dashboard page are grouped as on the page, one group per
+page section (``render_<group>`` fragment), and built by the same section
+builders as the page (utils.sections). ``export`` renders every group of
+every report on a process pool, one task per (report, group), and writes one
+directory per report:
+
+    <out>/<report>/index.html                 self-contained page (plotly.js inlined)
+    <out>/<report>/report.json                overview stats, figure list, errors
+    <out>/<report>/figures/<group>.<name>.json  Plotly figure JSON
+
+A report is either a registered dataset (loaded through the dataset registry,
+so the Arrow store and precomputed aggregates are used) or a CSV extract
+with the columns of one of the datasets. Extracts are plain frames: nothing
+about them is cached or looked up in the registry's stores.
+
+The Interactive Graph Builder has no default chart and is not exported.
+"""
+
+import html
+import json
+import logging
+import multiprocessing
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from pathlib import Path
+
+from utils.registry import DATASETS
+from utils.schemas import SCHEMAS
+from utils.sections import FULL_WIDTH, GROUPS
+from utils.themes import HealthScopeTheme as Theme
+
+
+FORMATS = ("html", "json")
+# Extract frames kept per pool process; tasks of one report usually follow each other
+LOADED_FRAMES = 4
+
+TITLES = {
+    "heart": "❤️ Heart Disease Analysis",
+    "diabetes": "💉 Diabetes Dashboard",
+    "pcos": "🎀 PCOS Dashboard",
+}
+
+log = logging.getLogger("healthscope.report")
+
+
+# --------------------------------------------------
+# Loading (runs in the pool processes)
+# --------------------------------------------------
+@lru_cache(maxsize=LOADED_FRAMES)
+def load(dataset, source=None):
+    """
+    DataFrame of a report: the registered dataset when ``source`` is None,
+    else a CSV extract read with the dataset's schema and fill value
+    """
+    if source is None:
+        from utils.registry import get_dataset
+        return get_dataset(dataset)
+    from utils.schemas import read_csv
+
+    df = read_csv(source, SCHEMAS.get(dataset))
+    spec = DATASETS[dataset]
+    if "fillna" in spec and df.isna().any().any():
+        df = df.fillna(spec["fillna"])
+    return df
+
+
+def matching_datasets(path):
+    """
+    Datasets whose schema columns all appear in a CSV's header
+    """
+    import pandas as pd
+
+    header = set(pd.read_csv(path, nrows=0).columns)
+    return [name for name in GROUPS if set(SCHEMAS[name]) <= header]
+
+
+def overview_stats(dataset, source=None):
+    """
+    The overview stat blocks of a report (rows, columns, missing cells, ...)
+    """
+    from utils.profiling import build_profile, overview, profile_frame
+
+    profile = build_profile(dataset) if source is None else profile_frame(load(dataset, source))
+    stats = overview(profile)
+    stats["missing_pct"] = round(stats["missing"] / max(1, stats["rows"] * stats["cols"]) * 100, 2)
+    return stats
+
+
+def quiet():
+    """
+    Pool initializer: cached helpers run outside a Streamlit server here, and
+    its "no runtime" warnings would be printed for every cache
+    """
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+
+
+def render_group(dataset, group, source=None, formats=FORMATS):
+    """
+    Build every figure of one page section and serialize it
+
+    Returns:
+        List of dicts with ``name``, ``title``, and the figure as Plotly
+        ``json`` and an HTML ``div`` (without plotly.js) per requested format
+    """
+    import plotly.io as pio
+    from utils.charts import figure_to_json
+
+    df = load(dataset, source)
+    rendered = []
+    for name, title, fig in GROUPS[dataset][group](df):
+        item = {"name": name, "title": title}
+        if "json" in formats:
+            item["json"] = figure_to_json(fig)
+        if "html" in formats:
+            item["div"] = pio.to_html(fig, full_html=False, include_plotlyjs=False,
+                                      div_id=f"{group}-{name}", config={"responsive": True})
+        rendered.append(item)
+    return rendered
+
+
+# --------------------------------------------------
+# Writing
+# --------------------------------------------------
+def _plotly_js():
+    from plotly.offline import get_plotlyjs
+    return get_plotlyjs()
+
+
+def _stat(label, value):
+    return (f'<div class="stat"><div class="label">{html.escape(label)}</div>'
+            f'<div class="value">{html.escape(str(value))}</div></div>')
+
+
+def write_html(path, report, groups):
+    """
+    One self-contained page: overview stats, then each group's figures
+    """
+    theme = getattr(Theme, report["dataset"].upper(), Theme.HOME)
+    stats = report["overview"] or {}
+    blocks = []
+    if stats:
+        blocks.append('<div class="stats">' + "".join([
+            _stat("Rows", f"{stats['rows']:,}"),
+            _stat("Columns", stats["cols"]),
+            _stat("Missing", f"{stats['missing']} ({stats['missing_pct']}%)"),
+            _stat("Numeric / Categorical", f"{stats['numeric']} / {stats['categorical']}"),
+        ]) + "</div>")
+    for group, items in groups.items():
+        error = report["errors"].get(group)
+        cells = "".join(
+            f'<figure><figcaption>{html.escape(item["title"])}</figcaption>{item["div"]}</figure>'
+            for item in items
+        )
+        if error:
+            cells += f'<p class="error">{html.escape(group)} failed: {html.escape(error)}</p>'
+        wide = " wide" if group in FULL_WIDTH else ""
+        blocks.append(f'<section class="grid{wide}" id="{group}">{cells}</section>')
+
+    page = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>{html.escape(report["title"])} — {html.escape(report["name"])}</title>
+<script type="text/javascript">{_plotly_js()}</script>
+<style>
+body {{ font-family: {Theme.FONT_FAMILY}; margin: 0; color: {theme['text']}; background: #FFFFFF; }}
+header {{ background: {theme['gradient']}; color: #FFFFFF; padding: 2rem 2.5rem; }}
+header h1 {{ margin: 0 0 0.4rem 0; }}
+main {{ padding: 1.5rem 2.5rem; }}
+.stats {{ display: flex; flex-wrap: wrap; gap: 2rem; margin-bottom: 1.5rem; }}
+.stat .label {{ font-size: 0.85rem; color: #6B7280; text-transform: uppercase; }}
+.stat .value {{ font-size: 1.5rem; font-weight: 800; }}
+.grid {{ display: grid; grid-template-columns: 1fr 1fr; gap: 1.5rem; margin-bottom: 1.5rem; }}
+.grid.wide {{ grid-template-columns: 1fr; }}
+figure {{ margin: 0; min-width: 0; }}
+figcaption {{ font-weight: 600; margin-bottom: 0.5rem; }}
+.error {{ color: #B91C1C; }}
+</style>
+</head>
+<body>
+<header>
+<h1>{html.escape(report["title"])}</h1>
+<div>{html.escape(report["name"])} · {html.escape(report["source"])} · generated {html.escape(report["generated"])}</div>
+</header>
+<main>
+{"".join(blocks)}
+</main>
+</body>
+</html>
+"""
+    path.write_text(page, encoding="utf-8")
+
+
+def write_report(out_dir, report, groups, formats=FORMATS):
+    """
+    Write one report directory from its rendered groups
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    if "json" in formats:
+        figures_dir = out_dir / "figures"
+        figures_dir.mkdir(exist_ok=True)
+        for group, items in groups.items():
+            for item in items:
+                filename = f"{group}.{item['name']}.json"
+                (figures_dir / filename).write_text(item["json"], encoding="utf-8")
+                report["figures"].append({"group": group, "name": item["name"],
+                                          "title": item["title"], "file": f"figures/{filename}"})
+        (out_dir / "report.json").write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if "html" in formats:
+        write_html(out_dir / "index.html", report, groups)
+
+
+def report_names(jobs):
+    """
+    Output directory name of each (dataset, source) job, unique within a run
+
+    Registered datasets are named after the dataset, extracts after their
+    file; repeated names get a numeric suffix.
+    """
+    names = []
+    seen = Counter()
+    for dataset, source in jobs:
+        base = dataset if source is None else Path(source).stem
+        seen[base] += 1
+        names.append(base if seen[base] == 1 else f"{base}-{seen[base]}")
+    return names
+
+
+def export(jobs, out, formats=FORMATS, workers=None):
+    """
+    Render and write a report for every job, one pool task per figure group
+
+    Args:
+        jobs: List of (dataset, source) pairs; source is a CSV extract path,
+            or None for the registered dataset
+        out: Output directory
+        formats: Any of ``FORMATS``
+        workers: Pool processes (default: one per CPU)
+
+    Returns:
+        Number of groups (or overviews) that failed; their reports are still
+        written, with the errors listed
+    """
+    out = Path(out)
+    names = report_names(jobs)
+    generated = time.strftime("%Y-%m-%d %H:%M:%S")
+    reports, groups = {}, {}
+    for name, (dataset, source) in zip(names, jobs):
+        reports[name] = {
+            "name": name,
+            "dataset": dataset,
+            "title": TITLES[dataset],
+            "source": str(source if source is not None else DATASETS[dataset]["path"]),
+            "generated": generated,
+            "overview": None,
+            "figures": [],
+            "errors": {},
+        }
+        groups[name] = {group: [] for group in GROUPS[dataset]}
+
+    failures = 0
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=quiet) as pool:
+        futures = {}
+        for name, (dataset, source) in zip(names, jobs):
+            futures[pool.submit(overview_stats, dataset, source)] = (name, None)
+            for group in GROUPS[dataset]:
+                futures[pool.submit(render_group, dataset, group, source, formats)] = (name, group)
+        remaining = Counter(name for name, _ in futures.values())
+
+        for future in as_completed(futures):
+            name, group = futures[future]
+            report = reports[name]
+            try:
+                result = future.result()
+            except Exception as exc:
+                failures += 1
+                report["errors"][group or "overview"] = f"{type(exc).__name__}: {exc}"
+                log.error("%s: %s failed: %s", name, group or "overview", exc)
+            else:
+                if group is None:
+                    report["overview"] = result
+                else:
+                    groups[name][group] = result
+                    log.info("%s: %s (%d figures)", name, group, len(result))
+            remaining[name] -= 1
+            if remaining[name] == 0:
+                write_report(out / name, report, groups.pop(name), formats)
+                log.info("%s: written to %s", name, out / name)
+    return failures
@@ -0,0 +1,244 @@
+"""
+HealthScope Scatter Engine
+Scatter plots that stay responsive at millions of points
+
+Up to ``GL_THRESHOLD`` rows are drawn as regular SVG markers. Above it the
+traces switch to WebGL (``Scattergl``). Above ``MAX_POINTS`` the data is
+either reduced to a stratified sample that keeps every color group, or
+replaced by a 2D density raster computed on the server.
+Hover data is limited to the plotted columns.
+
+Points on discrete axes are spread with seeded jitter, cached per dataset
+version, so the same data always gives the same figure.
+"""
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from utils.lazy import lazy_import
+from utils.timing import timed
+
+go = lazy_import('plotly.graph_objects')
+
+
+GL_THRESHOLD = 5_000
+MAX_POINTS = 100_000
+DENSITY_BINS = 200
+SAMPLE_SEED = 0
+JITTER_SEED = 0
+# Numeric columns with at most this many distinct values are discrete
+DISCRETE_LEVELS = 50
+# Automatic jitter: this fraction of the smallest gap between two values
+JITTER_FRACTION = 0.15
+
+
+def stratified_sample(df, n, group=None, seed=SAMPLE_SEED):
+    """
+    Sample about ``n`` rows, keeping each group's share of the data
+
+    Every non-empty group keeps at least one row, so no color disappears
+    from the legend. The sample is deterministic for a given seed and keeps
+    the original row order.
+
+    Args:
+        df: DataFrame to sample
+        n: Target number of rows
+        group: Optional column whose groups are sampled proportionally
+        seed: Seed for the random generator
+    """
+    if len(df) <= n:
+        return df
+    rng = np.random.default_rng(seed)
+
+    if group is None:
+        positions = rng.choice(len(df), size=n, replace=False)
+    else:
+        groups = df.groupby(group, sort=False, observed=True, dropna=False).indices
+        fraction = n / len(df)
+        positions = np.concatenate([
+            rng.choice(idx, size=max(1, int(round(len(idx) * fraction))), replace=False)
+            for idx in groups.values()
+        ])
+
+    positions.sort()
+    return df.iloc[positions]
+
+
+def density_trace(x, y, bins=DENSITY_BINS, colorscale='Blues'):
+    """
+    Heatmap trace with 2D point counts binned on the server
+
+    Args:
+        x: Numeric x values
+        y: Numeric y values
+        bins: Number of bins along each axis
+        colorscale: Plotly colorscale for the counts
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    keep = np.isfinite(x) & np.isfinite(y)
+    counts, x_edges, y_edges = np.histogram2d(x[keep], y[keep], bins=bins)
+
+    # Empty cells are left transparent rather than painted with the low color
+    z = counts.T.astype(float)
+    z[z == 0] = np.nan
+
+    return go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=z,
+        colorscale=colorscale,
+        colorbar=dict(title='Count'),
+        hovertemplate='x: %{x:.4g}<br>y: %{y:.4g}<br>Count: %{z}<extra></extra>'
+    )
+
+
+def auto_jitter(series, levels=DISCRETE_LEVELS, fraction=JITTER_FRACTION):
+    """
+    Jitter strength for a discrete numeric column, 0 for any other column
+    """
+    if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return 0.0
+    distinct = np.sort(pd.unique(series.dropna().to_numpy(dtype=float)))
+    if len(distinct) < 2 or len(distinct) > levels:
+        return 0.0
+    return float(np.diff(distinct).min() * fraction)
+
+
+def _jittered(df, x, y, color, x_jitter, y_jitter, seed):
+    rng = np.random.default_rng(seed)
+    columns = {c: df[c] for c in (x, y, color) if c is not None}
+    strengths = {x: x_jitter}
+    strengths.setdefault(y, y_jitter)
+    for column, strength in strengths.items():
+        # Noise on the color column would split its groups into one per row
+        if column == color:
+            continue
+        if strength is None:
+            strength = auto_jitter(df[column])
+        if strength:
+            values = df[column].to_numpy(dtype=float, na_value=np.nan)
+            columns[column] = pd.Series(values + rng.normal(0, strength, len(values)), index=df.index)
+    return pd.DataFrame(columns)
+
+
+@st.cache_resource(max_entries=32, show_spinner=False)
+def _cached_jitter(version, x, y, color, x_jitter, y_jitter, seed, _df):
+    return _jittered(_df, x, y, color, x_jitter, y_jitter, seed)
+
+
+@timed('compute')
+def jittered(df, x, y, color=None, x_jitter=None, y_jitter=None, seed=JITTER_SEED):
+    """
+    The plotted columns of a scatter, with jitter to separate stacked points
+
+    Noise is Gaussian from a seeded generator, so repeated calls give the
+    same values, and the result is cached per (dataset version, columns,
+    jitter, seed). Cached frames are shared between sessions and must not
+    be modified in place.
+
+    Args:
+        df: DataFrame with data
+        x: Column for x-axis
+        y: Column for y-axis
+        color: Optional color column, carried along unchanged; an axis
+            that is also the color column is never jittered
+        x_jitter: Standard deviation of the X noise; None picks one for
+            discrete columns (``auto_jitter``) and 0 turns it off
+        y_jitter: Same for Y
+        seed: Seed of the noise generator
+    """
+    version = df.attrs.get('fingerprint')
+    if version is None:
+        return _jittered(df, x, y, color, x_jitter, y_jitter, seed)
+    return _cached_jitter(version, x, y, color, x_jitter, y_jitter, seed, df)
+
+
+def _color_for(key, position, colors):
+    if isinstance(colors, dict):
+        return colors.get(key)
+    if colors:
+        return colors[position % len(colors)]
+    return None
+
+
+def scatter_traces(df, x, y, color=None, colors=None, marker=None,
+                   gl_threshold=GL_THRESHOLD, max_points=MAX_POINTS,
+                   overflow='sample', colorscale='Blues'):
+    """
+    Build scatter traces sized to the number of rows
+
+    Args:
+        df: DataFrame with data
+        x: Column for x-axis
+        y: Column for y-axis
+        color: Optional column for color groups (one trace per group)
+        colors: Dict of group -> color, or a list of colors used in order
+        marker: Extra marker properties applied to every trace
+        gl_threshold: Row count above which WebGL traces are used
+        max_points: Row count above which ``overflow`` applies
+        overflow: 'sample' for a stratified sample, 'density' for a raster
+        colorscale: Colorscale of the density raster
+
+    Returns:
+        List of Plotly traces
+    """
+    if len(df) > max_points and overflow == 'density':
+        if pd.api.types.is_numeric_dtype(df[x]) and pd.api.types.is_numeric_dtype(df[y]):
+            return [density_trace(df[x], df[y], colorscale=colorscale)]
+
+    if len(df) > max_points:
+        df = stratified_sample(df, max_points, group=color)
+
+    trace_cls = go.Scattergl if len(df) > gl_threshold else go.Scatter
+    hover = f'<b>{x}</b>: %{{x}}<br><b>{y}</b>: %{{y}}'
+
+    if color is None:
+        groups = [(None, df)]
+    else:
+        groups = list(df.groupby(color, sort=True, observed=True))
+
+    traces = []
+    for position, (key, part) in enumerate(groups):
+        key = key[0] if isinstance(key, tuple) else key
+        trace_marker = dict(marker or {})
+        group_color = _color_for(key, position, colors)
+        if group_color is not None:
+            trace_marker['color'] = group_color
+        traces.append(trace_cls(
+            x=part[x].to_numpy(),
+            y=part[y].to_numpy(),
+            mode='markers',
+            name=str(key) if key is not None else y,
+            marker=trace_marker,
+            showlegend=key is not None,
+            hovertemplate=(
+                hover + (f'<br><b>{color}</b>: {key}' if key is not None else '')
+                + '<extra></extra>'
+            )
+        ))
+    return traces
+
+
+@timed('build')
+def build_scatter(df, x, y, color=None, colors=None, title=None, **kwargs):
+    """
+    Scatter figure for the dashboards, a drop-in for px.scatter
+
+    Args:
+        df: DataFrame with data
+        x: Column for x-axis
+        y: Column for y-axis
+        color: Optional column for color groups
+        colors: Dict of group -> color, or a list of colors used in order
+        title: Optional chart title
+        **kwargs: Passed on to scatter_traces
+    """
+    fig = go.Figure(data=scatter_traces(df, x, y, color=color, colors=colors, **kwargs))
+    fig.update_layout(
+        title=title,
+        xaxis_title=x,
+        yaxis_title=y,
+        legend_title=color
+    )
+    return fig
@@ -0,0 +1,219 @@
+"""
+HealthScope Dataset Schemas
+Compact column types applied when a dataset is parsed
+
+Without a schema every integer column loads as int64, every decimal as
+float64 and every text column as Python string objects. The schemas below
+name the smallest type that holds each column's domain: flags and codes in
+int8, measurements in int16 or float32, and text labels as ``category``.
+
+Types are applied while parsing: as Arrow column types when the converted
+store is written, and as ``dtype=`` for pandas (decimals and categories
+only; see ``read_dtypes``). If a file does not fit its schema (a value out
+of range, a stray string), it is parsed with inferred types instead and
+each column is then narrowed only where its values allow.
+
+Print the memory saved per dataset and column, from the HealthScope
+directory:
+
+    python -m utils.schemas [dataset ...]
+"""
+
+import sys
+import warnings
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except Exception:
+    ARROW_AVAILABLE = False
+
+
+INT8 = "int8"
+INT16 = "int16"
+FLOAT32 = "float32"
+CATEGORY = "category"
+
+SCHEMAS = {
+    "heart": {
+        "age": INT8,
+        "sex": INT8,
+        "cp": INT8,
+        "trestbps": INT16,
+        "chol": INT16,
+        "fbs": INT8,
+        "restecg": INT8,
+        "thalach": INT16,
+        "exang": INT8,
+        "oldpeak": FLOAT32,
+        "slope": INT8,
+        "ca": INT8,
+        "thal": INT8,
+        "target": INT8,
+    },
+    "diabetes": {
+        "Pregnancies": INT8,
+        "Glucose": INT16,
+        "BloodPressure": INT16,
+        "SkinThickness": INT16,
+        "Insulin": INT16,
+        "BMI": FLOAT32,
+        "DiabetesPedigreeFunction": FLOAT32,
+        "Age": INT8,
+        "Outcome": INT8,
+    },
+    "pcos": {
+        "Country": CATEGORY,
+        "Age": INT8,
+        "BMI": CATEGORY,
+        "Menstrual Regularity": CATEGORY,
+        "Hirsutism": CATEGORY,
+        "Acne Severity": CATEGORY,
+        "Family History of PCOS": CATEGORY,
+        "Insulin Resistance": CATEGORY,
+        "Lifestyle Score": INT8,
+        "Stress Levels": CATEGORY,
+        "Urban/Rural": CATEGORY,
+        "Socioeconomic Status": CATEGORY,
+        "Awareness of PCOS": CATEGORY,
+        "Fertility Concerns": CATEGORY,
+        "Undiagnosed PCOS Likelihood": FLOAT32,
+        "Ethnicity": CATEGORY,
+        "Risk": CATEGORY,
+    },
+}
+
+# Nullable counterparts for integer columns that turn out to have gaps
+NULLABLE = {INT8: "Int8", INT16: "Int16"}
+
+
+def arrow_types(schema):
+    """
+    Column types for pyarrow.csv.ConvertOptions
+    """
+    types = {
+        INT8: pa.int8(),
+        INT16: pa.int16(),
+        FLOAT32: pa.float32(),
+        CATEGORY: pa.dictionary(pa.int32(), pa.string()),
+    }
+    return {column: types[dtype] for column, dtype in (schema or {}).items()}
+
+
+def read_dtypes(schema):
+    """
+    ``dtype=`` argument for pd.read_csv
+
+    Integer types are left out: pandas wraps out-of-range values around
+    instead of failing, so integers are narrowed after parsing, once their
+    range has been checked.
+    """
+    return {column: dtype for column, dtype in (schema or {}).items() if dtype in (FLOAT32, CATEGORY)}
+
+
+def _fits(series, dtype):
+    values = series.dropna()
+    if values.empty:
+        return True
+    if not pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+        return False
+    if dtype == FLOAT32:
+        return True
+    info = np.iinfo(dtype)
+    numbers = values.to_numpy(dtype=float)
+    return bool(np.all(numbers == np.round(numbers)) and numbers.min() >= info.min and numbers.max() <= info.max)
+
+
+def apply_schema(df, schema):
+    """
+    Narrow the columns of a parsed DataFrame to their schema types, in place
+
+    Columns already of the right type are left alone. Integer columns with
+    missing values become pandas nullable integers, and columns whose values
+    do not fit their declared type keep the type they were parsed with.
+    Categories are sorted, so groupings and legends have a stable order.
+
+    Returns:
+        The same DataFrame
+    """
+    for column, dtype in (schema or {}).items():
+        if column not in df.columns:
+            continue
+        series = df[column]
+        if dtype == CATEGORY:
+            if not isinstance(series.dtype, pd.CategoricalDtype):
+                series = series.astype(CATEGORY)
+            if not series.cat.categories.is_monotonic_increasing:
+                series = series.cat.reorder_categories(sorted(series.cat.categories))
+            df[column] = series
+            continue
+        if str(series.dtype) in (dtype, NULLABLE.get(dtype)):
+            continue
+        if not _fits(series, dtype):
+            warnings.warn(f"Column '{column}' does not fit {dtype}; keeping {series.dtype}")
+            continue
+        if dtype in NULLABLE and series.isna().any():
+            df[column] = series.astype(NULLABLE[dtype])
+        else:
+            df[column] = series.astype(dtype)
+    return df
+
+
+def read_csv(path, schema=None, **kwargs):
+    """
+    pd.read_csv with the schema types applied while parsing
+
+    Falls back to inferred types (narrowed afterwards where the values
+    allow) when the file does not parse with the schema.
+    """
+    if schema:
+        try:
+            return apply_schema(pd.read_csv(path, dtype=read_dtypes(schema), **kwargs), schema)
+        except (ValueError, TypeError, OverflowError):
+            pass
+    return apply_schema(pd.read_csv(path, **kwargs), schema)
+
+
+def memory_report(path, schema):
+    """
+    Per-column memory of a CSV parsed with default types and with its schema
+
+    Returns:
+        DataFrame indexed by column with ``default_dtype``, ``default_bytes``,
+        ``compact_dtype``, ``compact_bytes`` and ``ratio`` (default / compact)
+    """
+    default = pd.read_csv(path)
+    compact = read_csv(path, schema)
+    report = pd.DataFrame({
+        "default_dtype": default.dtypes.astype(str),
+        "default_bytes": default.memory_usage(deep=True, index=False),
+        "compact_dtype": compact.dtypes.astype(str),
+        "compact_bytes": compact.memory_usage(deep=True, index=False),
+    })
+    report["ratio"] = (report["default_bytes"] / report["compact_bytes"]).round(1)
+    return report
+
+
+def main(argv=None):
+    from pathlib import Path
+
+    from utils.registry import DATASETS
+
+    names = (argv if argv is not None else sys.argv[1:]) or list(SCHEMAS)
+    for name in names:
+        path = DATASETS[name]["path"]
+        if not Path(path).exists():
+            print(f"{name}: {path} not found, skipped")
+            continue
+        report = memory_report(path, SCHEMAS.get(name))
+        before, after = report["default_bytes"].sum(), report["compact_bytes"].sum()
+        print(f"\n{name}: {before / 1024:,.0f} KB -> {after / 1024:,.0f} KB ({before / after:.1f}x smaller)")
+        print(report.to_string())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
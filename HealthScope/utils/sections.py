@@ -0,0 +1,288 @@
+"""
+HealthScope Page Sections
+Figures of each dashboard section, shared by the pages and the static reports
+
+Every page section (a ``render_<group>`` fragment) gets its figures from one
+builder here, so the dashboards, the static reports (utils.report), the
+warm-up (utils.warmup) and the benchmarks (benchmarks.suite) all draw the
+same charts. A builder takes the page's DataFrame and returns a list of
+``(name, title, figure)``, leaving out figures whose columns are missing.
+``show`` lays the figures out on a page.
+
+Builders time their figure construction as the ``build`` phase of the
+current section (utils.timing); outside a page the timing is a no-op.
+"""
+
+import streamlit as st
+from utils.themes import HealthScopeTheme as Theme
+from utils.timing import phase, plotly_chart
+
+
+# Page colors (the PRIMARY, ACCENT, SECONDARY constants of each dashboard page)
+HEART_PRIMARY = "#D7263D"
+HEART_ACCENT = "#FF9090"
+DIABETES_PRIMARY = Theme.DIABETES["primary"]
+PCOS_PRIMARY = "#FF2E82"
+PCOS_SECONDARY = "#FF78B6"
+
+# --------------------------------------------------
+# Figure groups, one per page section
+# --------------------------------------------------
+def heart_donuts(df):
+    import plotly.graph_objects as go
+    from utils.aggregates import value_counts
+
+    tgt = value_counts(df, "target")
+    with phase("build"):
+        target = go.Figure(data=[go.Pie(
+            labels=["No Disease", "Has Disease"],
+            values=[tgt.get(0, 0), tgt.get(1, 0)],
+            hole=0.45,
+            marker=dict(colors=[HEART_ACCENT, HEART_PRIMARY])
+        )])
+    cp_counts = value_counts(df, "cp").sort_index()
+    with phase("build"):
+        chest_pain = go.Figure(data=[go.Pie(
+            labels=[f"Type {i}" for i in cp_counts.index],
+            values=cp_counts.values,
+            hole=0.45,
+            marker=dict(colors=[HEART_ACCENT, HEART_PRIMARY, "#FF6B6B", "#FF4A4A"])
+        )])
+    return [
+        ("target_donut", "Heart Disease Distribution", target),
+        ("chest_pain_donut", "Chest Pain Type Distribution", chest_pain),
+    ]
+
+
+def heart_histograms(df):
+    from utils.charts import create_binned_histogram
+
+    return [
+        ("age_histogram", "Age Distribution", create_binned_histogram(df, "age", nbins=30, color=HEART_PRIMARY)),
+        ("cholesterol_histogram", "Cholesterol Distribution",
+         create_binned_histogram(df, "chol", nbins=30, color=HEART_ACCENT)),
+    ]
+
+
+def heart_bp_and_counts(df):
+    from utils.charts import create_binned_histogram, create_summary_boxplot
+
+    return [
+        ("bp_by_target_box", "Resting BP by Target",
+         create_summary_boxplot(df, "trestbps", "target", colors={0: HEART_ACCENT, 1: HEART_PRIMARY})),
+        ("target_counts", "Target Counts", create_binned_histogram(df, "target", nbins=2, color=HEART_PRIMARY)),
+    ]
+
+
+def heart_scatter_and_age(df):
+    from utils.charts import create_binned_histogram
+    from utils.scatter import build_scatter
+
+    return [
+        ("chol_thalach_scatter", "Cholesterol vs Max Heart Rate",
+         build_scatter(df, "chol", "thalach", color="target", colors=[HEART_ACCENT, HEART_PRIMARY])),
+        ("age_histogram_compact", "Age Histogram (Compact)",
+         create_binned_histogram(df, "age", nbins=25, color=HEART_ACCENT)),
+    ]
+
+
+def heart_heatmap(df):
+    import plotly.express as px
+    from utils.correlation import correlation_matrix
+
+    corr = correlation_matrix(df)
+    with phase("build"):
+        fig = px.imshow(corr, text_auto=".2f", color_continuous_scale="Reds", aspect="auto")
+        fig.update_layout(
+            height=900,
+            width=None,
+            margin=dict(l=0, r=0, t=40, b=40),
+            coloraxis_colorbar=dict(thickness=18, outlinewidth=0, ticks="outside"),
+        )
+    return [("correlation_heatmap", "Heart Disease Feature Correlations", fig)]
+
+
+def diabetes_quick_insights(df):
+    from utils.aggregates import value_counts
+    from utils.charts import create_boxplot, create_histogram, create_pie_chart
+    from utils.rangeindex import range_index
+
+    figures = []
+    if "Outcome" in df.columns:
+        # In label order, not frequency order; a cohort may lack a class
+        counts = value_counts(df, "Outcome").reindex([0, 1], fill_value=0)
+        figures.append(("outcome_pie", "Diabetes Distribution", create_pie_chart(
+            counts.values, ["Non-Diabetic", "Diabetic"], "Diabetes Distribution", theme="diabetes")))
+    if "Glucose" in df.columns:
+        figures.append(("glucose_histogram", "Glucose Distribution",
+                        create_histogram(df, "Glucose", "Glucose Distribution", theme="diabetes")))
+    if "BMI" in df.columns:
+        figures.append(("bmi_box", "BMI Spread", create_boxplot(df, "BMI", "BMI Spread", theme="diabetes")))
+    if "Insulin" in df.columns:
+        # Answered from the column's sorted index instead of a scan
+        insulin_nonzero = ("insulin_nonzero",
+                           lambda d: range_index(d, "Insulin").positions(lo=0, lo_inclusive=False))
+        figures.append(("insulin_histogram", "Insulin Distribution", create_histogram(
+            df, "Insulin", "Insulin Distribution", theme="diabetes", subset=insulin_nonzero)))
+    return figures
+
+
+def diabetes_glucose_and_counts(df):
+    import plotly.express as px
+    from utils.aggregates import value_counts
+    from utils.charts import create_binned_histogram
+
+    figures = []
+    if "Glucose" in df.columns:
+        figures.append(("glucose_binned_histogram", "Glucose",
+                        create_binned_histogram(df, "Glucose", nbins=30, color=DIABETES_PRIMARY)))
+    if "Outcome" in df.columns:
+        counts = value_counts(df, "Outcome").reset_index()
+        counts.columns = ["Outcome", "Count"]
+        with phase("build"):
+            figures.append(("outcome_counts", "Outcome Counts", px.bar(counts, x="Outcome", y="Count")))
+    return figures
+
+
+def diabetes_scatter_and_age(df):
+    from utils.charts import create_summary_boxplot
+    from utils.scatter import build_scatter
+
+    figures = []
+    if {"BMI", "Glucose"}.issubset(df.columns):
+        figures.append(("bmi_glucose_scatter", "BMI vs Glucose", build_scatter(
+            df, "BMI", "Glucose", color="Outcome" if "Outcome" in df.columns else None)))
+    if {"Outcome", "Age"}.issubset(df.columns):
+        figures.append(("age_by_outcome_box", "Age by Outcome",
+                        create_summary_boxplot(df, "Age", "Outcome", by_group=True)))
+    return figures
+
+
+def diabetes_heatmap(df):
+    from utils.charts import create_correlation_heatmap
+
+    return [("correlation_heatmap", "Correlation Heatmap",
+             create_correlation_heatmap(df, "Diabetes Feature Correlations", theme="diabetes"))]
+
+
+def pcos_quick_insights(df):
+    from utils.aggregates import value_counts
+    from utils.charts import create_bar_chart, create_histogram, create_pie_chart
+
+    figures = []
+    if "Risk" in df.columns:
+        counts = value_counts(df, "Risk")
+        figures.append(("risk_pie", "PCOS Risk Distribution", create_pie_chart(
+            counts.values, list(counts.index), "PCOS Risk Distribution", theme="pcos")))
+    if "Age" in df.columns:
+        figures.append(("age_histogram", "Age Distribution",
+                        create_histogram(df, "Age", "Age Distribution", theme="pcos")))
+    if "Lifestyle Score" in df.columns:
+        figures.append(("lifestyle_histogram", "Lifestyle Score Distribution",
+                        create_histogram(df, "Lifestyle Score", "Lifestyle Score Distribution", theme="pcos")))
+    bmi_col = next((c for c in ["BMI", "BMI Category", "BMI Category "] if c in df.columns), None)
+    if bmi_col:
+        bmi_counts = value_counts(df, bmi_col).head(5).reset_index()
+        bmi_counts.columns = [bmi_col, "Count"]
+        figures.append(("bmi_bar", "BMI Category Distribution", create_bar_chart(
+            data=bmi_counts, x_column=bmi_col, y_column="Count",
+            title="BMI Category Distribution", theme="pcos")))
+    return figures
+
+
+def pcos_scatter_and_counts(df):
+    import plotly.express as px
+    from utils.aggregates import value_counts
+    from utils.scatter import build_scatter, jittered
+
+    figures = []
+    if {"Age", "Undiagnosed PCOS Likelihood"}.issubset(df.columns):
+        color_col = "Menstrual Regularity" if "Menstrual Regularity" in df.columns else None
+        # Seeded jitter separates overlapping dots; cached per dataset version
+        plot_df = jittered(df, "Age", "Undiagnosed PCOS Likelihood", color=color_col, x_jitter=0, y_jitter=0.006)
+        fig = build_scatter(
+            plot_df, "Age", "Undiagnosed PCOS Likelihood",
+            color=color_col,
+            colors={"Regular": PCOS_PRIMARY, "Irregular": PCOS_SECONDARY},
+            marker=dict(size=8, opacity=0.85, line=dict(width=0.3, color="white")),
+            title="Age vs Undiagnosed PCOS Likelihood"
+        )
+        fig.update_layout(
+            height=500,
+            xaxis_title="Age",
+            yaxis_title="Undiagnosed PCOS Likelihood",
+            plot_bgcolor="white",
+            paper_bgcolor="rgba(0,0,0,0)",
+            legend_title="Menstrual Regularity",
+            margin=dict(l=20, r=20, t=60, b=40)
+        )
+        figures.append(("age_likelihood_scatter", "Age vs Undiagnosed PCOS Likelihood", fig))
+    if "Menstrual Regularity" in df.columns:
+        counts = value_counts(df, "Menstrual Regularity").reset_index()
+        counts.columns = ["Menstrual Regularity", "Count"]
+        with phase("build"):
+            figures.append(("regularity_counts", "Distribution of Menstrual Regularity", px.bar(
+                counts, x="Menstrual Regularity", y="Count", color="Menstrual Regularity",
+                color_discrete_map={"Regular": PCOS_PRIMARY, "Irregular": PCOS_SECONDARY},
+                title="Distribution of Menstrual Regularity"
+            )))
+    return figures
+
+
+def pcos_lifestyle_box(df):
+    from utils.charts import create_summary_boxplot
+
+    if not {"Family History of PCOS", "Lifestyle Score"}.issubset(df.columns):
+        return []
+    return [("lifestyle_by_family_history", "Lifestyle Score by Family History of PCOS", create_summary_boxplot(
+        df, "Lifestyle Score", "Family History of PCOS",
+        colors={"Yes": PCOS_PRIMARY, "No": PCOS_SECONDARY},
+        title="Lifestyle Score by Family History of PCOS"
+    ))]
+
+
+# Page order; full-width groups span both report columns
+GROUPS = {
+    "heart": {
+        "donuts": heart_donuts,
+        "histograms": heart_histograms,
+        "bp_and_counts": heart_bp_and_counts,
+        "scatter_and_age": heart_scatter_and_age,
+        "heatmap": heart_heatmap,
+    },
+    "diabetes": {
+        "quick_insights": diabetes_quick_insights,
+        "glucose_and_counts": diabetes_glucose_and_counts,
+        "scatter_and_age": diabetes_scatter_and_age,
+        "heatmap": diabetes_heatmap,
+    },
+    "pcos": {
+        "quick_insights": pcos_quick_insights,
+        "scatter_and_counts": pcos_scatter_and_counts,
+        "lifestyle_box": pcos_lifestyle_box,
+    },
+}
+FULL_WIDTH = {"heatmap"}
+
+
+def show(figures, columns, headings=False):
+    """
+    Lay out the figures of a section in page columns
+
+    Args:
+        figures: Result of a section builder
+        columns: One list of figure names per page column, top to bottom;
+            names the builder left out are skipped
+        headings: Put each figure's title above it
+    """
+    placed = {name: (title, fig) for name, title, fig in figures}
+    slots = st.columns(len(columns)) if len(columns) > 1 else [st.container()]
+    for slot, names in zip(slots, columns):
+        with slot:
+            for name in names:
+                if name not in placed:
+                    continue
+                title, fig = placed[name]
+                if headings:
+                    st.markdown(f"#### {title}")
+                plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,585 @@
+"""
+HealthScope Streaming Aggregates
+Single-pass, bounded-memory summaries of datasets too large to load
+
+A ``StreamingSummary`` reads a CSV in chunks and keeps only what the
+dashboards draw: overview statistics, value counts, histogram bins,
+quantiles (for box plots), correlation statistics and a uniform random
+sample of rows for the preview, scatter plots and the graph builder.
+
+Memory use is bounded by the chunk size, the sample size and the sketches:
+each numeric column keeps exact value counts while it has at most
+``MAX_DISTINCT`` distinct values, and a ``FINE_BINS``-bin histogram over its
+observed range after that. Quantiles and histograms are exact in the first
+case and accurate to one fine bin in the second.
+
+The registry serves a summary in place of the full DataFrame when a dataset
+is flagged too large (see ``utils.registry``). Summaries are saved next to
+the Arrow store and rebuilt only when the CSV changes. To build them ahead
+of time, run from the HealthScope directory:
+
+    python -m utils.streaming [dataset ...]
+"""
+
+import io
+import itertools
+import os
+import pickle
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils.correlation import CorrelationStats
+from utils.datastore import store_path
+from utils.schemas import apply_schema
+
+
+CHUNK_ROWS = 250_000
+SAMPLE_ROWS = 50_000
+MAX_DISTINCT = 4096
+FINE_BINS = 4096
+MAX_CATEGORIES = 10_000
+ESTIMATE_ROWS = 10_000
+SUMMARY_SUFFIX = ".summary.pkl"
+
+
+class NumericSketch:
+    """
+    Moments, exact value counts and (past MAX_DISTINCT values) a fine histogram
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.nulls = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+        # Exact mode: sorted distinct values and their counts
+        self.values = np.array([], dtype=float)
+        self.counts = np.array([], dtype=np.int64)
+        # Histogram mode: FINE_BINS bins of ``width`` starting at ``lo``
+        self.hist = None
+        self.lo = 0.0
+        self.width = 0.0
+
+    @property
+    def exact(self):
+        return self.hist is None
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float)
+        finite = values[np.isfinite(values)]
+        self.nulls += len(values) - len(finite)
+        if len(finite) == 0:
+            return
+
+        # Chan et al. parallel update of the mean and sum of squares
+        n_b = len(finite)
+        mean_b = finite.mean()
+        m2_b = ((finite - mean_b) ** 2).sum()
+        n = self.count + n_b
+        delta = mean_b - self.mean
+        self.mean += delta * n_b / n
+        self.m2 += m2_b + delta * delta * self.count * n_b / n
+        self.count = n
+        self.min = min(self.min, finite.min())
+        self.max = max(self.max, finite.max())
+
+        if self.exact:
+            uniques, counts = np.unique(finite, return_counts=True)
+            merged, inverse = np.unique(np.concatenate([self.values, uniques]), return_inverse=True)
+            self.counts = np.bincount(inverse, weights=np.concatenate([self.counts, counts]),
+                                      minlength=len(merged)).astype(np.int64)
+            self.values = merged
+            if len(merged) > MAX_DISTINCT:
+                self._to_histogram()
+        else:
+            self._add_to_histogram(finite, np.ones(len(finite), dtype=np.int64))
+
+    def _to_histogram(self):
+        self.lo = self.values[0]
+        self.width = max((self.values[-1] - self.lo) / FINE_BINS, np.finfo(float).eps * max(1.0, abs(self.lo)))
+        self.hist = np.zeros(FINE_BINS, dtype=np.int64)
+        values, counts = self.values, self.counts
+        self.values = self.counts = None
+        self._add_to_histogram(values, counts)
+
+    def _coarsen(self):
+        # Merge adjacent bins: half the resolution, same start
+        if len(self.hist) % 2:
+            self.hist = np.append(self.hist, 0)
+        self.hist = self.hist.reshape(-1, 2).sum(axis=1)
+        self.width *= 2
+
+    def _add_to_histogram(self, values, counts):
+        lo, hi = values.min(), values.max()
+        # Halve the resolution until the covered range, grown by whole bins
+        # to take in the new values, fits in FINE_BINS bins. The array is
+        # only extended afterwards, so it never holds more than FINE_BINS
+        # bins however far an outlier lies from the rest of the data.
+        while True:
+            left = np.ceil(max(0.0, self.lo - lo) / self.width)
+            start = self.lo - left * self.width
+            need = max(left + len(self.hist), np.floor((hi - start) / self.width) + 1)
+            if need <= FINE_BINS:
+                break
+            self._coarsen()
+        left, need = int(left), int(need)
+        if left:
+            self.hist = np.concatenate([np.zeros(left, dtype=np.int64), self.hist])
+            self.lo = start
+        if need > len(self.hist):
+            self.hist = np.concatenate([self.hist, np.zeros(need - len(self.hist), dtype=np.int64)])
+
+        idx = np.clip(((values - self.lo) / self.width).astype(np.int64), 0, len(self.hist) - 1)
+        self.hist += np.bincount(idx, weights=counts, minlength=len(self.hist)).astype(np.int64)
+
+    # ---------- read side ----------
+    def std(self):
+        return float(np.sqrt(self.m2 / (self.count - 1))) if self.count > 1 else None
+
+    def quantiles(self, qs):
+        """
+        Quantiles with linear interpolation between order statistics, like pandas
+        """
+        if self.count == 0:
+            return [np.nan] * len(qs)
+        positions = (self.count - 1) * np.asarray(qs, dtype=float)
+        low = np.floor(positions)
+        frac = positions - low
+        return list(self._at_rank(low) * (1 - frac) + self._at_rank(np.minimum(low + 1, self.count - 1)) * frac)
+
+    def _at_rank(self, ranks):
+        # Value of the k-th smallest observation (0-based)
+        if self.exact:
+            return self.values[np.searchsorted(np.cumsum(self.counts), ranks, side="right")]
+        cum = np.cumsum(self.hist)
+        idx = np.searchsorted(cum, ranks, side="right")
+        before = np.where(idx > 0, cum[np.maximum(idx - 1, 0)], 0)
+        inside = (ranks - before + 0.5) / np.maximum(self.hist[idx], 1)
+        return np.clip(self.lo + (idx + inside) * self.width, self.min, self.max)
+
+    def distribution(self):
+        """
+        (values, weights) pairs describing the data: exact values or fine bin centres
+        """
+        if self.exact:
+            return self.values, self.counts
+        centres = self.lo + (np.arange(len(self.hist)) + 0.5) * self.width
+        keep = self.hist > 0
+        return np.clip(centres[keep], self.min, self.max), self.hist[keep]
+
+    def histogram(self, nbins):
+        if self.count == 0:
+            return {"edges": np.array([]), "counts": np.array([], dtype=np.int64)}
+        values, weights = self.distribution()
+        counts, edges = np.histogram(values, bins=nbins, range=(self.min, self.max), weights=weights)
+        return {"edges": edges, "counts": counts.astype(np.int64)}
+
+    def top(self, k):
+        values, weights = self.distribution() if self.exact else (np.array([]), np.array([]))
+        order = np.argsort(-weights, kind="stable")[:k]
+        return [(values[i], int(weights[i])) for i in order]
+
+    def nbytes(self):
+        arrays = (self.values, self.counts) if self.exact else (self.hist,)
+        return sum(a.nbytes for a in arrays)
+
+
+class CategorySketch:
+    """
+    Exact value counts of a non-numeric column, up to MAX_CATEGORIES values
+    """
+
+    def __init__(self):
+        self.nulls = 0
+        self.counts = pd.Series(dtype=np.int64)
+        self.other = 0
+
+    @property
+    def count(self):
+        return int(self.counts.sum()) + self.other
+
+    def update(self, values):
+        series = pd.Series(values)
+        self.nulls += int(series.isna().sum())
+        counts = series.dropna().astype(str).value_counts()
+        self.counts = self.counts.add(counts, fill_value=0).astype(np.int64)
+        if len(self.counts) > MAX_CATEGORIES:
+            # Keep the most frequent values; the rest is only counted
+            self.counts = self.counts.sort_values(ascending=False)
+            self.other += int(self.counts.iloc[MAX_CATEGORIES:].sum())
+            self.counts = self.counts.iloc[:MAX_CATEGORIES]
+
+    def nbytes(self):
+        return int(self.counts.memory_usage(deep=True))
+
+
+class StreamingSummary:
+    """
+    Everything the dashboards draw, accumulated over a stream of chunks
+
+    Args:
+        group_by: Columns whose values split the numeric sketches, so that
+            grouped box plots (e.g. a value by ``target``) can be drawn
+        sample_rows: Size of the uniform random row sample kept
+        seed: Seed of the sampler
+        schema: Column types applied to every chunk (see utils.schemas)
+    """
+
+    def __init__(self, group_by=(), sample_rows=SAMPLE_ROWS, seed=0, schema=None):
+        self.group_by = list(group_by)
+        self.schema = schema
+        self.sample_rows = sample_rows
+        self.rows = 0
+        self.columns = None
+        self.dtypes = {}
+        self.numeric = {}
+        self.categorical = {}
+        self.grouped = {g: {} for g in self.group_by}
+        self.correlation = None
+        self.sample = None
+        self._keys = np.array([])
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_csv(cls, path, fillna=None, group_by=(), chunk_rows=CHUNK_ROWS, schema=None, **kwargs):
+        """
+        Summary of a CSV file in one chunked pass
+        """
+        summary = cls(group_by=group_by, schema=schema, **kwargs)
+        for chunk in pd.read_csv(path, chunksize=chunk_rows):
+            if fillna is not None:
+                chunk = chunk.fillna(fillna)
+            summary.update(chunk)
+        return summary
+
+    def update(self, chunk):
+        """
+        Fold a chunk of rows into every aggregate
+        """
+        chunk = apply_schema(chunk, self.schema)
+        if self.columns is None:
+            self._init_columns(chunk)
+
+        numeric = {}
+        for column, sketch in self.numeric.items():
+            values = chunk[column]
+            if not pd.api.types.is_numeric_dtype(values):
+                values = pd.to_numeric(values, errors="coerce")
+            numeric[column] = values.to_numpy(dtype=float, na_value=np.nan)
+            sketch.update(numeric[column])
+        for column, sketch in self.categorical.items():
+            sketch.update(chunk[column])
+
+        for group, sketches in self.grouped.items():
+            keys = chunk[group].astype(str) if group in self.categorical else chunk[group]
+            for value, index in keys.groupby(keys, sort=False).indices.items():
+                per_column = sketches.setdefault(_plain(value), {c: NumericSketch() for c in self.numeric})
+                for column, sketch in per_column.items():
+                    sketch.update(numeric[column][index])
+
+        self.correlation.update(np.column_stack([numeric[c] for c in self.correlation.columns])
+                                if self.correlation.columns else np.empty((len(chunk), 0)))
+        self._sample(chunk)
+        self.rows += len(chunk)
+        return self
+
+    def _init_columns(self, chunk):
+        self.columns = [str(c) for c in chunk.columns]
+        for column in chunk.columns:
+            series = chunk[column]
+            self.dtypes[column] = str(series.dtype)
+            if pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series):
+                self.numeric[column] = NumericSketch()
+            else:
+                self.categorical[column] = CategorySketch()
+        self.correlation = CorrelationStats(list(self.numeric))
+
+    def _sample(self, chunk):
+        # Keep the rows with the smallest random keys: a uniform sample
+        # without replacement, whatever the number of chunks
+        keys = self._rng.random(len(chunk))
+        positions = np.arange(self.rows, self.rows + len(chunk))
+        if self.sample is not None and len(self.sample) >= self.sample_rows:
+            candidates = keys < self._keys.max()
+            chunk, keys, positions = chunk[candidates], keys[candidates], positions[candidates]
+        # Rows are indexed by their position in the file
+        rows = chunk.set_axis(positions, axis=0)
+        merged = rows if self.sample is None else pd.concat([self.sample, rows])
+        merged_keys = np.concatenate([self._keys, keys])
+        if len(merged) > self.sample_rows:
+            keep = np.argpartition(merged_keys, self.sample_rows)[:self.sample_rows]
+            merged, merged_keys = merged.iloc[keep], merged_keys[keep]
+        self.sample, self._keys = merged, merged_keys
+
+    # ---------- read side ----------
+    def sample_frame(self):
+        """
+        The row sample in file order, with a fresh index
+        """
+        if self.sample is None:
+            return pd.DataFrame()
+        # Chunks bring their own categories; unify them again
+        return apply_schema(self.sample.sort_index().reset_index(drop=True), self.schema)
+
+    def profile(self, top_k=10):
+        """
+        Profile in the format of ``utils.profiling.profile_frame``
+        """
+        columns = {}
+        for column in self.columns or []:
+            if column in self.numeric:
+                sketch = self.numeric[column]
+                info = {
+                    "count": sketch.count,
+                    "nulls": sketch.nulls,
+                    "dtype": self.dtypes[column],
+                    "class": "numeric",
+                    "distinct": len(sketch.values) if sketch.exact else None,
+                    "top": [[_plain(v), c] for v, c in sketch.top(top_k)],
+                    "min": _plain(sketch.min) if sketch.count else None,
+                    "max": _plain(sketch.max) if sketch.count else None,
+                    "mean": float(sketch.mean) if sketch.count else None,
+                    "std": sketch.std(),
+                }
+            else:
+                sketch = self.categorical[column]
+                counts = sketch.counts.sort_values(ascending=False, kind="stable")
+                info = {
+                    "count": sketch.count,
+                    "nulls": sketch.nulls,
+                    "dtype": self.dtypes[column],
+                    "class": "categorical",
+                    "distinct": len(counts) if not sketch.other else None,
+                    "top": [[v, int(c)] for v, c in counts.head(top_k).items()],
+                }
+            columns[column] = info
+        return {"rows": self.rows, "columns": columns, "streamed": True}
+
+    def value_counts(self, column):
+        """
+        Counts per value, most frequent first, like Series.value_counts()
+        """
+        if column in self.categorical:
+            counts = self.categorical[column].counts
+        elif column in self.numeric and self.numeric[column].exact:
+            sketch = self.numeric[column]
+            counts = pd.Series(sketch.counts, index=[_plain(v) for v in sketch.values])
+        else:
+            return None
+        return counts.sort_values(ascending=False, kind="stable").rename("count").rename_axis(column)
+
+    def group_mean(self, group, value):
+        """
+        Mean of ``value`` per value of ``group``, like df.groupby(group)[value].mean()
+
+        Returns None when ``value`` is not numeric or ``group`` was not
+        listed in ``group_by``.
+        """
+        if value not in self.numeric or group not in self.grouped:
+            return None
+        means = {label: per_column[value].mean
+                 for label, per_column in sorted(self.grouped[group].items())
+                 if per_column[value].count}
+        return pd.Series(means, name=value, dtype=float).rename_axis(group)
+
+    def histogram(self, column, nbins=30):
+        """
+        Bins in the format of ``utils.binning.histogram_bins``
+        """
+        if column in self.numeric:
+            return self.numeric[column].histogram(nbins)
+        counts = self.categorical[column].counts.sort_index()
+        return {"labels": counts.index.tolist(), "counts": counts.to_numpy()}
+
+    def box_stats(self, value, group=None, whisker=1.5):
+        """
+        Box summary in the format of ``utils.boxstats.compute_box_stats``
+
+        Outliers are not tracked, so every ``outliers`` entry is empty.
+        Returns None when ``value`` is not numeric or ``group`` was not
+        listed in ``group_by``.
+        """
+        if value not in self.numeric:
+            return None
+        if group is None:
+            sketches = [(value, self.numeric[value])]
+        elif group in self.grouped:
+            sketches = [(label, per_column[value]) for label, per_column in sorted(self.grouped[group].items())]
+        else:
+            return None
+
+        stats = {k: [] for k in ("labels", "count", "q1", "median", "q3",
+                                 "lowerfence", "upperfence", "mean", "sd", "outliers")}
+        for label, sketch in sketches:
+            if sketch.count == 0:
+                continue
+            q1, median, q3 = sketch.quantiles([0.25, 0.5, 0.75])
+            values, weights = sketch.distribution()
+            inside = values[(values >= q1 - whisker * (q3 - q1)) & (values <= q3 + whisker * (q3 - q1))]
+            stats["labels"].append(label)
+            stats["count"].append(sketch.count)
+            stats["q1"].append(float(q1))
+            stats["median"].append(float(median))
+            stats["q3"].append(float(q3))
+            stats["lowerfence"].append(float(inside.min()) if len(inside) else float(q1))
+            stats["upperfence"].append(float(inside.max()) if len(inside) else float(q3))
+            stats["mean"].append(float(sketch.mean))
+            stats["sd"].append(sketch.std() or 0.0)
+            stats["outliers"].append(np.array([]))
+        return stats
+
+    def corr(self, columns=None):
+        """
+        Pearson correlation of the numeric columns, or None if one is not tracked
+        """
+        matrix = self.correlation.corr()
+        if columns is None:
+            return matrix
+        columns = list(columns)
+        if not set(columns) <= set(matrix.columns):
+            return None
+        return matrix.loc[columns, columns]
+
+    def nbytes(self):
+        sketches = list(self.numeric.values()) + list(self.categorical.values())
+        for per_value in self.grouped.values():
+            for per_column in per_value.values():
+                sketches.extend(per_column.values())
+        sample = int(self.sample.memory_usage(deep=True).sum()) if self.sample is not None else 0
+        return sum(s.nbytes() for s in sketches) + sample
+
+
+def _plain(value):
+    # numpy scalars -> Python numbers; whole floats -> int (as in the CSV)
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def estimate_memory(csv_path, rows=ESTIMATE_ROWS):
+    """
+    Approximate in-memory size of a CSV loaded with pandas, from its first rows
+    """
+    with open(csv_path, "rb") as fh:
+        head = b"".join(itertools.islice(fh, rows + 1))
+    frame = pd.read_csv(io.BytesIO(head))
+    if len(frame) == 0:
+        return 0
+    bytes_per_row = frame.memory_usage(deep=True).sum() / len(frame)
+    csv_bytes_per_row = len(head) / (len(frame) + 1)
+    return int(os.path.getsize(csv_path) / csv_bytes_per_row * bytes_per_row)
+
+
+def summary_path(csv_path):
+    """
+    Saved summary location: data/.store/<stem>.summary.pkl
+    """
+    target = store_path(csv_path)
+    return target.with_name(Path(csv_path).stem + SUMMARY_SUFFIX)
+
+
+def load_summary(csv_path, version, fillna=None, group_by=(), schema=None):
+    """
+    Saved summary of a CSV if it matches ``version``, else a freshly built one
+
+    Args:
+        csv_path: Source CSV file
+        version: Dataset version (registry fingerprint) the summary is for
+        fillna: Value missing cells are replaced with, as in the registry
+        group_by: Columns numeric sketches are split by
+        schema: Column types (see utils.schemas)
+    """
+    target = summary_path(csv_path)
+    try:
+        with open(target, "rb") as fh:
+            saved = pickle.load(fh)
+        if saved["version"] == version and saved["group_by"] == list(group_by):
+            return saved["summary"]
+    except (OSError, EOFError, pickle.UnpicklingError, KeyError, AttributeError):
+        pass
+
+    summary = StreamingSummary.from_csv(csv_path, fillna=fillna, group_by=group_by, schema=schema)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + f".{os.getpid()}.tmp")
+    with open(tmp, "wb") as fh:
+        pickle.dump({"version": version, "group_by": list(group_by), "summary": summary}, fh,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, target)
+    return summary
+
+
+def summary_for(df):
+    """
+    The full-data summary behind a sampled frame, or None for loaded datasets
+    """
+    if not df.attrs.get("streamed"):
+        return None
+    from utils.registry import get_summary
+    return get_summary(df.attrs["dataset"])
+
+
+def value_counts(df, column):
+    """
+    df[column].value_counts(), over the full data even for streamed datasets
+    """
+    summary = summary_for(df)
+    counts = summary.value_counts(column) if summary is not None else None
+    return counts if counts is not None else df[column].value_counts()
+
+
+def streaming_notice(df, cohort=None):
+    """
+    Tell the reader which parts of a page come from a sample
+
+    Args:
+        df: DataFrame from the dataset registry
+        cohort: Result of ``utils.cohort.cohort_filter`` on ``df``, if any
+    """
+    summary = summary_for(df)
+    if summary is None:
+        return
+    import streamlit as st
+
+    if cohort is not None and cohort is not df:
+        # Filters select rows of the sample; the full-data summary has no rows
+        st.info(
+            f"This dataset has {summary.rows:,} rows, more than fit in memory. "
+            f"The cohort filters select from a random sample of {len(df):,} rows: "
+            f"with filters set, every statistic and chart on this page uses the "
+            f"{len(cohort):,} sampled rows in the cohort, a subset of the sample rather than of every row."
+        )
+        return
+    st.info(
+        f"This dataset has {summary.rows:,} rows, more than fit in memory. "
+        f"Statistics, counts, histograms, box plots and correlations cover every row; "
+        f"the preview, scatter plots and the graph builder use a random sample of {len(df):,} rows."
+    )
+
+
+def main(argv=None):
+    from utils.registry import DATASETS, file_fingerprint
+    from utils.schemas import SCHEMAS
+
+    names = (argv if argv is not None else sys.argv[1:]) or list(DATASETS)
+    for name in names:
+        spec = DATASETS[name]
+        if not Path(spec["path"]).exists():
+            print(f"{name}: {spec['path']} not found, skipped")
+            continue
+        summary = load_summary(spec["path"], file_fingerprint(spec["path"]),
+                               fillna=spec.get("fillna"), group_by=spec.get("group_by", ()),
+                               schema=SCHEMAS.get(name))
+        print(f"{name}: {summary.rows:,} rows summarised -> {summary_path(spec['path'])} "
+              f"({summary.nbytes() / 2**20:.1f} MB in memory)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
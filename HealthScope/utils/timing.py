@@ -0,0 +1,228 @@
+"""
+HealthScope Render Timing
+Per-section timing of the dashboards with an optional sidebar profiler panel
+
+Each page section runs inside ``section(name)``. Its time is split into
+``build`` (figure construction, marked with ``timed("build")`` or
+``phase("build")``), ``render`` (the ``st.plotly_chart`` calls made through
+``plotly_chart``) and ``compute`` (everything else: aggregation, stats).
+Aggregation helpers marked ``timed("compute")`` are subtracted from the
+figure builders that call them. Serialized figure sizes are recorded too.
+
+Timing is off unless the sidebar "Profiler" toggle is on or the
+HEALTHSCOPE_PROFILE environment variable is set. When it is off, the helpers
+add no work. The latest timings of each section are kept in session state,
+so the panel also shows sections that last ran in a fragment rerun; during
+such a rerun the sidebar is not redrawn, and the section shows its own
+timing line instead. Every finished section is also written as one JSON line to the
+``healthscope.timing`` logger (and to HEALTHSCOPE_TIMING_LOG, if set) so
+timings can be aggregated across sessions.
+"""
+
+import functools
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+
+
+PROFILER_KEY = "hs_profiler"
+TIMINGS_KEY = "hs_timings"
+PHASES = ("compute", "build", "render")
+
+logger = logging.getLogger("healthscope.timing")
+if os.environ.get("HEALTHSCOPE_TIMING_LOG") and not logger.handlers:
+    _handler = logging.FileHandler(os.environ["HEALTHSCOPE_TIMING_LOG"], encoding="utf-8")
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+_state = threading.local()
+
+
+def enabled():
+    """
+    True when timings should be recorded for the current run
+    """
+    if os.environ.get("HEALTHSCOPE_PROFILE"):
+        return True
+    try:
+        return bool(st.session_state.get(PROFILER_KEY, False))
+    except Exception:
+        return False
+
+
+def _timings():
+    # Latest record per (page, section); a plain dict outside a session
+    try:
+        return st.session_state.setdefault(TIMINGS_KEY, {})
+    except Exception:
+        if not hasattr(_state, "timings"):
+            _state.timings = {}
+        return _state.timings
+
+
+def _run_ctx():
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        return get_script_run_ctx()
+    except Exception:
+        return None
+
+
+def _session_id():
+    ctx = _run_ctx()
+    return ctx.session_id if ctx else None
+
+
+def _fragment_run():
+    """
+    True while only fragments are rerunning (the sidebar is not redrawn)
+    """
+    ctx = _run_ctx()
+    return bool(ctx and getattr(ctx, "fragment_ids_this_run", None))
+
+
+class Section:
+    """
+    Timings of one page section, filled in while it runs
+    """
+
+    def __init__(self, page, name):
+        self.page = page
+        self.name = name
+        self.ms = dict.fromkeys(PHASES, 0.0)
+        self.total_ms = 0.0
+        self.payload_bytes = 0
+        self.charts = 0
+        # Open timed frames: [phase, start, time spent in nested frames]
+        self.stack = []
+
+    def as_record(self):
+        return {
+            "ts": time.time(),
+            "session": _session_id(),
+            "page": self.page,
+            "section": self.name,
+            "total_ms": round(self.total_ms, 2),
+            **{f"{p}_ms": round(self.ms[p], 2) for p in PHASES},
+            "payload_bytes": self.payload_bytes,
+            "charts": self.charts,
+        }
+
+
+@contextmanager
+def section(name, page=None):
+    """
+    Time a page section
+
+    Args:
+        name: Section name shown in the profiler panel
+        page: Page name; defaults to the page of the enclosing section
+    """
+    if not enabled():
+        yield None
+        return
+
+    parent = getattr(_state, "section", None)
+    sec = Section(page or (parent.page if parent else None), name)
+    _state.section = sec
+    start = time.perf_counter()
+    try:
+        yield sec
+    finally:
+        sec.total_ms = (time.perf_counter() - start) * 1000
+        timed_ms = sec.ms["build"] + sec.ms["render"] + sec.ms["compute"]
+        sec.ms["compute"] += max(0.0, sec.total_ms - timed_ms)
+        _state.section = parent
+        record = sec.as_record()
+        _timings()[(sec.page, name)] = record
+        logger.info(json.dumps(record))
+    if parent is None and _fragment_run():
+        st.caption(
+            f"⏱️ {name}: {record['total_ms']:.0f} ms · compute {record['compute_ms']:.0f} · "
+            f"build {record['build_ms']:.0f} · render {record['render_ms']:.0f} · "
+            f"{record['payload_bytes'] / 1024:.0f} KB"
+        )
+
+
+@contextmanager
+def phase(name):
+    """
+    Attribute the enclosed block to a phase of the current section
+
+    Time spent in nested phases is attributed to them, not to this one.
+    """
+    sec = getattr(_state, "section", None)
+    if sec is None:
+        yield
+        return
+
+    frame = [name, time.perf_counter(), 0.0]
+    sec.stack.append(frame)
+    try:
+        yield
+    finally:
+        sec.stack.pop()
+        elapsed = (time.perf_counter() - frame[1]) * 1000
+        sec.ms[name] += elapsed - frame[2]
+        if sec.stack:
+            sec.stack[-1][2] += elapsed
+
+
+def timed(name):
+    """
+    Decorator form of ``phase``
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if getattr(_state, "section", None) is None:
+                return fn(*args, **kwargs)
+            with phase(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def plotly_chart(fig, **kwargs):
+    """
+    st.plotly_chart that records render time and payload size when profiling
+    """
+    sec = getattr(_state, "section", None)
+    if sec is None:
+        return st.plotly_chart(fig, **kwargs)
+
+    from utils.charts import figure_to_json
+
+    sec.payload_bytes += len(figure_to_json(fig))
+    sec.charts += 1
+    with phase("render"):
+        return st.plotly_chart(fig, **kwargs)
+
+
+def profiler_panel(page=None):
+    """
+    Sidebar toggle and table of the latest timings of each section
+
+    Call once, at the end of a page.
+
+    Args:
+        page: Only list the sections of this page
+    """
+    st.sidebar.toggle("Profiler", key=PROFILER_KEY,
+                      help="Time each section of this page")
+    records = [r for r in _timings().values() if page is None or r["page"] == page]
+    if enabled() and records:
+        import pandas as pd
+
+        table = pd.DataFrame(records)[
+            ["section", "total_ms", "compute_ms", "build_ms", "render_ms", "payload_bytes", "charts"]
+        ].rename(columns={"payload_bytes": "bytes"})
+        st.sidebar.markdown("#### ⏱️ Section timings")
+        st.sidebar.dataframe(table.set_index("section").round(1), use_container_width=True)
+        st.sidebar.caption(f"Total: {table['total_ms'].sum():.0f} ms · {table['bytes'].sum() / 1024:.0f} KB sent")
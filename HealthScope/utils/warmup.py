@@ -0,0 +1,109 @@
+"""
+HealthScope Cache Warm-up
+Build every on-disk cache the pages read before the first visitor does
+
+Run after a deploy, from the HealthScope directory:
+
+    python main.py warmup [--workers N] [--no-figures] [dataset ...]
+
+For every registered dataset (the Home page's overview cards and the three
+dashboards), in parallel on one process pool:
+
+    1. the Arrow store of each CSV that is loaded whole (utils.datastore)
+    2. the precomputed aggregates: profile, histograms, box plots,
+       correlations, value counts, group means
+       (utils.worker), which also writes the streaming summary of a dataset
+       too large to load
+    3. the profiles behind the stat blocks (utils.profiling)
+    4. every default dashboard figure (utils.sections, rendered as in
+       utils.report), built from the warm stores to prove that each page
+       section renders
+
+Steps that are already current are skipped, so a second run is cheap. The
+Streamlit server's own in-memory caches are per process and cannot be
+filled from here; with the stores above in place they fill on the first
+view without recomputing anything.
+
+The exit status is non-zero when a dataset file is missing or any step
+failed, so a readiness probe can wait on it.
+"""
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from utils.registry import DATASETS, too_large
+
+
+log = logging.getLogger("healthscope.warmup")
+
+
+def _run(pool, label, calls):
+    """
+    Submit ``calls`` ({name: (fn, *args)}) and return how many raised
+    """
+    futures = {pool.submit(*call): name for name, call in calls.items()}
+    failures = 0
+    for future in as_completed(futures):
+        name = futures[future]
+        try:
+            future.result()
+            log.info("%s: %s ready", name, label)
+        except Exception:
+            failures += 1
+            log.exception("%s: %s failed", name, label)
+    return failures
+
+
+def warm(names, workers=None, figures=True):
+    """
+    Bring every cache of the given datasets up to date
+
+    Args:
+        names: Registered dataset names
+        workers: Pool processes (default: one per CPU)
+        figures: Also build every default figure
+
+    Returns:
+        Number of failures (missing files included)
+    """
+    from utils.datastore import ARROW_AVAILABLE, convert_csv, is_current
+    from utils.profiling import build_profile
+    from utils.report import quiet, render_group
+    from utils.schemas import SCHEMAS
+    from utils.sections import GROUPS
+    from utils.worker import changed, refresh
+
+    failures = 0
+    present = []
+    for name in names:
+        if Path(DATASETS[name]["path"]).exists():
+            present.append(name)
+        else:
+            failures += 1
+            log.error("%s: %s is missing", name, DATASETS[name]["path"])
+
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=quiet) as pool:
+        if ARROW_AVAILABLE:
+            failures += _run(pool, "Arrow store", {
+                name: (convert_csv, DATASETS[name]["path"], SCHEMAS.get(name))
+                for name in present
+                if not too_large(DATASETS[name]) and not is_current(DATASETS[name]["path"])
+            })
+
+        stale = changed(present, {})
+        if stale:
+            log.info("precomputing %s", ", ".join(stale))
+            # No heartbeat: pages must not wait on a run that is about to exit
+            failures += refresh(pool, stale, heartbeat=False)
+
+        failures += _run(pool, "profile", {name: (build_profile, name) for name in present})
+
+        if figures:
+            failures += _run(pool, "figures", {
+                f"{name}/{group}": (render_group, name, group, None, ())
+                for name in present if name in GROUPS for group in GROUPS[name]
+            })
+    return failures
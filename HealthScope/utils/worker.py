@@ -0,0 +1,329 @@
+"""
+HealthScope Precompute Worker
+Watches data/ and republishes every dataset's aggregates when its file changes
+
+Run it next to the Streamlit server, from the HealthScope directory:
+
+    python -m utils.worker [--interval 2] [--workers N] [--once] [dataset ...]
+
+Each source file is checked every ``--interval`` seconds, first by size and
+modification time and then by content hash, so a file that was only touched
+is not recomputed. For a changed dataset the worker converts the CSV to its
+Arrow store (or builds the streaming summary of a dataset too large to
+load), computes the profile, histograms, box plot quantiles, correlations,
+value counts and group means (read by the Interactive Graph Builder) on a
+process pool, one task per kind, and publishes them together to the store in
+utils.precomputed. Pool processes memory-map the Arrow store, once per
+process and version, rather than parsing the CSV. ``--once`` refreshes
+what is out of date and exits.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from utils.precomputed import beat, file_stat, is_current, publish, read_entry
+from utils.registry import DATASETS, too_large
+
+
+HISTOGRAM_BINS = (2, 25, 30)
+# Columns with at most this many distinct values are used as groups
+MAX_LEVELS = 20
+
+log = logging.getLogger("healthscope.worker")
+
+# One registry per pool process, so each dataset is loaded once per process
+# and version; with the Arrow store current, loading is a memory map
+_registry = None
+
+
+def _dataset(name):
+    global _registry
+    if _registry is None:
+        from utils.registry import DatasetRegistry
+        _registry = DatasetRegistry()
+    return _registry.get(name), _registry.summary(name)
+
+
+def _levels(df, summary):
+    if summary is not None:
+        counts = {c: summary.value_counts(c) for c in df.columns}
+        return [c for c, vc in counts.items() if vc is not None and len(vc) <= MAX_LEVELS]
+    return [c for c in df.columns if df[c].nunique() <= MAX_LEVELS]
+
+
+def _numeric(df):
+    from utils.correlation import numeric_columns
+    return [c for c in numeric_columns(df) if df[c].dtype != bool]
+
+
+def compute_profile(df, summary, name, digest):
+    from utils.profiling import profile_frame
+
+    profile = summary.profile() if summary is not None else profile_frame(df)
+    profile.update(dataset=name, source=DATASETS[name]["path"], hash=digest)
+    return {None: profile}
+
+
+def compute_histograms(df, summary, name, digest):
+    from utils.binning import column_bins
+
+    results = {}
+    for column in df.columns:
+        for nbins in HISTOGRAM_BINS:
+            if summary is not None:
+                results[(column, nbins)] = summary.histogram(column, nbins)
+            else:
+                results[(column, nbins)] = column_bins(df, column, nbins)
+    return results
+
+
+def compute_box_stats(df, summary, name, digest):
+    from utils.boxstats import compute_box_stats as box
+
+    results = {}
+    for value in _numeric(df):
+        for group in [None] + _levels(df, summary):
+            if group == value:
+                continue
+            stats = summary.box_stats(value, group) if summary is not None else box(df, value, group)
+            if stats is not None:
+                results[(value, group)] = stats
+    return results
+
+
+def compute_correlation(df, summary, name, digest):
+    from utils.correlation import CorrelationStats, numeric_columns
+
+    columns = tuple(numeric_columns(df))
+    if summary is not None:
+        matrix = summary.corr(columns)
+    else:
+        matrix = CorrelationStats.from_frame(df, list(columns)).corr()
+    return {columns: matrix} if matrix is not None else {}
+
+
+def compute_value_counts(df, summary, name, digest):
+    results = {}
+    for column in df.columns:
+        counts = summary.value_counts(column) if summary is not None else df[column].value_counts()
+        if counts is not None:
+            results[column] = counts
+    return results
+
+
+def compute_group_means(df, summary, name, digest):
+    from utils.aggregates import OPERATIONS
+
+    results = {}
+    for by in _levels(df, summary):
+        for column in _numeric(df):
+            if column == by:
+                continue
+            if summary is not None:
+                means = summary.group_mean(by, column)
+            else:
+                means = OPERATIONS["group_mean"](df, by, column)
+            if means is not None:
+                results[(by, column)] = means
+    return results
+
+
+TASKS = {
+    "profile": compute_profile,
+    "histogram": compute_histograms,
+    "box_stats": compute_box_stats,
+    "correlation": compute_correlation,
+    "value_counts": compute_value_counts,
+    "group_mean": compute_group_means,
+}
+
+
+def prepare(name):
+    """
+    Write the Arrow store of a dataset, or the streaming summary of one too
+    large to load, for the tasks to load from
+    """
+    from utils.datastore import ARROW_AVAILABLE, convert_csv, is_current as store_is_current
+    from utils.schemas import SCHEMAS
+
+    spec = DATASETS[name]
+    if too_large(spec):
+        _dataset(name)
+    elif ARROW_AVAILABLE and not store_is_current(spec["path"]):
+        convert_csv(spec["path"], SCHEMAS.get(name))
+    return name
+
+
+def run_task(name, kind, digest):
+    df, summary = _dataset(name)
+    start = time.perf_counter()
+    results = TASKS[kind](df, summary, name, digest)
+    return results, (time.perf_counter() - start) * 1000
+
+
+def changed(names, seen):
+    """
+    Datasets whose source changed since the last check and whose store entry
+    is not current
+
+    ``seen`` maps each dataset to the source stat it is known to be current
+    for; it is updated here for entries that are already current, and by
+    ``refresh`` once a new entry is published.
+    """
+    out = []
+    for name in names:
+        path = Path(DATASETS[name]["path"])
+        try:
+            stat = file_stat(path)
+        except OSError:
+            continue
+        if seen.get(name) == stat:
+            continue
+        entry = read_entry(path)
+        if entry is None or not is_current(entry, path):
+            out.append(name)
+        else:
+            seen[name] = stat
+    return out
+
+
+def completed(futures, interval, names, heartbeat=True):
+    """
+    Yield futures as they finish, renewing the heartbeat of ``names`` while
+    waiting (unless ``heartbeat`` is False)
+    """
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, timeout=interval, return_when=FIRST_COMPLETED)
+        if heartbeat:
+            beat(interval, names)
+        yield from done
+
+
+def _publish(name, version, results, seen):
+    # Record the version as seen only once its entry is written, so a failed
+    # write is retried on the next check
+    try:
+        publish(DATASETS[name]["path"], *version, results)
+    except Exception:
+        log.exception("%s: publishing failed", name)
+        return False
+    if seen is not None:
+        seen[name] = version[1]
+    return True
+
+
+def refresh(pool, names, interval=2.0, seen=None, heartbeat=True):
+    """
+    Recompute and publish the aggregates of each dataset in ``names``
+
+    A dataset is published once all its tasks have finished. Kinds whose
+    task failed are left out, and the pages compute those themselves.
+
+    Args:
+        pool: Process pool running the loads and tasks
+        names: Datasets to refresh
+        interval: Seconds between heartbeats while waiting
+        seen: Optional ``changed`` bookkeeping, updated for each dataset
+            that is published
+        heartbeat: Renew the worker heartbeat while waiting; one-shot
+            callers pass False, or pages would wait on a worker that is
+            about to exit
+
+    Returns:
+        Number of failed loads, tasks and publishes
+    """
+    from utils.profiling import content_hash
+
+    versions = {}
+    for name in names:
+        path = DATASETS[name]["path"]
+        stat = file_stat(path)
+        versions[name] = (content_hash(path), stat)
+
+    failures = 0
+    loaded = []
+    preparing = {pool.submit(prepare, name): name for name in names}
+    for future in completed(preparing, interval, names, heartbeat):
+        name = preparing[future]
+        try:
+            future.result()
+            loaded.append(name)
+        except Exception:
+            failures += 1
+            log.exception("%s: loading failed", name)
+            if not _publish(name, versions[name], {}, seen):
+                failures += 1
+
+    futures = {
+        pool.submit(run_task, name, kind, versions[name][0]): (name, kind)
+        for name in loaded for kind in TASKS
+    }
+    results = {name: {} for name in loaded}
+    pending = {name: len(TASKS) for name in loaded}
+    for future in completed(futures, interval, names, heartbeat):
+        name, kind = futures[future]
+        try:
+            results[name][kind], ms = future.result()
+            log.info("%s: %s (%d results) in %.0f ms", name, kind, len(results[name][kind]), ms)
+        except Exception:
+            failures += 1
+            log.exception("%s: %s failed", name, kind)
+        pending[name] -= 1
+        if pending[name] == 0:
+            if _publish(name, versions[name], results.pop(name), seen):
+                log.info("%s: published version %s", name, versions[name][0])
+            else:
+                failures += 1
+    return failures
+
+
+def watch(names, interval=2.0, workers=None, once=False):
+    """
+    Check the datasets every ``interval`` seconds and refresh changed ones
+
+    With ``once``, no heartbeat is written: the pages should not wait for a
+    worker that exits after this pass.
+    """
+    seen = {}
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as pool:
+        while True:
+            if not once:
+                beat(interval, names)
+            stale = changed(names, seen)
+            if stale:
+                log.info("refreshing %s", ", ".join(stale))
+                refresh(pool, stale, interval, seen, heartbeat=not once)
+            if once:
+                return
+            time.sleep(interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep the precomputed dashboard aggregates up to date")
+    parser.add_argument("datasets", nargs="*", help=f"datasets to watch (default: {', '.join(DATASETS)})")
+    parser.add_argument("--interval", type=float, default=2.0, help="seconds between checks")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="pool processes")
+    parser.add_argument("--once", action="store_true", help="refresh what is out of date and exit")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    unknown = set(args.datasets) - set(DATASETS)
+    if unknown:
+        parser.error(f"unknown datasets: {', '.join(sorted(unknown))}")
+    try:
+        watch(args.datasets or list(DATASETS), args.interval, args.workers, args.once)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())